@@ -1,13 +1,37 @@
 from crewai import Agent
-from together import Together
+from together import Together, AsyncTogether
 from core.game_state import GameState
 from langchain.chat_models.base import BaseChatModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator
 from pydantic import BaseModel, Field
 from openai import OpenAI
+import asyncio
+import base64
 import logging
 import random
+import time
 from db.client import MongoDBClient
+from core.narration_cache import NarrationCache
+from core.establishing_shots import EstablishingShotCache
+from core.image_store import ImageStore
+from utils.logging_utils import debug_event
+from utils.metrics import instrument_client, llm_method
+
+MODEL_NAME = "meta-llama/Llama-3-70b-chat-hf"
+
+def establishing_shot_prompt(character: str, location: Dict, world: Dict) -> str:
+    """DALL-E prompt for the opening scene of a character's game."""
+    return (
+        f"A wide establishing shot of {character} exploring {location['name']} "
+        f"in the fantasy world of {world['name']}. {location['description']} "
+        "Epic fantasy game art style with dramatic lighting and cinematic composition."
+    )
+
+def _chunk_text(chunk) -> str:
+    """Extract the new text from a streamed chat completion chunk."""
+    if not chunk.choices or not chunk.choices[0].delta:
+        return ""
+    return chunk.choices[0].delta.content or ""
 
 class CustomTogetherModel(BaseChatModel):
     client: Any = Field(default=None)
@@ -24,6 +48,7 @@ class CustomTogetherModel(BaseChatModel):
     def _llm_type(self) -> str:
         return "together"
 
+    @llm_method
     def _generate(self, messages: List[Dict[str, Any]], stop: List[str] | None = None) -> str:
         response = self.client.chat.completions.create(
             model=self.model_name,
@@ -39,12 +64,19 @@ class CustomTogetherModel(BaseChatModel):
         return {"model": self.model_name}
 
 class GameMasterAgent:
-    def __init__(self, api_key, openai_api_key):
+    def __init__(self, api_key, openai_api_key, narration_cache: Optional[NarrationCache] = None,
+                 shot_cache: Optional[EstablishingShotCache] = None,
+                 image_store: Optional[ImageStore] = None):
         try:
+            self.narration_cache = narration_cache
+            self.shot_cache = shot_cache
+            # Completion images are kept here; without it the DALL-E URL is stored as-is
+            self.image_store = image_store or (shot_cache.store if shot_cache else None)
             # Initialize Together client
-            self.client = Together(api_key=api_key)
+            self.client = instrument_client(Together(api_key=api_key), 'game_master')
+            self.async_client = instrument_client(AsyncTogether(api_key=api_key), 'game_master', asynchronous=True)
             self.chat_model = CustomTogetherModel(together_client=self.client)
-            self.openai_client = OpenAI(api_key=openai_api_key)
+            self.openai_client = instrument_client(OpenAI(api_key=openai_api_key), 'game_master')
             self.agent = Agent(
                 role='Game Master',
                 goal='Manage game flow and player interactions',
@@ -56,94 +88,74 @@ class GameMasterAgent:
             print(f"Error initializing agent: {str(e)}")
             raise
 
+    def cached_story_image(self, character: str, location: Dict, world: Dict) -> Optional[Dict]:
+        """Return the stored establishing shot for this scene without rendering one."""
+        if self.shot_cache is None:
+            return None
+        entry = self.shot_cache.get(establishing_shot_prompt(character, location, world))
+        if entry is None:
+            return None
+        return {
+            'url': self.shot_cache.store.url(entry['image']),
+            **self.shot_cache.store.variant_urls(entry['image']),
+            'type': 'establishing_shot',
+            'context': entry['context'],
+            'cached': True
+        }
+
+    @llm_method
     def generate_initial_story_image(self, character: str, location: Dict, world: Dict) -> Optional[Dict]:
         """Generate an image for the initial story scene"""
         try:
+            cached = self.cached_story_image(character, location, world)
+            if cached:
+                return cached
+
             # Craft a detailed prompt based on the character and location
-            prompt = (
-                f"A wide establishing shot of {character} exploring {location['name']} "
-                f"in the fantasy world of {world['name']}. {location['description']} "
-                "Epic fantasy game art style with dramatic lighting and cinematic composition."
-            )
+            prompt = establishing_shot_prompt(character, location, world)
+            context = {
+                'character': character,
+                'location': location['name'],
+                'world': world['name']
+            }
             
-            # Generate image using OpenAI's DALL-E
+            # Generate image using OpenAI's DALL-E; fetch the bytes directly
+            # when they are going to be kept, since DALL-E URLs expire
             response = self.openai_client.images.generate(
                 model="dall-e-3",
                 prompt=prompt,
                 n=1,
-                size="1024x1024"
+                size="1024x1024",
+                response_format="b64_json" if self.shot_cache else "url"
             )
             
             if response.data:
+                variants = {}
+                if self.shot_cache:
+                    entry = self.shot_cache.put(prompt, base64.b64decode(response.data[0].b64_json), context)
+                    store = self.shot_cache.store
+                    url = store.url(entry['image'])
+                    store.variants(entry['image'])
+                    variants = store.variant_urls(entry['image'])
+                else:
+                    url = response.data[0].url
                 return {
-                    'url': response.data[0].url,
+                    'url': url,
+                    **variants,
                     'type': 'establishing_shot',
-                    'context': {
-                        'character': character,
-                        'location': location['name'],
-                        'world': world['name']
-                    }
+                    'context': context
                 }
                 
         except Exception as e:
             print(f"Initial story image generation error: {e}")
             return None
 
-    def _find_matching_task(self, action: str, available_tasks: List) -> Optional[Any]:
-        """Find matching task based on action description."""
-        logging.info(f"Attempting to match action: {action}")
-        
-        # Clean up the action string - remove quotes and extra spaces
-        clean_action = action.strip('"\'').lower()
-        action_words = set(clean_action.split())
-        
-        logging.info(f"Cleaned action words: {action_words}")
-        
-        for task in available_tasks:
-            # Clean up description and title
-            desc_words = set(task.description.lower().split())
-            title_words = set(task.title.lower().split())
-            
-            # Calculate word overlap
-            common_words = desc_words.intersection(action_words)
-            desc_matches = len(common_words)
-            
-            logging.info(f"\nChecking task: {task.title}")
-            logging.info(f"Task description words: {desc_words}")
-            logging.info(f"Common words: {common_words}")
-            logging.info(f"Number of matching words: {desc_matches}")
-            
-            # Calculate similarity percentage
-            total_words = len(desc_words.union(action_words))
-            similarity = desc_matches / total_words if total_words > 0 else 0
-            logging.info(f"Similarity percentage: {similarity:.2%}")
-
-            # First condition: exact match
-            exact_match = clean_action == task.description.lower()
-            
-            # Second condition: significant word overlap
-            word_overlap = desc_matches >= 4
-            
-            # Third condition: high similarity
-            high_similarity = similarity >= 0.5
-            
-            logging.info(f"Exact match: {exact_match}")
-            logging.info(f"Word overlap: {word_overlap}")
-            logging.info(f"High similarity: {high_similarity}")
-            
-            if exact_match or word_overlap or high_similarity:
-                logging.info(f"Found matching task - ID: {task.task_id}")
-                return task
-
-        logging.info("No matching task found")
-        return None
-
     def _verify_required_items(self, required_items: List[str], inventory: Dict) -> bool:
-        logging.info(f"Verifying items: {required_items}")
+        debug_event('verify_items', items=list(required_items))
         return all(item in inventory and inventory[item] > 0 for item in required_items)
 
     def _consume_items(self, items: List[str], inventory: Dict) -> None:
-        logging.info(f"Consuming items: {items}")
+        debug_event('consume_items', items=list(items))
         for item in items:
             if item in inventory:
                 inventory[item] -= 1   
@@ -163,87 +175,213 @@ class GameMasterAgent:
         # Generic item use response
         return f"You use the {item_name}. Nothing special happens."
 
-    def process_action(self, action: str, game_state: GameState) -> str:
-        try:
-            logging.info(f"\n=== Processing action: {action} ===")
-            
-            # Check for examine/inspect actions first
-            if any(word in action.lower() for word in ['examine', 'inspect', 'look', 'check']):
-                logging.info("Detected examine/inspect action")
-                return self._generate_contextual_hints(game_state)
-                
-            # Handle item usage
-            if action.lower().startswith('use '):
-                logging.info("Detected item usage action")
-                item_name = action[4:].strip()
-                return self._process_item_use(item_name, game_state)
+    def _prepare_action(self, action: str, game_state: GameState,
+                        use_cache: bool = True) -> Tuple[Optional[str], Optional[List[Dict]], Optional[str]]:
+        """Resolve an action locally or from the narration cache if possible.
+
+        Returns ``(response, None, None)`` when no LLM call is needed, otherwise
+        ``(None, messages, cache_key)`` with the chat messages to send and the
+        key to store the result under (None when caching is off).
+        """
+        debug_event('game_master_action', action=action)
+        
+        # Check for examine/inspect actions first
+        if any(word in action.lower() for word in ['examine', 'inspect', 'look', 'check']):
+            debug_event('action_kind', kind='examine')
+            return self._generate_contextual_hints(game_state), None, None
+            
+        # Handle item usage
+        if action.lower().startswith('use '):
+            debug_event('action_kind', kind='use_item')
+            item_name = action[4:].strip()
+            return self._process_item_use(item_name, game_state), None, None
+        
+        # Try to match with puzzle tasks if puzzle exists
+        puzzle_response = None
+        if game_state.puzzle_progress:
+            matching_task = game_state.puzzle_progress.match_task(action)
             
-            # Try to match with puzzle tasks if puzzle exists
-            puzzle_response = None
-            if game_state.puzzle_progress:
-                available_tasks = game_state.puzzle_progress.get_available_tasks(game_state.inventory)
-                logging.info(f"Number of available tasks: {len(available_tasks)}")
-                logging.info(f"Available tasks: {[task.title for task in available_tasks]}")
+            if matching_task:
+                debug_event('task_matched', task_id=matching_task.task_id, title=matching_task.title)
                 
-                matching_task = self._find_matching_task(action, available_tasks)
+                # Attempt the task directly when found
+                reward = game_state.attempt_task(matching_task.task_id)
                 
-                if matching_task:
-                    logging.info(f"Found matching task: {matching_task.title}")
-                    logging.info(f"Attempting task completion for task ID: {matching_task.task_id}")
+                if reward:
+                    puzzle_response = f"Task completed: {matching_task.description}. Received: {reward}"
                     
-                    # Attempt the task directly when found
-                    reward = game_state.attempt_task(matching_task.task_id)
+                    if game_state.puzzle_progress.is_puzzle_solved():
+                        logging.info("Puzzle has been solved!")
+                        puzzle_response += "\n\nCongratulations! You have solved the puzzle and saved the realm!"
                     
-                    if reward:
-                        logging.info(f"Task completed successfully. Reward: {reward}")
-                        puzzle_response = f"Task completed: {matching_task.description}. Received: {reward}"
-                        
-                        if game_state.puzzle_progress.is_puzzle_solved():
-                            logging.info("Puzzle has been solved!")
-                            puzzle_response += "\n\nCongratulations! You have solved the puzzle and saved the realm!"
-                        
-                        # Log updated puzzle progress
-                        logging.info(f"Updated puzzle progress - Completed tasks: {game_state.puzzle_progress.completed_tasks}/{game_state.puzzle_progress.total_tasks}")
-                        return puzzle_response
-                    else:
-                        logging.info("Task attempt failed")
+                    debug_event('puzzle_progress', completed=game_state.puzzle_progress.completed_tasks,
+                                total=game_state.puzzle_progress.total_tasks)
+                    return puzzle_response, None, None
                 else:
-                    logging.info("No task matched for this action")
+                    debug_event('task_attempt_failed', task_id=matching_task.task_id)
+            else:
+                debug_event('task_matched', task_id=None)
+
+        cache_key = None
+        if use_cache and self.narration_cache is not None:
+            cache_key = self.narration_cache.make_key(action, game_state)
+            cached = self.narration_cache.lookup(cache_key)
+            if cached is not None:
+                debug_event('narration_cache_hit', key=cache_key)
+                return cached, None, None
 
-            logging.info("Generating contextual response using LLM")
-            # If no puzzle match or no puzzle exists, generate contextual response
-            location_name = game_state.current_location.get('name', 'this area')
-            location_desc = game_state.current_location.get('description', '')
+        debug_event('narration_cache_miss', key=cache_key)
+        # If no puzzle match or no puzzle exists, generate contextual response
+        location_name = game_state.current_location.get('name', 'this area')
+        location_desc = game_state.current_location.get('description', '')
+        
+        system_prompt = f"""You are the Game Master of a fantasy RPG game. Current context:
+        Location: {location_name}
+        Description: {location_desc}
+        Available items: {', '.join(game_state.inventory.keys())}
+        Last action: {action}
+        
+        Respond in character as a game master, providing an engaging response to the player's action.
+        Keep response under 3 sentences. Include references to the location and available items when relevant."""
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": action}
+        ]
+        return None, messages, cache_key
+
+    @llm_method
+    def process_action(self, action: str, game_state: GameState, use_cache: bool = True) -> str:
+        try:
+            response, messages, cache_key = self._prepare_action(action, game_state, use_cache)
+            if response is not None:
+                return response
             
-            system_prompt = f"""You are the Game Master of a fantasy RPG game. Current context:
-            Location: {location_name}
-            Description: {location_desc}
-            Available items: {', '.join(game_state.inventory.keys())}
-            Last action: {action}
+            start = time.perf_counter()
+            response = self.client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=0.7
+            )
+            # Without streaming the first token arrives with the whole response
+            logging.info("Time to first token: %.3fs", time.perf_counter() - start)
             
-            Respond in character as a game master, providing an engaging response to the player's action.
-            Keep response under 3 sentences. Include references to the location and available items when relevant."""
+            llm_response = response.choices[0].message.content
+            debug_event('llm_response', text=llm_response)
+            if cache_key:
+                self.narration_cache.store(cache_key, llm_response)
             
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": action}
-            ]
+            return llm_response
             
-            response = self.client.chat.completions.create(
-                model="meta-llama/Llama-3-70b-chat-hf",
+        except Exception as e:
+            logging.error(f"Error in process_action: {str(e)}")
+            logging.error(f"Full traceback: ", exc_info=True)
+            return "Something unexpected happened. Please try a different action."
+
+    @llm_method
+    async def process_action_async(self, action: str, game_state: GameState, use_cache: bool = True) -> str:
+        """Same as process_action, but awaits the LLM call instead of blocking.
+
+        The narration cache may be sqlite, so its reads and writes run on a
+        worker thread rather than on the event loop.
+        """
+        try:
+            response, messages, cache_key = await asyncio.to_thread(self._prepare_action, action, game_state, use_cache)
+            if response is not None:
+                return response
+            
+            start = time.perf_counter()
+            response = await self.async_client.chat.completions.create(
+                model=MODEL_NAME,
                 messages=messages,
                 temperature=0.7
             )
+            logging.info("Time to first token: %.3fs", time.perf_counter() - start)
             
             llm_response = response.choices[0].message.content
-            logging.info(f"Generated LLM response: {llm_response}")
+            debug_event('llm_response', text=llm_response)
+            if cache_key:
+                await asyncio.to_thread(self.narration_cache.store, cache_key, llm_response)
             
             return llm_response
             
         except Exception as e:
-            logging.error(f"Error in process_action: {str(e)}")
+            logging.error(f"Error in process_action_async: {str(e)}")
             logging.error(f"Full traceback: ", exc_info=True)
             return "Something unexpected happened. Please try a different action."
+
+    @llm_method
+    def stream_action(self, action: str, game_state: GameState, use_cache: bool = True) -> Iterator[str]:
+        """Yield the response to an action piece by piece as the LLM produces it."""
+        try:
+            response, messages, cache_key = self._prepare_action(action, game_state, use_cache)
+            if response is not None:
+                yield response
+                return
+            
+            start = time.perf_counter()
+            first_token = False
+            chunks = []
+            stream = self.client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=0.7,
+                stream=True
+            )
+            for chunk in stream:
+                text = _chunk_text(chunk)
+                if not text:
+                    continue
+                if not first_token:
+                    first_token = True
+                    logging.info("Time to first token: %.3fs", time.perf_counter() - start)
+                chunks.append(text)
+                yield text
+            logging.info("Streamed LLM response in %.3fs", time.perf_counter() - start)
+            if cache_key:
+                self.narration_cache.store(cache_key, ''.join(chunks))
+            
+        except Exception as e:
+            logging.error(f"Error in stream_action: {str(e)}")
+            logging.error(f"Full traceback: ", exc_info=True)
+            yield "Something unexpected happened. Please try a different action."
+
+    @llm_method
+    async def stream_action_async(self, action: str, game_state: GameState,
+                                  use_cache: bool = True) -> AsyncIterator[str]:
+        """Async version of stream_action for the ASGI entry point; cache access runs on a thread."""
+        try:
+            response, messages, cache_key = await asyncio.to_thread(self._prepare_action, action, game_state, use_cache)
+            if response is not None:
+                yield response
+                return
+            
+            start = time.perf_counter()
+            first_token = False
+            chunks = []
+            stream = await self.async_client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in stream:
+                text = _chunk_text(chunk)
+                if not text:
+                    continue
+                if not first_token:
+                    first_token = True
+                    logging.info("Time to first token: %.3fs", time.perf_counter() - start)
+                chunks.append(text)
+                yield text
+            logging.info("Streamed LLM response in %.3fs", time.perf_counter() - start)
+            if cache_key:
+                await asyncio.to_thread(self.narration_cache.store, cache_key, ''.join(chunks))
+            
+        except Exception as e:
+            logging.error(f"Error in stream_action_async: {str(e)}")
+            logging.error(f"Full traceback: ", exc_info=True)
+            yield "Something unexpected happened. Please try a different action."
         
     def _generate_contextual_hints(self, game_state: GameState) -> str:
         if not game_state.puzzle_progress:
@@ -328,6 +466,7 @@ class GameMasterAgent:
         Inventory: {game_state.inventory}
         Latest history: {game_state.history[-1] if game_state.history else 'None'}"""
     
+    @llm_method
     def generate_completion_image(self, game_state: GameState) -> Optional[Dict]:
         """Generate a final image capturing the player's journey and achievements"""
         try:
@@ -350,11 +489,20 @@ class GameMasterAgent:
                     n=1,
                     size="1024x1024",
                     quality="hd",
-                    style="vivid"
+                    style="vivid",
+                    response_format="b64_json" if self.image_store else "url"
                 )
                 
                 if response.data:
-                    image_url = response.data[0].url
+                    variants = {}
+                    if self.image_store:
+                        # Keep our own copy; DALL-E URLs expire within hours
+                        name = self.image_store.put(base64.b64decode(response.data[0].b64_json), 'png')
+                        image_url = self.image_store.url(name)
+                        self.image_store.variants(name)
+                        variants = self.image_store.variant_urls(name)
+                    else:
+                        image_url = response.data[0].url
                     
                     # Initialize MongoDB client
                     mongo_client = MongoDBClient()
@@ -364,7 +512,8 @@ class GameMasterAgent:
                         image_url=image_url,
                         puzzle_text=game_state.puzzle_progress.main_puzzle if game_state.puzzle_progress else "",
                         world_name=game_state.world['name'],
-                        character_name=character_name
+                        character_name=character_name,
+                        thumbnail_url=variants.get('thumbnail_url')
                     )
                     
                     # Close MongoDB connection
@@ -372,6 +521,7 @@ class GameMasterAgent:
                     
                     return {
                         'url': image_url,
+                        **variants,
                         'game_id': game_id,
                         'type': 'completion_shot',
                         'context': {
@@ -2,10 +2,11 @@
 from crewai import Agent
 from together import Together
 from typing import List, Dict
+from utils.metrics import instrument_client, llm_method
 
 class InventoryManagerAgent:
     def __init__(self, api_key):
-        self.client = Together(api_key=api_key)
+        self.client = instrument_client(Together(api_key=api_key), 'inventory_manager')
         self.agent = Agent(
             role='Inventory Manager',
             goal='Manage player inventory and item interactions',
@@ -13,6 +14,7 @@ class InventoryManagerAgent:
             allow_delegation=False
         )
     
+    @llm_method
     def detect_inventory_changes(self, current_inventory: Dict[str, int], action_result: str) -> List[Dict]:
         """Detect inventory changes based on action results."""
         system_prompt = """Analyze the game action result and detect any inventory changes.
@@ -60,6 +62,7 @@ class InventoryManagerAgent:
         """Check if an item can be used based on inventory."""
         return item_name in inventory and inventory[item_name] > 0
 
+    @llm_method
     def get_item_description(self, item_name: str) -> str:
         """Get a description for a specific item."""
         system_prompt = """Generate a brief, engaging description for a fantasy game item.
@@ -1,10 +1,11 @@
 # agents/safety_checker.py
 from crewai import Agent
 from together import Together
+from utils.metrics import instrument_client, llm_method
 
 class SafetyCheckerAgent:
     def __init__(self, api_key):
-        self.client = Together(api_key=api_key)
+        self.client = instrument_client(Together(api_key=api_key), 'safety_checker')
         self.agent = Agent(
             role='Safety Checker',
             goal='Ensure game content remains appropriate and safe',
@@ -12,6 +13,7 @@ class SafetyCheckerAgent:
             allow_delegation=False
         )
     
+    @llm_method
     def check_content(self, content: str) -> bool:
         """Check if content meets safety guidelines."""
         system_prompt = """You are a content safety checker. Evaluate the following content
@@ -37,6 +39,7 @@ class SafetyCheckerAgent:
         result = response.choices[0].message.content.strip().upper()
         return result.startswith('SAFE')
 
+    @llm_method
     def sanitize_content(self, content: str) -> str:
         """Attempt to sanitize unsafe content while preserving game context."""
         if self.check_content(content):
@@ -1,9 +1,27 @@
 from crewai import Agent
 from together import Together
 from core.game_state import GameState
+from core.world_checkpoint import WorldCheckpoint
+from utils.metrics import instrument_client, llm_method
 from langchain.chat_models.base import BaseChatModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+import json
+import threading
+import time
+
+def _timed_llm_call(method):
+    """Record the duration of a generation call in the agent's stats."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._record_llm_call(time.perf_counter() - start)
+    return wrapper
 
 class CustomTogetherModel(BaseChatModel):
     client: Any = Field(default=None)
@@ -20,6 +38,7 @@ class CustomTogetherModel(BaseChatModel):
     def _llm_type(self) -> str:
         return "together"
 
+    @llm_method
     def _generate(self, messages: List[Dict[str, Any]], stop: List[str] | None = None) -> str:
         response = self.client.chat.completions.create(
             model=self.model_name,
@@ -35,9 +54,18 @@ class CustomTogetherModel(BaseChatModel):
         return {"model": self.model_name}
 
 class WorldBuilderAgent:
-    def __init__(self, api_key):
+    # Towns each kingdom should end up with; the prompts ask for this many
+    TOWNS_PER_KINGDOM = 3
+
+    def __init__(self, api_key, max_workers: int = 4, call_timeout: Optional[float] = None,
+                 checkpoint: Optional[WorldCheckpoint] = None):
         try: 
-            self.client = Together(api_key=api_key)
+            self.max_workers = max_workers
+            self.checkpoint = checkpoint
+            self._fallback = threading.local()
+            self._stats_lock = threading.Lock()
+            self.reset_stats()
+            self.client = instrument_client(Together(api_key=api_key, timeout=call_timeout), 'world_builder')
             self.chat_model = CustomTogetherModel(together_client=self.client)
             self.agent = Agent(
                 role='World Builder',
@@ -50,6 +78,79 @@ class WorldBuilderAgent:
             print(f"Error initializing agent: {str(e)}")
             raise           
 
+    def reset_stats(self):
+        """Start a new timing window for get_stats()."""
+        with self._stats_lock:
+            self._started_at = time.perf_counter()
+            self._llm_seconds = 0.0
+            self._llm_calls = 0
+            self._resumed_nodes = 0
+            self._fallback_nodes = 0
+
+    def _record_llm_call(self, seconds: float):
+        with self._stats_lock:
+            self._llm_seconds += seconds
+            self._llm_calls += 1
+
+    def get_stats(self) -> Dict:
+        """Wall-clock and summed LLM time since the last reset_stats()."""
+        with self._stats_lock:
+            return {
+                'wall_clock_seconds': time.perf_counter() - self._started_at,
+                'llm_seconds': self._llm_seconds,
+                'llm_calls': self._llm_calls,
+                'resumed_nodes': self._resumed_nodes,
+                'fallback_nodes': self._fallback_nodes,
+                'max_workers': self.max_workers
+            }
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print(f"\nGeneration took {stats['wall_clock_seconds']:.1f}s wall-clock, "
+              f"{stats['llm_seconds']:.1f}s of LLM time across {stats['llm_calls']} calls "
+              f"(max_workers={stats['max_workers']})")
+        if stats['resumed_nodes'] or stats['fallback_nodes']:
+            print(f"Resumed {stats['resumed_nodes']} nodes from checkpoint, "
+                  f"{stats['fallback_nodes']} nodes used fallback content")
+
+    def _used_fallback(self):
+        """Mark the current generation call as having returned placeholder content."""
+        self._fallback.used = True
+        with self._stats_lock:
+            self._fallback_nodes += 1
+
+    def _checkpointed(self, node, generate, *args):
+        """Return a node from the checkpoint, or generate it and journal the result.
+
+        Placeholder content from a failed call is not journaled, so a resumed
+        run tries that node again.
+        """
+        if self.checkpoint is None:
+            return generate(*args)
+
+        result = self._resume(node)
+        if result is not None:
+            return result
+
+        self._fallback.used = False
+        result = generate(*args)
+        if not self._fallback.used:
+            self.checkpoint.record(node, result)
+        return result
+
+    def _resume(self, node):
+        result = self.checkpoint.get(node) if self.checkpoint is not None else None
+        if result is not None:
+            with self._stats_lock:
+                self._resumed_nodes += 1
+        return result
+
+    def resume_or_generate_world(self, concept):
+        """Generate a world's name and description, or reuse the checkpointed one."""
+        return self._checkpointed(('world', concept), self.generate_world, concept)
+
+    @_timed_llm_call
+    @llm_method
     def generate_world(self, concept):
         system_prompt = """
         Create interesting fantasy worlds that players would love to play in.
@@ -89,6 +190,8 @@ class WorldBuilderAgent:
         
         return world
 
+    @_timed_llm_call
+    @llm_method
     def generate_kingdoms(self, world_data):
         try:
             system_prompt = """
@@ -172,6 +275,7 @@ class WorldBuilderAgent:
             
         except Exception as e:
             print(f"Error generating kingdoms: {e}")
+            self._used_fallback()
             # Return a single detailed kingdom instead of failing
             fallback_kingdom = {
                 "First Kingdom": {
@@ -183,6 +287,8 @@ class WorldBuilderAgent:
             }
             return fallback_kingdom
 
+    @_timed_llm_call
+    @llm_method
     def generate_towns(self, world_data, kingdom_data):
         try:
             system_prompt = """
@@ -251,6 +357,7 @@ class WorldBuilderAgent:
             
             if not towns:
                 print("No towns parsed from response, creating default town...")
+                self._used_fallback()
                 # Create at least one default town
                 default_town = {
                     "Central Haven": {
@@ -267,6 +374,7 @@ class WorldBuilderAgent:
             
         except Exception as e:
             print(f"Error generating towns: {e}")
+            self._used_fallback()
             # Return a single detailed town instead of failing
             fallback_town = {
                 "Central Haven": {
@@ -279,6 +387,8 @@ class WorldBuilderAgent:
             }
             return fallback_town
 
+    @_timed_llm_call
+    @llm_method
     def generate_npcs(self, world_data, kingdom_data, town_data):
         try:
             system_prompt = """
@@ -358,6 +468,7 @@ class WorldBuilderAgent:
             
             if not npcs:
                 print("No NPCs parsed from response, creating default NPCs...")
+                self._used_fallback()
                 # Create default NPCs for the town
                 npcs = {
                     "Town Elder": {
@@ -387,6 +498,7 @@ class WorldBuilderAgent:
             
         except Exception as e:
             print(f"Error generating NPCs: {e}")
+            self._used_fallback()
             # Return default NPCs instead of failing
             return {
                 "Local Guide": {
@@ -398,36 +510,215 @@ class WorldBuilderAgent:
                 }
             }
 
-    def build_complete_world(self, concept: str) -> Dict:
+    @_timed_llm_call
+    @llm_method
+    def generate_kingdom_content(self, world_data, kingdom_data) -> Optional[List[Dict]]:
+        """Generate a kingdom's towns and their NPCs in one JSON response.
+
+        Returns the raw list of town objects, or None if the response could
+        not be parsed. Entries are validated by _populate_kingdom_batched.
+        """
+        try:
+            system_prompt = """
+            Generate towns and their inhabitants for a fantasy kingdom.
+            Each town should have distinctive features and history.
+            Each NPC should have a distinct personality, appearance, and role.
+            Respond with JSON only, no other text.
+            """
+
+            content_prompt = f"""
+            Create 3 unique towns for the kingdom of {kingdom_data['name']} in {world_data['name']},
+            and 3 unique characters for each town.
+            Each town should reflect the kingdom's character and its relationship with the Colossi.
+            Each character should reflect their town's character and the kingdom's culture.
+
+            Kingdom Context: {kingdom_data['description']}
+            World Context: {world_data['description']}
+
+            Respond with exactly this JSON structure:
+            {{"towns": [
+              {{"name": "<town name>", "description": "<town description>",
+                "npcs": [{{"name": "<character name>", "description": "<character description>"}}]}}
+            ]}}
+            """
+
+            print(f"\nGenerating towns and NPCs for {kingdom_data['name']}...")
+            response = self.client.chat.completions.create(
+                model="meta-llama/Llama-3-70b-chat-hf",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content_prompt}
+                ],
+                temperature=0.7
+            )
+
+            raw_output = response.choices[0].message.content
+            start_idx = raw_output.find('{')
+            end_idx = raw_output.rfind('}') + 1
+            towns = json.loads(raw_output[start_idx:end_idx])['towns']
+            if not isinstance(towns, list):
+                raise ValueError("'towns' is not a list")
+            return towns
+
+        except Exception as e:
+            print(f"Error generating batched content for {kingdom_data['name']}: {e}")
+            return None
+
+    @staticmethod
+    def _valid_entry(entry) -> bool:
+        return (isinstance(entry, dict)
+                and isinstance(entry.get('name'), str) and entry['name'].strip()
+                and isinstance(entry.get('description'), str) and entry['description'].strip())
+
+    def _populate_kingdom_batched(self, world, kingdom) -> Dict:
+        """Build a kingdom's towns from one batched call, repairing what fails validation."""
+        towns_node = ('towns', world['name'], kingdom['name'])
+        towns = self._resume(towns_node)
+        if towns is None:
+            towns = self._parse_kingdom_content(world, kingdom)
+            if towns and len(towns) < self.TOWNS_PER_KINGDOM:
+                self._add_missing_towns(world, kingdom, towns)
+            if towns and self.checkpoint is not None:
+                self.checkpoint.record(towns_node, {name: {**town, 'npcs': {}} for name, town in towns.items()})
+                for town in towns.values():
+                    if town['npcs']:
+                        self.checkpoint.record(('npcs', world['name'], kingdom['name'], town['name']), town['npcs'])
+
+        # Fall back to the per-call generators only for the missing pieces
+        if not towns:
+            print(f"No valid towns in batched response for {kingdom['name']}, generating separately...")
+            towns = self._checkpointed(towns_node, self.generate_towns, world, kingdom)
+        for town in towns.values():
+            if not town['npcs']:
+                town['npcs'] = self._checkpointed(
+                    ('npcs', world['name'], kingdom['name'], town['name']),
+                    self.generate_npcs, world, kingdom, town
+                )
+
+        return towns
+
+    def _add_missing_towns(self, world, kingdom, towns: Dict) -> None:
+        """Top up a batched response that lost towns to validation with the per-call generator."""
+        print(f"Only {len(towns)} valid towns in batched response for {kingdom['name']}, "
+              f"generating the rest separately...")
+        self._fallback.used = False
+        extra = self.generate_towns(world, kingdom)
+        if self._fallback.used:
+            # Placeholder content; keep the valid towns we have
+            return
+        for name, town in extra.items():
+            if len(towns) >= self.TOWNS_PER_KINGDOM:
+                break
+            if name not in towns:
+                towns[name] = town
+
+    def _parse_kingdom_content(self, world, kingdom) -> Dict:
+        """Run the batched call and keep the towns and NPCs that pass validation."""
+        raw_towns = self.generate_kingdom_content(world, kingdom) or []
+
+        towns = {}
+        for raw_town in raw_towns:
+            if not self._valid_entry(raw_town):
+                continue
+            name = raw_town['name'].strip()
+            town = {
+                "name": name,
+                "description": raw_town['description'].strip(),
+                "world": world['name'],
+                "kingdom": kingdom['name'],
+                "npcs": {}
+            }
+            for raw_npc in raw_town.get('npcs') or []:
+                if self._valid_entry(raw_npc):
+                    npc_name = raw_npc['name'].strip()
+                    town['npcs'][npc_name] = {
+                        "name": npc_name,
+                        "description": raw_npc['description'].strip(),
+                        "world": world['name'],
+                        "kingdom": kingdom['name'],
+                        "town": name
+                    }
+            towns[name] = town
+
+        return towns
+
+    def populate_world(self, world: Dict,
+                       progress_callback: Optional[Callable[[str, str], None]] = None,
+                       batched: bool = False) -> Dict:
+        """Generate the kingdoms, towns and NPCs of a world.
+
+        Towns for different kingdoms, and NPCs for different towns, are
+        generated concurrently on up to ``max_workers`` threads. Results are
+        attached in the order the kingdoms and towns were generated, so the
+        structure matches a sequential run. ``progress_callback(stage, name)``
+        is called as each kingdom list, town list and NPC list completes.
+
+        With ``batched=True`` each kingdom's towns and NPCs come from a single
+        JSON call, cutting a 3x3 world from 13 calls to 4 plus fallbacks.
+        """
+        def report(stage, name):
+            if progress_callback:
+                progress_callback(stage, name)
+
+        kingdoms = self._checkpointed(('kingdoms', world['name']), self.generate_kingdoms, world)
+        world['kingdoms'] = kingdoms
+        report('kingdoms', world['name'])
+
+        if batched:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._populate_kingdom_batched, world, kingdom): kingdom
+                    for kingdom in kingdoms.values()
+                }
+                for future in as_completed(futures):
+                    kingdom = futures[future]
+                    kingdom['towns'] = future.result()
+                    report('towns', kingdom['name'])
+                    for town in kingdom['towns'].values():
+                        report('npcs', town['name'])
+            return world
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            town_futures = {
+                pool.submit(self._checkpointed, ('towns', world['name'], kingdom['name']),
+                            self.generate_towns, world, kingdom): kingdom
+                for kingdom in kingdoms.values()
+            }
+            npc_futures = {}
+
+            # Start on a kingdom's NPCs as soon as its towns exist
+            for future in as_completed(town_futures):
+                kingdom = town_futures[future]
+                kingdom['towns'] = future.result()
+                report('towns', kingdom['name'])
+                for town in kingdom['towns'].values():
+                    node = ('npcs', world['name'], kingdom['name'], town['name'])
+                    npc_futures[pool.submit(self._checkpointed, node, self.generate_npcs, world, kingdom, town)] = town
+
+            for future in as_completed(npc_futures):
+                town = npc_futures[future]
+                town['npcs'] = future.result()
+                report('npcs', town['name'])
+
+        return world
+
+    def build_complete_world(self, concept: str,
+                             progress_callback: Optional[Callable[[str, str], None]] = None,
+                             batched: bool = False) -> Dict:
         """Build a complete world with kingdoms, towns, and NPCs."""
         try:
             print("\nStarting world generation process...")
+            self.reset_stats()
             
             # Generate world
-            world = self.generate_world(concept)
+            world = self.resume_or_generate_world(concept)
             print(f"\nCreated world: {world['name']}")
             
-            # Generate kingdoms
-            kingdoms = self.generate_kingdoms(world)
-            world['kingdoms'] = kingdoms
+            # Generate kingdoms, towns and NPCs
+            self.populate_world(world, progress_callback, batched=batched)
+            kingdoms = world['kingdoms']
             print(f"\nCreated {len(kingdoms)} kingdoms")
             
-            # For each kingdom
-            for kingdom_name, kingdom in kingdoms.items():
-                print(f"\nGenerating content for kingdom: {kingdom_name}")
-                
-                # Generate towns
-                towns = self.generate_towns(world, kingdom)
-                kingdom['towns'] = towns
-                print(f"Created {len(towns)} towns for {kingdom_name}")
-                
-                # For each town
-                for town_name, town in towns.items():
-                    print(f"Generating NPCs for town: {town_name}")
-                    npcs = self.generate_npcs(world, kingdom, town)
-                    town['npcs'] = npcs
-                    print(f"Created {len(npcs)} NPCs for {town_name}")
-            
             # Add start message
             first_kingdom = list(kingdoms.values())[0]
             first_town = list(first_kingdom['towns'].values())[0]
@@ -436,10 +727,15 @@ class WorldBuilderAgent:
             world['start'] = f"Welcome to {world['name']}! You begin your journey in {first_town['name']}, {first_town['description']} Your guide is {first_npc['name']}, {first_npc['description']}"
             
             print("\nWorld generation complete!")
+            self.print_stats()
             return world
             
         except Exception as e:
             print(f"\nError in world generation: {str(e)}")
+            if self.checkpoint is not None:
+                # Finished nodes are journaled; let the caller rerun and resume
+                print(f"Progress saved to {self.checkpoint.path}, rerun to resume")
+                raise
             # Create a complete fallback world
             fallback_world = {
                 "name": "Kyropeia",
@@ -0,0 +1,255 @@
+# asgi.py
+"""ASGI entry point that serves /action without tying up a thread per request.
+
+Run with:
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+
+POST /action and POST /action/stream are handled on the event loop and await
+the Game Master's LLM call, so one worker can keep many narrative requests in
+flight. Every other route is passed through to the Flask app, one request
+per thread from a pool of ASGI_WSGI_THREADS (default 32).
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from typing import Dict, Optional
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from utils.logging_utils import sample_request
+from utils.metrics import http_request_seconds
+
+from main import (
+    app as flask_app,
+    game_master,
+    game_states,
+    resolve_puzzle_action,
+    build_action_response,
+    METRICS_ENABLED,
+    sse_event,
+    SSE_HEADERS
+)
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    # The base class runs every request on one shared thread
+    # (thread_sensitive=True), so a slow request or an open event stream
+    # would hold up every other Flask route in the worker
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._serve, thread_sensitive=False, executor=self.executor)(body)
+
+    def _serve(self, body) -> None:
+        """Run the WSGI app on a pool thread and send its response over ``sync_send``."""
+        environ = self.build_environ(self.scope, body)
+        output = self.wsgi_application(environ, self.start_response)
+        bytes_sent = 0
+        try:
+            for chunk in output:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                # Never send more than a declared Content-Length
+                if self.response_content_length is not None:
+                    chunk = chunk[:self.response_content_length - bytes_sent]
+                self.sync_send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                bytes_sent += len(chunk)
+                if bytes_sent == self.response_content_length:
+                    break
+        finally:
+            # Lets Flask end the request context of a streamed response
+            if hasattr(output, 'close'):
+                output.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that runs concurrent requests on separate pool threads."""
+
+    def __init__(self, wsgi_application, max_workers: int = 32):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+flask_asgi = PooledWsgiToAsgi(flask_app, max_workers=int(os.getenv('ASGI_WSGI_THREADS', 32)))
+
+# The game store reads and writes MongoDB with pymongo, which blocks; run
+# those calls on worker threads so the event loop keeps serving other actions
+load_game = sync_to_async(game_states.get, thread_sensitive=False)
+store_action_response = sync_to_async(build_action_response, thread_sensitive=False)
+
+
+async def read_body(receive) -> bytes:
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def send_json(send, status: int, payload: Dict) -> None:
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii'))
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def session_game_id(scope) -> Optional[str]:
+    """Read the game id from the Flask session cookie, if there is one."""
+    cookie_header = b'; '.join(value for name, value in scope['headers'] if name == b'cookie')
+    if not cookie_header:
+        return None
+
+    cookies = SimpleCookie()
+    cookies.load(cookie_header.decode('latin-1'))
+    morsel = cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if morsel is None:
+        return None
+
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        return serializer.loads(morsel.value, max_age=max_age).get('game_id')
+    except Exception:
+        return None
+
+
+async def read_action(scope, receive, send):
+    """Parse an /action request. Sends the error response and returns None on failure."""
+    sample_request()
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+        action = data['action']
+    except (ValueError, KeyError, TypeError):
+        await send_json(send, 400, {'error': 'Request must be JSON with an "action" field'})
+        return None
+
+    logging.info("Processing action: %s", action)
+    game_id = data.get('game_id') or session_game_id(scope)
+    game_state = await load_game(game_id)
+    if game_state is None:
+        await send_json(send, 404, {'error': 'No active game found. Please start a new game.'})
+        return None
+
+    return action, game_id, game_state, not data.get('bypass_cache', False)
+
+
+async def handle_action(scope, receive, send) -> None:
+    request_data = await read_action(scope, receive, send)
+    if request_data is None:
+        return
+    action, game_id, game_state, use_cache = request_data
+
+    try:
+        response, puzzle_progress, puzzle_solved = resolve_puzzle_action(action, game_state)
+
+        # Regular game action processing if no task completed
+        if not response:
+            response = await game_master.process_action_async(action, game_state, use_cache)
+
+        payload = await store_action_response(game_id, game_state, response, puzzle_progress, puzzle_solved)
+        await send_json(send, 200, payload)
+
+    except Exception as e:
+        error_msg = f"Error processing action: {str(e)}"
+        logging.error(error_msg)
+        await send_json(send, 500, {'error': error_msg})
+
+
+async def handle_stream_action(scope, receive, send) -> None:
+    request_data = await read_action(scope, receive, send)
+    if request_data is None:
+        return
+    action, game_id, game_state, use_cache = request_data
+
+    headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+    headers += [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in SSE_HEADERS.items()]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+    async def send_event(event: str, data: Dict) -> None:
+        await send({'type': 'http.response.body', 'body': sse_event(event, data).encode('utf-8'), 'more_body': True})
+
+    try:
+        response, puzzle_progress, puzzle_solved = resolve_puzzle_action(action, game_state)
+        if response:
+            await send_event('token', {'text': response})
+        else:
+            chunks = []
+            async for text in game_master.stream_action_async(action, game_state, use_cache):
+                chunks.append(text)
+                await send_event('token', {'text': text})
+            response = ''.join(chunks)
+
+        payload = await store_action_response(game_id, game_state, response, puzzle_progress, puzzle_solved)
+        await send_event('done', payload)
+
+    except Exception as e:
+        error_msg = f"Error processing action: {str(e)}"
+        logging.error(error_msg)
+        await send_event('error', {'error': error_msg})
+
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def timed(handler, route: str, scope, receive, send) -> None:
+    """Run ``handler`` and record it in the same histogram as Flask routes."""
+    if not METRICS_ENABLED:
+        await handler(scope, receive, send)
+        return
+
+    started = time.perf_counter()
+    status = 500
+
+    async def send_and_note_status(message) -> None:
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    try:
+        await handler(scope, receive, send_and_note_status)
+    finally:
+        http_request_seconds.observe(time.perf_counter() - started, scope['method'], route, str(status))
+
+
+async def lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == '/action' and scope['method'] == 'POST':
+        await timed(handle_action, '/action', scope, receive, send)
+    elif scope['type'] == 'http' and scope['path'] == '/action/stream' and scope['method'] == 'POST':
+        await timed(handle_stream_action, '/action/stream', scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
@@ -1,8 +1,20 @@
 # auth/models.py
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Optional, List
-from pymongo import ASCENDING
 from db.client import MongoDBClient
+from db.pagination import keyset_page
+
+# Gallery totals only feed the "N victories" label, so a slightly stale
+# count is fine and saves a count_documents per page view. Entries are
+# kept in LRU order so the cache stays bounded however many users visit.
+VICTORY_COUNT_TTL_SECONDS = int(os.getenv('VICTORY_COUNT_TTL_SECONDS', 300))
+VICTORY_COUNT_CACHE_ENTRIES = int(os.getenv('VICTORY_COUNT_CACHE_ENTRIES', 10000))
+_victory_counts: "OrderedDict[str, tuple]" = OrderedDict()
+_victory_counts_lock = threading.Lock()
 
 class UserModel:
     def __init__(self):
@@ -10,26 +22,14 @@ class UserModel:
         self.users = self.client.db['users']
         self.user_victories = self.client.db['user_victories']
         self.user_completions = self.client.db['user_completions']
-        self._ensure_indexes()
     
-    def _ensure_indexes(self):
-        """Create required indexes"""
-        # User indexes
-        self.users.create_index([("google_id", ASCENDING)], unique=True)
-        self.users.create_index([("email", ASCENDING)], unique=True)
-        
-        # User completions index
-        self.user_completions.create_index([
-            ("user_id", ASCENDING),
-            ("created_at", ASCENDING)
-        ])
-
     def add_victory(self, user_id: str, victory_data: dict) -> bool:
         """Store a victory record for user"""
         try:
             victory_record = {
                 "user_id": user_id,
                 "image_url": victory_data.get('image_url'),
+                "thumbnail_url": victory_data.get('thumbnail_url') or victory_data.get('image_url'),
                 "world_name": victory_data.get('world_name'),
                 "character_name": victory_data.get('character_name'),
                 "created_at": datetime.utcnow()
@@ -37,34 +37,59 @@ class UserModel:
             
             # Use user_victories collection instead of victories
             self.user_victories.insert_one(victory_record)
+            with _victory_counts_lock:
+                _victory_counts.pop(user_id, None)
             return True
         except Exception as e:
             print(f"Error storing victory: {e}")
             return False
     
-    def get_user_victories(self, user_id: str, page: int = 1, per_page: int = 9) -> dict:
-        """Get paginated victory records for user"""
+    def count_user_victories(self, user_id: str) -> int:
+        """Victory count for user, cached for VICTORY_COUNT_TTL_SECONDS"""
+        now = time.monotonic()
+        with _victory_counts_lock:
+            cached = _victory_counts.get(user_id)
+            if cached is not None:
+                if cached[1] > now:
+                    _victory_counts.move_to_end(user_id)
+                    return cached[0]
+                del _victory_counts[user_id]
+
+        total = self.user_victories.count_documents({"user_id": user_id})
+        with _victory_counts_lock:
+            _victory_counts[user_id] = (total, now + VICTORY_COUNT_TTL_SECONDS)
+            _victory_counts.move_to_end(user_id)
+            while len(_victory_counts) > VICTORY_COUNT_CACHE_ENTRIES:
+                _victory_counts.popitem(last=False)
+        return total
+
+    def get_user_victories(self, user_id: str, cursor: Optional[str] = None, per_page: int = 9) -> dict:
+        """Get one page of victory records for user, with opaque next/prev cursors.
+
+        Raises ValueError if ``cursor`` is not a token from a previous page.
+        """
         try:
-            skip = (page - 1) * per_page
-            total = self.user_victories.count_documents({"user_id": user_id})
-            
-            victories = list(self.user_victories.find(
-                {"user_id": user_id}
-            ).sort("created_at", -1).skip(skip).limit(per_page))
-            
-            # Convert ObjectId to string for JSON serialization
-            for victory in victories:
-                victory['_id'] = str(victory['_id'])
-            
-            return {
-                "victories": victories,
-                "total": total,
-                "pages": (total + per_page - 1) // per_page
-            }
+            page = keyset_page(self.user_victories, {"user_id": user_id}, cursor, per_page)
+            total = self.count_user_victories(user_id)
+        except ValueError:
+            raise
         except Exception as e:
             print(f"Error fetching victories: {e}")
-            return {"victories": [], "total": 0, "pages": 0}
-           
+            return {"victories": [], "total": 0, "pages": 0, "next": None, "prev": None}
+
+        # Convert ObjectId to string for JSON serialization
+        victories = page['items']
+        for victory in victories:
+            victory['_id'] = str(victory['_id'])
+
+        return {
+            "victories": victories,
+            "total": total,
+            "pages": (total + per_page - 1) // per_page,
+            "next": page['next'],
+            "prev": page['prev']
+        }
+
     def create_user(self, google_data: dict) -> str:
         """Create new user from Google OAuth data"""
         user = {
@@ -112,5 +137,5 @@ class UserModel:
         )
 
     def close(self):
-        """Close MongoDB connection"""
-        self.client.close()
\ No newline at end of file
+        """Release the MongoDB handle; the shared connection pool stays open"""
+        self.client.close()
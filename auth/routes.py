@@ -3,10 +3,16 @@ from google.auth.transport import requests
 from flask import Blueprint, request, jsonify, session, redirect, render_template, url_for, send_file, Response
 import os
 from auth.models import UserModel
+from core.placeholder_images import PlaceholderCache, parse_sizes, svg_placeholder
 import datetime
 
 auth = Blueprint('auth', __name__)
 
+# Placeholder tiles never change, so render each size once per process
+placeholder_cache = PlaceholderCache(max_entries=int(os.getenv('PLACEHOLDER_CACHE_ENTRIES', 256)))
+placeholder_cache.prerender(parse_sizes(os.getenv('PLACEHOLDER_PRERENDER_SIZES', '400x320')))
+PLACEHOLDER_MAX_AGE = int(os.getenv('PLACEHOLDER_MAX_AGE', 30 * 24 * 3600))
+
 @auth.route('/auth/google', methods=['POST'])
 def google_auth():
     try:
@@ -94,39 +100,24 @@ def get_current_user():
 
 @auth.route('/api/placeholder/<int:width>/<int:height>')
 def placeholder_image(width: int, height: int):
-    """Generate a simple placeholder image"""
+    """Serve a cached placeholder image, as WebP when the client accepts it"""
     try:
-        from PIL import Image, ImageDraw
-        import io
-        
-        # Limit dimensions for security
-        width = min(width, 1024)
-        height = min(height, 1024)
-
-        # Create base image
-        img = Image.new('RGB', (width, height), color='#2a2a3d')
-        draw = ImageDraw.Draw(img)
-        
-        # Draw a simple pattern instead of text
-        margin = min(width, height) // 10
-        draw.rectangle(
-            [margin, margin, width - margin, height - margin],
-            outline='#ffffff',
-            width=2
-        )
-        draw.line([(margin, margin), (width - margin, height - margin)], fill='#ffffff', width=2)
-        draw.line([(margin, height - margin), (width - margin, margin)], fill='#ffffff', width=2)
-        
-        # Save to buffer
-        img_io = io.BytesIO()
-        img.save(img_io, format='PNG')
-        img_io.seek(0)
-        
-        # Removed cache_timeout parameter
-        return send_file(
-            img_io, 
-            mimetype='image/png'
-        )
+        fmt = 'webp' if request.accept_mimetypes['image/webp'] else 'png'
+        placeholder = placeholder_cache.get(width, height, fmt)
+        if placeholder is None:
+            # First request for this size: answer with SVG now rather than
+            # wait on the render, and keep it out of caches so the next
+            # request gets the raster tile
+            response = Response(svg_placeholder(*placeholder_cache.clamp(width, height)), mimetype='image/svg+xml')
+            response.cache_control.no_store = True
+            return response
+
+        response = Response(placeholder.data, mimetype=placeholder.mimetype)
+        response.set_etag(placeholder.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = PLACEHOLDER_MAX_AGE
+        response.vary.add('Accept')
+        return response.make_conditional(request)
         
     except Exception as e:
         print(f"Placeholder image error: {e}")
@@ -159,10 +150,14 @@ def gallery():
     if 'user_id' not in session:
         return redirect(url_for('home'))
         
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     user_model = UserModel()
     
-    gallery_data = user_model.get_user_victories(session['user_id'], page)
+    try:
+        gallery_data = user_model.get_user_victories(session['user_id'], cursor)
+    except ValueError:
+        # Stale or hand-edited cursor; start again from the newest page
+        return redirect(url_for('auth.gallery'))
     
     # Format dates for display
     for victory in gallery_data.get('victories', []):
@@ -177,7 +172,6 @@ def gallery():
     
     return render_template('victory-album.html', 
                          gallery_data=gallery_data,
-                         current_page=page,
                          user=user,
                          empty=empty)
 
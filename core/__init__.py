@@ -1,5 +1,16 @@
 # core/__init__.py
 from .game_state import GameState
 from .content_generator import ContentGenerator
+from .session_store import GameStateStore
+from .world_catalog import WorldCatalog
+from .puzzle_catalog import PuzzleCatalog
+from .inventory_catalog import InventoryCatalog
+from .narration_cache import NarrationCache
+from .world_checkpoint import WorldCheckpoint
+from .image_jobs import ImageJobQueue
+from .image_store import ImageStore
+from .establishing_shots import EstablishingShotCache
+from .image_proxy import ImageProxyCache
+from .placeholder_images import PlaceholderCache
 
-__all__ = ['GameState', 'ContentGenerator']
\ No newline at end of file
+__all__ = ['GameState', 'ContentGenerator', 'GameStateStore', 'WorldCatalog', 'PuzzleCatalog', 'InventoryCatalog', 'NarrationCache', 'WorldCheckpoint', 'ImageJobQueue', 'ImageStore', 'EstablishingShotCache', 'ImageProxyCache', 'PlaceholderCache']
\ No newline at end of file
@@ -1,11 +1,13 @@
 # core/content_generator.py
 from typing import Dict, List
 from together import Together
+from utils.metrics import instrument_client, llm_method
 
 class ContentGenerator:
     def __init__(self, api_key: str):
-        self.client = Together(api_key=api_key)
+        self.client = instrument_client(Together(api_key=api_key), 'content_generator')
     
+    @llm_method
     def generate_location_description(self, location_type: str, context: Dict) -> str:
         """Generate description for a new location."""
         system_prompt = f"""Create a description for a {location_type} in a fantasy setting.
@@ -24,6 +26,7 @@ class ContentGenerator:
         
         return response.choices[0].message.content
     
+    @llm_method
     def generate_npc_dialogue(self, npc_info: Dict, context: Dict) -> str:
         """Generate NPC dialogue based on character and context."""
         system_prompt = """Create a short dialogue response for an NPC.
@@ -42,6 +45,7 @@ class ContentGenerator:
         
         return response.choices[0].message.content
     
+    @llm_method
     def generate_quest(self, context: Dict) -> Dict:
         """Generate a new quest based on current game context."""
         system_prompt = """Create a simple quest for a fantasy RPG.
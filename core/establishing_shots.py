@@ -0,0 +1,114 @@
+# core/establishing_shots.py
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from .image_store import ImageStore
+from .world_checkpoint import atomic_write_json
+
+
+class EstablishingShotCache:
+    """Rendered establishing shots, keyed by a hash of the prompt they came from.
+
+    The prompt is built from the character, town and world text, so editing
+    any of it in ``game_world.json`` changes the key and the old image is
+    simply no longer found. ``prune()`` drops those stale entries.
+
+    Updates re-read the index under an exclusive ``flock`` on a sibling
+    ``.lock`` file, so workers sharing the directory never overwrite each
+    other's entries.
+    """
+
+    def __init__(self, store: ImageStore, index_path: Optional[str] = None):
+        self.store = store
+        self.index_path = index_path or os.path.join(store.root, 'establishing_shots.json')
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str) -> str:
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+    def _refresh(self, force: bool = False) -> None:
+        # Other workers may have rendered images since we last looked
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return
+        if mtime == self._mtime and not force:
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+        except Exception as e:
+            logging.error(f"Error loading establishing shot index {self.index_path}: {e}")
+
+    @contextmanager
+    def _updating(self):
+        """Hold the index lock and the latest entries for a read-merge-write."""
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        with self._lock, open(self.index_path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # mtime can miss a write within the same tick, so always re-read
+                self._refresh(force=True)
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self) -> None:
+        atomic_write_json(self._entries, self.index_path, indent=2, sort_keys=True)
+        self._mtime = os.path.getmtime(self.index_path)
+
+    def get(self, prompt: str) -> Optional[Dict]:
+        """Return the index entry (``image``, ``context``) for a prompt, if its file exists."""
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(self.key(prompt))
+            if entry is not None and self.store.exists(entry['image']):
+                self.hits += 1
+                return dict(entry)
+            self.misses += 1
+            return None
+
+    def put(self, prompt: str, data: bytes, context: Dict, extension: str = 'png') -> Dict:
+        """Store a rendered image for a prompt and return its index entry."""
+        name = self.store.put(data, extension)
+        entry = {'image': name, 'context': context}
+        with self._updating():
+            self._entries[self.key(prompt)] = entry
+            self._save()
+        return dict(entry)
+
+    def prune(self, prompts: Iterable[str]) -> int:
+        """Drop entries whose prompt is not in ``prompts``; returns how many were removed.
+
+        Image files are left in place since other entries may share them.
+        """
+        keep = {self.key(prompt) for prompt in prompts}
+        with self._updating():
+            stale = [key for key in self._entries if key not in keep]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
+        return len(stale)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
-from .puzzle_state import PuzzleProgress, TaskProgress
-import json
+from .puzzle_state import PuzzleProgress
+from .puzzle_catalog import PuzzleCatalog
+from .inventory_catalog import InventoryCatalog
 import logging
+from utils.logging_utils import debug_event
 
 class GameState(BaseModel):
     world: Dict
@@ -55,24 +57,19 @@ class GameState(BaseModel):
                 
         return True
 
-    def load_character_inventory(self, character_name: str):
+    def load_character_inventory(self, character_name: str,
+                                 inventory_catalog: Optional[InventoryCatalog] = None):
         """Load character's starting inventory"""
         try:
-            with open('shared_data/inventory.json', 'r') as f:
-                inventory_data = json.load(f)
+            # Scripts without a shared catalog load the inventory file on demand
+            if inventory_catalog is None:
+                inventory_catalog = InventoryCatalog()
+                if not inventory_catalog.reload():
+                    raise ValueError(f"Could not load {inventory_catalog.path}")
                 
-            # Get character's inventory if exists"
-            if character_name in inventory_data['inventories']:
-                char_items = inventory_data['inventories'][character_name]
-                inventory = {}
-                
-                # Process items (convert "X gold" to number, other items to count of 1)
-                for item in char_items:
-                    if item.endswith('gold'):
-                        inventory['gold'] = int(item.split()[0])
-                    else:
-                        inventory[item] = 1
-                return inventory
+            # Get character's inventory if exists
+            if inventory_catalog.has_character(character_name):
+                return inventory_catalog.starting_inventory(character_name)
             else:
                 # Default inventory for characters not in inventory.json
                 return {
@@ -93,32 +90,20 @@ class GameState(BaseModel):
             'response': response
         })
 
-    def initialize_puzzle(self, character_name: str, world_data: Dict):
+    def initialize_puzzle(self, character_name: str, world_data: Dict,
+                          puzzle_catalog: Optional[PuzzleCatalog] = None):
         """Initialize puzzle state for the character"""
         try:
-            with open('shared_data/puzzle_data.json', 'r') as f:
-                puzzle_data = json.load(f)
-                world_name = self.world['name']
-                
-                if (world_name in puzzle_data['world_puzzles'] and 
-                    character_name in puzzle_data['world_puzzles'][world_name]['characters']):
-                        
-                    char_puzzle = puzzle_data['world_puzzles'][world_name]['characters'][character_name]
-                    world_puzzle = puzzle_data['world_puzzles'][world_name]
-                    
-                    self.puzzle_progress = PuzzleProgress(
-                        main_puzzle=world_puzzle['main_puzzle'],
-                        solution_requirements=world_puzzle['solution_requirements'],
-                        total_tasks=len(char_puzzle['role_tasks']),
-                        completed_tasks=0,
-                        tasks={
-                            task['task_id']: TaskProgress(**task, completed=False)
-                            for task in char_puzzle['role_tasks']
-                        }
-                    )
-                    
-                    print(f"Puzzle initialized for {character_name}")
-                    return True
+            # Scripts without a shared catalog load the puzzle file on demand
+            if puzzle_catalog is None:
+                puzzle_catalog = PuzzleCatalog()
+                puzzle_catalog.reload()
+
+            puzzle_progress = puzzle_catalog.new_progress(self.world['name'], character_name)
+            if puzzle_progress:
+                self.puzzle_progress = puzzle_progress
+                print(f"Puzzle initialized for {character_name}")
+                return True
                     
         except Exception as e:
             print(f"Error initializing puzzle: {e}")
@@ -127,16 +112,13 @@ class GameState(BaseModel):
     def attempt_task(self, task_id: str) -> Optional[str]:
         """Attempt to complete a task and return reward if successful"""
         if not self.puzzle_progress:
-            logging.info("No puzzle progress available")
+            debug_event('attempt_task', task_id=task_id, result='no_puzzle')
             return None
             
         if task_id in self.puzzle_progress.tasks and not self.puzzle_progress.tasks[task_id].completed:
-            logging.info(f"Attempting to complete task: {task_id}")
-            self.puzzle_progress.tasks[task_id].completed = True
-            self.puzzle_progress.completed_tasks += 1
-            reward = self.puzzle_progress.tasks[task_id].reward
-            logging.info(f"Task completed successfully. Reward: {reward}")
+            reward = self.puzzle_progress.complete_task(task_id)
+            debug_event('attempt_task', task_id=task_id, result='completed', reward=reward)
             return reward
             
-        logging.info(f"Task not available or already completed: {task_id}")
+        debug_event('attempt_task', task_id=task_id, result='unavailable')
         return None
\ No newline at end of file
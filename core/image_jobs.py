@@ -0,0 +1,187 @@
+# core/image_jobs.py
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ImageJob:
+    __slots__ = ('id', 'kind', 'key', 'status', 'result', 'error', 'created_at', 'finished_at', 'event')
+
+    def __init__(self, kind: str, key: Hashable):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.key = key
+        self.status = PENDING
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.event = threading.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class ImageJobQueue:
+    """Runs image generation in the background on a bounded thread pool.
+
+    ``submit()`` returns a job id at once. Submitting a job whose
+    ``(kind, key)`` matches one that is still pending or running returns the
+    existing job instead of rendering the same image twice. Finished jobs
+    are kept for ``result_ttl_seconds`` so clients can collect the result.
+
+    With a ``backend`` (see db.image_jobs) a new job is first claimed there,
+    so a matching job already running in another worker is returned rather
+    than rendered again. Every status change is also written there, and
+    ``get()``/``wait()`` fall back to it for jobs running in another worker.
+    """
+
+    def __init__(self, max_workers: int = 4, result_ttl_seconds: int = 3600, backend=None,
+                 poll_seconds: float = 1.0):
+        self.max_workers = max_workers
+        self.result_ttl_seconds = result_ttl_seconds
+        self.backend = backend
+        self.poll_seconds = poll_seconds
+        self.deduplicated = 0
+        self.backend_errors = 0
+        self._jobs: Dict[str, ImageJob] = {}
+        self._active: Dict[tuple, ImageJob] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-job')
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: Hashable, generate: Callable[..., Optional[Dict]], *args, **kwargs) -> str:
+        """Queue ``generate(*args, **kwargs)`` and return the job id."""
+        with self._lock:
+            self._prune()
+            job = self._active.get((kind, key))
+            if job is not None:
+                self.deduplicated += 1
+                return job.id
+
+        job = ImageJob(kind, key)
+        owner = self._claim(job)
+        with self._lock:
+            if owner == job.id:
+                existing = self._active.get((kind, key))
+                if existing is not None:
+                    owner = existing.id
+            if owner != job.id:
+                self.deduplicated += 1
+                return owner
+            self._jobs[job.id] = job
+            self._active[(kind, key)] = job
+
+        self._executor.submit(self._run, job, generate, args, kwargs)
+        return job.id
+
+    def _claim(self, job: ImageJob) -> str:
+        """Record a new job; returns the id of a matching job another worker already runs."""
+        if self.backend is None:
+            return job.id
+        try:
+            return self.backend.claim(job.to_dict(), job.key)
+        except Exception as e:
+            logging.error(f"Could not claim image job {job.id}: {e}")
+            with self._lock:
+                self.backend_errors += 1
+            return job.id
+
+    def _publish(self, job: ImageJob) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.save(job.to_dict())
+        except Exception as e:
+            logging.error(f"Could not record image job {job.id}: {e}")
+            with self._lock:
+                self.backend_errors += 1
+
+    def _run(self, job: ImageJob, generate, args, kwargs) -> None:
+        job.status = RUNNING
+        self._publish(job)
+        try:
+            result = generate(*args, **kwargs)
+            if result:
+                job.result = result
+                job.status = DONE
+            else:
+                job.error = 'Image generation failed'
+                job.status = FAILED
+        except Exception as e:
+            logging.error(f"Image job {job.id} ({job.kind}) failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active.pop((job.kind, job.key), None)
+            self._publish(job)
+            job.event.set()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.load(job_id)
+        except Exception as e:
+            logging.error(f"Could not load image job {job_id}: {e}")
+            with self._lock:
+                self.backend_errors += 1
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job is not None else self._load(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Block until the job finishes or ``timeout`` passes, then return its state."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.event.wait(timeout)
+            return job.to_dict()
+
+        # Running in another worker: poll the backend
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            state = self._load(job_id)
+            if state is None or state['status'] in (DONE, FAILED):
+                return state
+            if deadline is not None and time.monotonic() >= deadline:
+                return state
+            time.sleep(self.poll_seconds if deadline is None
+                       else min(self.poll_seconds, max(0.0, deadline - time.monotonic())))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                'jobs': len(statuses),
+                'pending': statuses.count(PENDING),
+                'running': statuses.count(RUNNING),
+                'done': statuses.count(DONE),
+                'failed': statuses.count(FAILED),
+                'deduplicated': self.deduplicated,
+                'max_workers': self.max_workers,
+                'backend_errors': self.backend_errors
+            }
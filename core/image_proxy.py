@@ -0,0 +1,242 @@
+# core/image_proxy.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHUNK_SIZE = 64 * 1024
+
+# Where DALL-E serves generated images from
+DEFAULT_ALLOWED_HOSTS = ('oaidalleapiprodscus.blob.core.windows.net',)
+
+
+class CachedImage(NamedTuple):
+    path: str
+    content_type: str
+    etag: str
+    size: int
+
+
+class UpstreamResponse(NamedTuple):
+    """A streaming upstream fetch. Iterating ``body`` also fills the cache.
+
+    ``status`` is 415 when the upstream answered with something other than
+    an image; nothing is streamed or cached then.
+    """
+    status: int
+    content_type: str
+    content_length: Optional[str]
+    body: Iterator[bytes]
+
+
+class ImageProxyCache:
+    """Fetches remote images through a pooled session and keeps them on disk.
+
+    Only URLs on ``allowed_hosts`` are fetched and only ``image/*`` responses
+    are served or cached, so the proxy cannot be used to relay or store
+    arbitrary content.
+
+    Files are named by the SHA-256 of the URL and evicted least-recently-used
+    once the directory grows past ``max_bytes``. Every gunicorn worker
+    shares the directory: a lookup that misses this worker's index checks
+    the disk and adopts a file another worker fetched, and the index is
+    rebuilt from the directory every ``rescan_seconds`` (or as soon as it
+    passes the bound), so the bound holds for the directory as a whole.
+    """
+
+    def __init__(self, root: str = 'shared_data/image_proxy_cache', max_bytes: int = 512 * 1024 * 1024,
+                 max_object_bytes: int = 20 * 1024 * 1024, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0, pool_size: int = 16,
+                 allowed_hosts: Iterable[str] = DEFAULT_ALLOWED_HOSTS, rescan_seconds: float = 60.0):
+        self.root = root
+        self.allowed_hosts = frozenset(host.lower() for host in allowed_hosts)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.timeout = (connect_timeout, read_timeout)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.upstream_errors = 0
+        self.rejected = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self.rescan_seconds = rescan_seconds
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                              allowed_methods=frozenset(['GET']))
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            self._scan()
+
+    def allows(self, url: str) -> bool:
+        """Whether ``url`` is an http(s) URL on one of the allowed hosts."""
+        parts = urlsplit(url)
+        return parts.scheme in ('http', 'https') and (parts.hostname or '') in self.allowed_hosts
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.root, key)
+        return base + '.img', base + '.json'
+
+    def _scan(self) -> None:
+        """Rebuild the index from the directory, which every worker writes to."""
+        # Oldest access first; lookups touch the file, so mtime is the last
+        # access by any worker
+        found = []
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith('.img'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._bytes = sum(self._entries.values())
+        self._last_scan = time.monotonic()
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def lookup(self, url: str) -> Optional[CachedImage]:
+        """Return the cached copy of ``url``, or None on a miss."""
+        key = self.key(url)
+        image_path, meta_path = self._paths(key)
+        with self._lock:
+            if key not in self._entries:
+                # Fetched by another worker since the last scan?
+                try:
+                    size = os.stat(image_path).st_size
+                except OSError:
+                    pass
+                else:
+                    self._entries[key] = size
+                    self._bytes += size
+            if key in self._entries:
+                try:
+                    with open(meta_path, 'r') as f:
+                        meta = json.load(f)
+                    os.utime(image_path)
+                except (OSError, ValueError):
+                    # Evicted by another worker
+                    self._bytes -= self._entries.pop(key)
+                else:
+                    if not meta['content_type'].lower().startswith('image/'):
+                        # Cached before responses were restricted to images
+                        self.misses += 1
+                        return None
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return CachedImage(image_path, meta['content_type'], meta['etag'], self._entries[key])
+            self.misses += 1
+            return None
+
+    def fetch(self, url: str) -> UpstreamResponse:
+        """Start fetching ``url``. Raises ``requests.RequestException`` if the request fails."""
+        try:
+            response = self.session.get(url, stream=True, timeout=self.timeout)
+        except requests.RequestException:
+            with self._lock:
+                self.upstream_errors += 1
+            raise
+
+        content_type = response.headers.get('Content-Type', 'application/octet-stream')
+        if response.status_code != 200:
+            with self._lock:
+                self.upstream_errors += 1
+            response.close()
+            return UpstreamResponse(response.status_code, content_type, None, iter(()))
+
+        if not content_type.lower().startswith('image/'):
+            with self._lock:
+                self.rejected += 1
+            response.close()
+            return UpstreamResponse(415, content_type, None, iter(()))
+
+        return UpstreamResponse(200, content_type, response.headers.get('Content-Length'),
+                                self._stream(url, response, content_type))
+
+    def _stream(self, url: str, response, content_type: str) -> Iterator[bytes]:
+        """Yield the upstream body while copying it to a temp file; commit it once complete."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size <= self.max_object_bytes:
+                        f.write(chunk)
+                        digest.update(chunk)
+                    yield chunk
+            complete = size <= self.max_object_bytes
+        except requests.RequestException as e:
+            logging.error(f"Error streaming proxied image: {e}")
+            with self._lock:
+                self.upstream_errors += 1
+        finally:
+            response.close()
+            if complete:
+                self._commit(url, tmp_path, content_type, digest.hexdigest()[:32], size)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _commit(self, url: str, tmp_path: str, content_type: str, etag: str, size: int) -> None:
+        key = self.key(url)
+        image_path, meta_path = self._paths(key)
+        with open(meta_path, 'w') as f:
+            json.dump({'url': url, 'content_type': content_type, 'etag': etag}, f)
+        os.replace(tmp_path, image_path)
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            if self._bytes > self.max_bytes or time.monotonic() - self._last_scan > self.rescan_seconds:
+                self._scan()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'upstream_errors': self.upstream_errors,
+                'rejected': self.rejected
+            }
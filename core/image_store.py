@@ -0,0 +1,169 @@
+# core/image_store.py
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+
+# variant -> (longest side in pixels or None to keep the size, WebP quality)
+VARIANTS = {
+    'thumb': (320, 80),
+    'full': (None, 85)
+}
+
+
+def _write_atomic(path: str, write) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def render_variants(source_path: str, targets: Dict[str, str]) -> Dict[str, str]:
+    """Write each ``variant -> path`` in ``targets`` from the source image.
+
+    Runs in a worker process, so it only takes and returns plain paths.
+    """
+    from PIL import Image
+
+    with Image.open(source_path) as source:
+        source.load()
+        image = source.convert('RGB')
+
+    for variant, path in targets.items():
+        max_side, quality = VARIANTS[variant]
+        resized = image
+        if max_side and max(image.size) > max_side:
+            resized = image.copy()
+            resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        _write_atomic(path, lambda f: resized.save(f, format='WEBP', quality=quality, method=4))
+    return targets
+
+
+def _pool_context():
+    """Start pool workers from a fork server rather than forking the caller.
+
+    A forked worker would inherit the serving process's threads, locks and
+    MongoDB sockets. The fork server preloads this module and Pillow, so new
+    workers start from a small process that already has them imported.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__, 'PIL.Image'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class ImageStore:
+    """Content-addressed image files on local disk.
+
+    Files are named by the SHA-256 of their bytes, so a name never changes
+    meaning and can be served with a far-future cache lifetime. Derived
+    files (a small thumbnail and a full-size WebP) sit next to the original
+    as ``<sha256>.<variant>.webp`` and are rendered in a process pool so
+    image resizing does not hold the GIL of a serving process.
+    """
+
+    def __init__(self, root: str = 'shared_data/image_store', url_prefix: str = '/image-store',
+                 variant_workers: int = 2):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/')
+        self.variant_workers = variant_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
+
+    def put(self, data: bytes, extension: str = 'png') -> str:
+        """Store image bytes and return the file name (``<sha256>.<extension>``)."""
+        name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        path = self.path(name)
+        if os.path.exists(path):
+            return name
+
+        os.makedirs(self.root, exist_ok=True)
+        _write_atomic(path, lambda f: f.write(data))
+        return name
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, os.path.basename(name))
+
+    def exists(self, name: Optional[str]) -> bool:
+        return bool(name) and os.path.exists(self.path(name))
+
+    def url(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
+
+    @staticmethod
+    def variant_name(name: str, variant: str) -> str:
+        return f"{os.path.basename(name).split('.', 1)[0]}.{variant}.webp"
+
+    def existing_variants(self, name: str) -> Dict[str, str]:
+        """Variant names already on disk for ``name``."""
+        found = {variant: self.variant_name(name, variant) for variant in VARIANTS}
+        return {variant: found_name for variant, found_name in found.items() if self.exists(found_name)}
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.variant_workers <= 0:
+            return None
+        with self._pool_lock:
+            # A pool inherited across fork belongs to the parent
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.variant_workers, mp_context=_pool_context())
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def make_variants(self, name: str) -> Future:
+        """Render missing variants of a stored image; the future yields ``{variant: name}``."""
+        existing = self.existing_variants(name)
+        targets = {variant: self.path(self.variant_name(name, variant))
+                   for variant in VARIANTS if variant not in existing}
+
+        done = Future()
+        if not targets:
+            done.set_result(existing)
+            return done
+
+        executor = self._executor()
+        if executor is None:
+            try:
+                render_variants(self.path(name), targets)
+                done.set_result(self.existing_variants(name))
+            except Exception as e:
+                done.set_exception(e)
+            return done
+
+        def finish(rendered: Future) -> None:
+            if rendered.exception() is not None:
+                logging.error(f"Rendering variants of {name} failed: {rendered.exception()}")
+                done.set_exception(rendered.exception())
+            else:
+                done.set_result(self.existing_variants(name))
+
+        executor.submit(render_variants, self.path(name), targets).add_done_callback(finish)
+        return done
+
+    def variants(self, name: str, timeout: Optional[float] = 60) -> Dict[str, str]:
+        """Render missing variants and wait; returns whatever exists if rendering fails."""
+        try:
+            return self.make_variants(name).result(timeout)
+        except Exception as e:
+            logging.error(f"Image variants unavailable for {name}: {e}")
+            return self.existing_variants(name)
+
+    def variant_urls(self, name: str) -> Dict[str, str]:
+        """URLs of the variants of ``name`` that exist, keyed ``thumbnail_url`` and ``webp_url``."""
+        existing = self.existing_variants(name)
+        urls = {}
+        if 'thumb' in existing:
+            urls['thumbnail_url'] = self.url(existing['thumb'])
+        if 'full' in existing:
+            urls['webp_url'] = self.url(existing['full'])
+        return urls
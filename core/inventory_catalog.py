@@ -0,0 +1,102 @@
+# core/inventory_catalog.py
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Extra starting items by world, checked in order against the world name
+WORLD_LOCATION_ITEMS: List[Tuple[str, List[str]]] = [
+    ("Ignisia", ["Fire-resistant cloak", "Magma compass"]),
+    ("Aquaria", ["Water breathing charm", "Pearl compass"]),
+    ("Mechanica", ["Clockwork assistant", "Steam-powered toolkit"]),
+    ("Terranova", ["Nature's blessing stone", "Living compass"]),
+    ("Etheria", ["Ethereal crystal", "Void compass"]),
+]
+
+
+def location_key(world_name: Optional[str]) -> Optional[str]:
+    """Return the WORLD_LOCATION_ITEMS entry that applies to a world, if any."""
+    if not world_name:
+        return None
+    for key, _ in WORLD_LOCATION_ITEMS:
+        if key in world_name:
+            return key
+    return None
+
+
+def parse_items(char_items: List[str]) -> Dict[str, int]:
+    """Convert inventory.json entries ("10 gold", "Lucky charm") to item counts."""
+    inventory = {}
+    for item in char_items:
+        if item.endswith('gold'):
+            inventory['gold'] = int(item.split()[0])
+        else:
+            inventory[item] = 1
+    return inventory
+
+
+def _with_items(inventory: Dict[str, int], items: List[str]) -> Dict[str, int]:
+    combined = dict(inventory)
+    for item in items:
+        combined[item] = combined.get(item, 0) + 1
+    return combined
+
+
+class _InventoryIndex:
+    """Starting inventories compiled for every character and world type."""
+
+    def __init__(self, data: Dict):
+        self.characters = {name: parse_items(items) for name, items in data['inventories'].items()}
+        self.inventories: Dict[Tuple[str, Optional[str]], Dict[str, int]] = {}
+        self.unknown: Dict[Optional[str], Dict[str, int]] = {None: {}}
+
+        for key, items in WORLD_LOCATION_ITEMS:
+            self.unknown[key] = _with_items({}, items)
+        for name, inventory in self.characters.items():
+            self.inventories[(name, None)] = inventory
+            for key, items in WORLD_LOCATION_ITEMS:
+                self.inventories[(name, key)] = _with_items(inventory, items)
+
+
+class InventoryCatalog:
+    """Starting inventories parsed once from ``inventory.json``.
+
+    Each lookup returns a fresh dict, so callers can mutate it freely.
+    """
+
+    def __init__(self, path: str = 'shared_data/inventory.json'):
+        self.path = path
+        self.version = 0
+        self._index = _InventoryIndex({'inventories': {}})
+        self._lock = threading.Lock()
+
+    def reload(self) -> bool:
+        """Re-read the inventory file. Keeps the previous data if loading fails."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            index = _InventoryIndex(data)
+        except Exception as e:
+            logging.error(f"Error loading inventories from {self.path}: {e}")
+            return False
+
+        with self._lock:
+            self._index = index
+            self.version += 1
+        logging.info(f"Loaded inventories for {len(index.characters)} characters (version {self.version})")
+        return True
+
+    def has_character(self, character_name: str) -> bool:
+        return character_name in self._index.characters
+
+    def starting_inventory(self, character_name: str, world_name: Optional[str] = None) -> Dict[str, int]:
+        """Return the character's starting items plus the world's location items.
+
+        Characters missing from the file start with only the location items.
+        """
+        index = self._index
+        key = location_key(world_name)
+        inventory = index.inventories.get((character_name, key))
+        if inventory is None:
+            inventory = index.unknown[key]
+        return dict(inventory)
@@ -0,0 +1,194 @@
+# core/narration_cache.py
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .game_state import GameState
+
+
+class MemoryNarrationBackend:
+    """In-process LRU store of narration variants with a TTL."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return list(entry[0])
+
+    def set(self, key: str, variants: List[str]) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            # Adding a variant keeps the original expiry time
+            created_at = entry[1] if entry else time.time()
+            self._entries[key] = (list(variants), created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteNarrationBackend:
+    """On-disk store so cached narration survives restarts.
+
+    Safe to share between gunicorn workers; each process opens its own
+    connection to the same file.
+    """
+
+    def __init__(self, path: str = 'shared_data/narration_cache.sqlite3',
+                 max_entries: int = 100000, ttl_seconds: int = 7 * 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reconnect after fork; sqlite connections must not cross processes
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS narration ("
+                "key TEXT PRIMARY KEY, variants TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS narration_accessed_at ON narration (accessed_at)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[List[str]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT variants, created_at FROM narration WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM narration WHERE key = ?", (key,))
+                conn.commit()
+                self.evictions += 1
+                return None
+            conn.execute("UPDATE narration SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return json.loads(row[0])
+
+    def set(self, key: str, variants: List[str]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO narration (key, variants, created_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET variants = excluded.variants, accessed_at = excluded.accessed_at",
+                (key, json.dumps(variants), now, now)
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM narration").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM narration WHERE key IN "
+                    "(SELECT key FROM narration ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM narration").fetchone()[0]
+
+
+class NarrationCache:
+    """Caches Game Master narration by (location, inventory, action).
+
+    Up to ``max_variants`` responses are kept per key. On a hit, a new
+    variant is generated with probability ``variation_rate`` until the key
+    has ``max_variants`` of them; otherwise a stored one is picked at random.
+    """
+
+    def __init__(self, backend=None, max_variants: int = 3, variation_rate: float = 0.0):
+        self.backend = backend if backend is not None else MemoryNarrationBackend()
+        self.max_variants = max_variants
+        self.variation_rate = variation_rate
+        self.hits = 0
+        self.misses = 0
+        self.variations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_action(action: str) -> str:
+        action = action.strip().strip('"\'').lower()
+        action = re.sub(r"[^\w\s']", ' ', action)
+        return ' '.join(action.split())
+
+    def make_key(self, action: str, game_state: GameState) -> str:
+        """Build the cache key for an action in the player's current situation."""
+        signature = [
+            game_state.current_location.get('name', ''),
+            sorted(item for item, count in game_state.inventory.items() if count > 0),
+            self.normalize_action(action)
+        ]
+        return hashlib.sha256(json.dumps(signature).encode('utf-8')).hexdigest()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return a cached narration, or None if the caller should generate one."""
+        variants = self.backend.get(key)
+        if not variants:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if len(variants) < self.max_variants and random.random() < self.variation_rate:
+            with self._lock:
+                self.variations += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return random.choice(variants)
+
+    def store(self, key: str, narration: str) -> None:
+        """Add a freshly generated narration as a variant for this key."""
+        variants = self.backend.get(key) or []
+        if narration in variants:
+            return
+        variants.append(narration)
+        self.backend.set(key, variants[-self.max_variants:])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.variations
+            return {
+                'entries': len(self.backend),
+                'hits': self.hits,
+                'misses': self.misses,
+                'variations': self.variations,
+                'evictions': self.backend.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
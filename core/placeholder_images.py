@@ -0,0 +1,166 @@
+# core/placeholder_images.py
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+MAX_DIMENSION = 1024
+MIMETYPES = {'png': 'image/png', 'webp': 'image/webp'}
+
+SVG_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">'
+    '<rect width="{w}" height="{h}" fill="#2a2a3d"/>'
+    '<g stroke="#ffffff" stroke-width="2" fill="none">'
+    '<rect x="{m}" y="{m}" width="{iw}" height="{ih}"/>'
+    '<path d="M{m} {m}L{r} {b}M{m} {b}L{r} {m}"/></g></svg>'
+)
+
+
+class Placeholder(NamedTuple):
+    data: bytes
+    mimetype: str
+    etag: str
+
+
+def render_placeholder(width: int, height: int, fmt: str = 'png') -> Placeholder:
+    """Draw the framed-cross placeholder tile and encode it as PNG or WebP."""
+    from PIL import Image, ImageDraw
+
+    img = Image.new('RGB', (width, height), color='#2a2a3d')
+    draw = ImageDraw.Draw(img)
+
+    # Draw a simple pattern instead of text
+    margin = min(width, height) // 10
+    draw.rectangle(
+        [margin, margin, width - margin, height - margin],
+        outline='#ffffff',
+        width=2
+    )
+    draw.line([(margin, margin), (width - margin, height - margin)], fill='#ffffff', width=2)
+    draw.line([(margin, height - margin), (width - margin, margin)], fill='#ffffff', width=2)
+
+    img_io = io.BytesIO()
+    if fmt == 'webp':
+        img.save(img_io, format='WEBP', lossless=True)
+    else:
+        img.save(img_io, format='PNG', optimize=True)
+    data = img_io.getvalue()
+    return Placeholder(data, MIMETYPES[fmt], hashlib.sha256(data).hexdigest()[:32])
+
+
+def svg_placeholder(width: int, height: int) -> bytes:
+    """The same tile as SVG, built with string formatting and no encoder.
+
+    Served while the raster tile for a new size is still rendering.
+    """
+    margin = min(width, height) // 10
+    return SVG_TEMPLATE.format(
+        w=width, h=height, m=margin, iw=width - 2 * margin, ih=height - 2 * margin,
+        r=width - margin, b=height - margin
+    ).encode('utf-8')
+
+
+def webp_supported() -> bool:
+    try:
+        from PIL import features
+        return bool(features.check('webp'))
+    except Exception:
+        return False
+
+
+class PlaceholderCache:
+    """Encoded placeholder tiles, memoized by (width, height, format).
+
+    Misses render on a small thread pool and ``get`` does not wait for them:
+    it returns None and the finished render fills the cache for the next
+    request. Concurrent requests for the same tile share one render. The cache keeps
+    at most ``max_entries`` tiles, dropping the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 256, max_workers: int = 2):
+        self.max_entries = max_entries
+        self.formats = ('png', 'webp') if webp_supported() else ('png',)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, int, str], Placeholder]" = OrderedDict()
+        self._pending: Dict[Tuple[int, int, str], Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='placeholder')
+        # Reentrant: a render that finishes before add_done_callback runs
+        # calls _store on this thread while _lookup still holds the lock
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def clamp(width: int, height: int) -> Tuple[int, int]:
+        return (max(1, min(width, MAX_DIMENSION)), max(1, min(height, MAX_DIMENSION)))
+
+    def get(self, width: int, height: int, fmt: str = 'png') -> Optional[Placeholder]:
+        """Return the cached tile, or None after queueing its render."""
+        future = self._lookup(width, height, fmt)
+        if future.done() and future.exception() is None:
+            return future.result()
+        return None
+
+    def _lookup(self, width: int, height: int, fmt: str) -> Future:
+        if fmt not in self.formats:
+            fmt = 'png'
+        key = self.clamp(width, height) + (fmt,)
+        with self._lock:
+            placeholder = self._entries.get(key)
+            if placeholder is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                done = Future()
+                done.set_result(placeholder)
+                return done
+            self.misses += 1
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(render_placeholder, *key)
+                self._pending[key] = future
+                future.add_done_callback(lambda f, key=key: self._store(key, f))
+            return future
+
+    def _store(self, key: Tuple[int, int, str], future: Future) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is not None:
+                logging.error(f"Placeholder render {key} failed: {future.exception()}")
+                return
+            self._entries[key] = future.result()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def prerender(self, sizes: Iterable[Tuple[int, int]]) -> None:
+        """Queue renders for common sizes in every supported format without waiting."""
+        for width, height in sizes:
+            for fmt in self.formats:
+                self._lookup(width, height, fmt)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'pending': len(self._pending),
+                'formats': list(self.formats),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+def parse_sizes(spec: str) -> Iterable[Tuple[int, int]]:
+    """Parse ``"400x320,200x200"`` into size tuples, skipping malformed entries."""
+    sizes = []
+    for part in spec.split(','):
+        try:
+            width, height = part.lower().strip().split('x')
+            sizes.append((int(width), int(height)))
+        except ValueError:
+            continue
+    return sizes
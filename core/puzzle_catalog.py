@@ -0,0 +1,91 @@
+# core/puzzle_catalog.py
+import json
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .puzzle_state import PuzzleProgress, TaskProgress
+
+
+class CharacterPuzzle(NamedTuple):
+    world_name: str
+    role_tasks: List[Dict]
+
+
+class _PuzzleIndex:
+    """Parsed puzzle file plus per-character lookups and progress templates."""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.characters: Dict[str, CharacterPuzzle] = {}
+        self.templates: Dict[Tuple[str, str], PuzzleProgress] = {}
+
+        for world_name, world_puzzle in data['world_puzzles'].items():
+            for character_name, char_puzzle in world_puzzle.get('characters', {}).items():
+                role_tasks = char_puzzle['role_tasks']
+                self.characters.setdefault(character_name, CharacterPuzzle(world_name, role_tasks))
+                template = PuzzleProgress(
+                    main_puzzle=world_puzzle['main_puzzle'],
+                    solution_requirements=world_puzzle['solution_requirements'],
+                    total_tasks=len(role_tasks),
+                    completed_tasks=0,
+                    tasks={
+                        task['task_id']: TaskProgress(**task, completed=False)
+                        for task in role_tasks
+                    }
+                )
+                # Tokenize the task descriptions once, at load time
+                template.matcher
+                self.templates[(world_name, character_name)] = template
+
+
+class PuzzleCatalog:
+    """Puzzle data loaded once from disk and indexed by character.
+
+    ``new_progress()`` hands out a fresh copy of a prebuilt ``PuzzleProgress``
+    so starting a game never re-parses the puzzle file or re-tokenizes its
+    task descriptions.
+    """
+
+    def __init__(self, path: str = 'shared_data/puzzle_data.json'):
+        self.path = path
+        self.version = 0
+        self._index = _PuzzleIndex({'world_puzzles': {}})
+        self._lock = threading.Lock()
+
+    def reload(self) -> bool:
+        """Re-read the puzzle file. Keeps the previous data if loading fails."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            index = _PuzzleIndex(data)
+        except Exception as e:
+            logging.error(f"Error loading puzzle data from {self.path}: {e}")
+            return False
+
+        with self._lock:
+            self._index = index
+            self.version += 1
+        logging.info(f"Loaded puzzles for {len(index.characters)} characters (version {self.version})")
+        return True
+
+    def has_character(self, character_name: str) -> bool:
+        """Check if a character has a puzzle in any world."""
+        return character_name in self._index.characters
+
+    def has_puzzle(self, world_name: str, character_name: str) -> bool:
+        return (world_name, character_name) in self._index.templates
+
+    def puzzles(self) -> List[Tuple[str, str]]:
+        """All (world, character) pairs that have a puzzle."""
+        return list(self._index.templates)
+
+    def get_character(self, character_name: str) -> Optional[CharacterPuzzle]:
+        return self._index.characters.get(character_name)
+
+    def new_progress(self, world_name: str, character_name: str) -> Optional[PuzzleProgress]:
+        """Return an independent copy of the character's puzzle in this world."""
+        template = self._index.templates.get((world_name, character_name))
+        if template is None:
+            return None
+        return template.clone()
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import Dict, List, Optional
-import logging
+from .task_matcher import TaskMatcher
+from utils.logging_utils import debug_event
 
 class TaskProgress(BaseModel):
     task_id: str
@@ -16,6 +17,29 @@ class PuzzleProgress(BaseModel):
     total_tasks: int
     completed_tasks: int
     tasks: Dict[str, TaskProgress]
+    _matcher: Optional[TaskMatcher] = PrivateAttr(default=None)
+
+    @property
+    def matcher(self) -> TaskMatcher:
+        """Task index for matching actions, built on first use."""
+        if self._matcher is None:
+            self._matcher = TaskMatcher.for_tasks(self.tasks)
+        return self._matcher
+
+    def clone(self) -> 'PuzzleProgress':
+        """Return an independent copy that shares this puzzle's task vocabulary."""
+        # Task fields are immutable values, so a shallow copy per task suffices
+        progress = self.model_copy(update={
+            'solution_requirements': list(self.solution_requirements),
+            'tasks': {task_id: task.model_copy() for task_id, task in self.tasks.items()}
+        })
+        progress._matcher = self.matcher.fork()
+        return progress
+
+    def match_task(self, action: str) -> Optional[TaskProgress]:
+        """Return the incomplete task the action performs, if any."""
+        task_id = self.matcher.match(action)
+        return self.tasks[task_id] if task_id is not None else None
     
     def calculate_progress(self) -> float:
         """Calculate completion percentage"""
@@ -28,6 +52,7 @@ class PuzzleProgress(BaseModel):
         if task_id in self.tasks and not self.tasks[task_id].completed:
             self.tasks[task_id].completed = True
             self.completed_tasks += 1
+            self.matcher.complete(task_id)
             return self.tasks[task_id].reward
         return None
 
@@ -54,18 +79,7 @@ class PuzzleProgress(BaseModel):
 
     def get_available_tasks(self, inventory: Dict[str, int]) -> List[TaskProgress]:
         """Get list of tasks that can be performed with current inventory"""
-        logging.info(f"Getting available tasks with inventory: {inventory}")
-        
-        available = []
-        for task in self.tasks.values():
-            if not task.completed:  # Task hasn't been completed yet
-                # Log task checking
-                logging.info(f"Checking task: {task.task_id} - {task.title}")
-                
-                # Always include tasks at the beginning
-                available.append(task)
-                
-                logging.info(f"Added task to available list: {task.task_id}")
-        
-        logging.info(f"Number of available tasks: {len(available)}")
+        # Always include every incomplete task
+        available = [task for task in self.tasks.values() if not task.completed]
+        debug_event('available_tasks', count=len(available), task_ids=[task.task_id for task in available])
         return available
\ No newline at end of file
@@ -0,0 +1,211 @@
+# core/session_store.py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from .game_state import GameState
+
+
+class GameStateStore:
+    """Active games keyed by game id.
+
+    With a ``backend`` (see db.game_states) the backend holds the
+    authoritative copy and this store is a per-process front cache: a cached
+    game is served only after the backend confirms no newer version exists,
+    so any worker can serve any game. Without one, games live only in this
+    process and a multi-worker server needs sticky routing.
+
+    Entries are kept in LRU order and evicted when they have been idle for
+    longer than ``ttl_seconds``, when there are more than ``max_sessions``
+    of them, or when their estimated footprint exceeds ``max_bytes``.
+    ``world_loader`` maps a world name back to the shared world data, which
+    is not stored with each game.
+    """
+
+    def __init__(self, max_sessions: int = 5000, ttl_seconds: int = 3600,
+                 max_bytes: int = 256 * 1024 * 1024, backend=None,
+                 world_loader: Optional[Callable[[str], Optional[Dict]]] = None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.world_loader = world_loader
+        self.backend_errors = 0
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {'lru': 0, 'ttl': 0, 'memory': 0}
+
+    @staticmethod
+    def _estimate_size(game_state: GameState) -> int:
+        """Estimate per-session memory, ignoring the shared world data."""
+        per_session = {
+            'inventory': game_state.inventory,
+            'history': game_state.history,
+            'character': game_state.character,
+            'puzzle_progress': game_state.puzzle_progress.dict() if game_state.puzzle_progress else None
+        }
+        return len(json.dumps(per_session, default=str))
+
+    @staticmethod
+    def _serialize(game_state: GameState) -> str:
+        record = game_state.dict(exclude={'world'})
+        record['world_name'] = game_state.world.get('name')
+        return json.dumps(record, default=str)
+
+    def _deserialize(self, state: str) -> Optional[GameState]:
+        record = json.loads(state)
+        world = self.world_loader(record.pop('world_name')) if self.world_loader else None
+        if world is None:
+            return None
+        return GameState(world=world, **record)
+
+    def _cached(self, game_id: str, now: float) -> Optional[list]:
+        """The live local entry for ``game_id``; call with the lock held."""
+        entry = self._entries.get(game_id)
+        if entry is not None and now - entry[1] > self.ttl_seconds:
+            self._remove(game_id)
+            self.evictions['ttl'] += 1
+            return None
+        return entry
+
+    def get(self, game_id: Optional[str]) -> Optional[GameState]:
+        """Return the game for ``game_id`` and mark it as recently used."""
+        if not game_id:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cached(game_id, now)
+            if self.backend is None:
+                if entry is None:
+                    self.misses += 1
+                    return None
+                entry[1] = now
+                self._entries.move_to_end(game_id)
+                self.hits += 1
+                return entry[0]
+            version = entry[3] if entry is not None else None
+
+        try:
+            loaded = self.backend.load(game_id, newer_than=version)
+        except Exception as e:
+            # Serve the local copy, if any, while the backend is unreachable
+            logging.error(f"Could not load game {game_id}: {e}")
+            loaded = (None, version)
+            with self._lock:
+                self.backend_errors += 1
+
+        if loaded is None:
+            # Expired or deleted, possibly by another worker
+            with self._lock:
+                if game_id in self._entries:
+                    self._remove(game_id)
+                self.misses += 1
+            return None
+
+        game_state = self._deserialize(loaded[0]) if loaded[0] is not None else None
+        with self._lock:
+            if game_state is not None:
+                # Another worker changed the game since this copy was cached
+                self.misses += 1
+                self._store(game_id, game_state, now, len(loaded[0]), loaded[1])
+                return game_state
+            entry = self._cached(game_id, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[1] = now
+            self._entries.move_to_end(game_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, game_id: str, game_state: GameState) -> None:
+        """Store or refresh a game and enforce the size limits."""
+        version = None
+        if self.backend is None:
+            size = self._estimate_size(game_state)
+        else:
+            state = self._serialize(game_state)
+            size = len(state)
+            try:
+                version = self.backend.save(game_id, state)
+            except Exception as e:
+                logging.error(f"Could not save game {game_id}: {e}")
+                with self._lock:
+                    self.backend_errors += 1
+                    entry = self._entries.get(game_id)
+                    # Keep the old version so a stale backend copy does not replace this one
+                    version = entry[3] if entry is not None else None
+
+        with self._lock:
+            self._store(game_id, game_state, time.monotonic(), size, version)
+
+    def _store(self, game_id: str, game_state: GameState, now: float, size: int,
+               version: Optional[int]) -> None:
+        if game_id in self._entries:
+            self._remove(game_id)
+        self._entries[game_id] = [game_state, now, size, version]
+        self._total_bytes += size
+        self._evict(now)
+
+    def delete(self, game_id: str) -> None:
+        """Forget a game."""
+        with self._lock:
+            if game_id in self._entries:
+                self._remove(game_id)
+        if self.backend is not None:
+            try:
+                self.backend.delete(game_id)
+            except Exception as e:
+                logging.error(f"Could not delete game {game_id}: {e}")
+
+    def _remove(self, game_id: str) -> None:
+        entry = self._entries.pop(game_id)
+        self._total_bytes -= entry[2]
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones over budget."""
+        # Entries are in access order, so expired ones sit at the front
+        while self._entries:
+            game_id, entry = next(iter(self._entries.items()))
+            if now - entry[1] <= self.ttl_seconds:
+                break
+            self._remove(game_id)
+            self.evictions['ttl'] += 1
+
+        while len(self._entries) > self.max_sessions:
+            self._remove(next(iter(self._entries)))
+            self.evictions['lru'] += 1
+
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evictions['memory'] += 1
+
+    def stats(self) -> Dict:
+        """Return counters used to size the store."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'sessions': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_sessions': self.max_sessions,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': dict(self.evictions),
+                'backend': type(self.backend).__name__ if self.backend is not None else None,
+                'backend_errors': self.backend_errors
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
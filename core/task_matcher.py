@@ -0,0 +1,129 @@
+# core/task_matcher.py
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do for from has have he her his i in into is it its me my
+of on or our out over she so that the their them then there these they this through to
+up us we were what when where which while who will with you your yours
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """Strip common English inflections so "islands" and "mapping" match "island" and "map"."""
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith(('sses', 'shes', 'ches', 'xes')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        word = word[:-1]
+
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+
+    if word.endswith('e') and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Lowercase, drop stopwords and stem; returns the set of content terms."""
+    return frozenset(stem(word) for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS)
+
+
+def normalize_phrase(text: str) -> str:
+    return ' '.join(_WORD_RE.findall(text.lower()))
+
+
+class TaskVocabulary:
+    """Tokenized task descriptions and an inverted index over their terms.
+
+    Built once per puzzle template and shared by every game of that puzzle.
+    """
+
+    def __init__(self, tasks: Dict):
+        self.order: Dict[str, int] = {task_id: i for i, task_id in enumerate(tasks)}
+        self.terms: Dict[str, FrozenSet[str]] = {}
+        self.phrases: Dict[str, str] = {}
+        postings: Dict[str, List[str]] = {}
+
+        for task_id, task in tasks.items():
+            terms = tokenize(task.description)
+            self.terms[task_id] = terms
+            self.phrases.setdefault(normalize_phrase(task.description), task_id)
+            for term in terms:
+                postings.setdefault(term, []).append(task_id)
+
+        self.postings: Dict[str, Tuple[str, ...]] = {term: tuple(ids) for term, ids in postings.items()}
+
+
+class TaskMatcher:
+    """Matches player actions to a game's incomplete puzzle tasks.
+
+    An action matches a task when it repeats the description, shares at
+    least ``min_overlap`` content terms with it, or the shared terms make
+    up at least ``min_similarity`` of both term sets combined. The best
+    scoring task wins; ties go to the task listed first.
+    """
+
+    def __init__(self, vocabulary: TaskVocabulary, active: Iterable[str],
+                 min_overlap: int = 2, min_similarity: float = 0.5):
+        self.vocabulary = vocabulary
+        self.active: Set[str] = set(active)
+        self.min_overlap = min_overlap
+        self.min_similarity = min_similarity
+        self._last: Optional[Tuple[str, Optional[str]]] = None
+
+    @classmethod
+    def for_tasks(cls, tasks: Dict) -> 'TaskMatcher':
+        return cls(TaskVocabulary(tasks), (task_id for task_id, task in tasks.items() if not task.completed))
+
+    def fork(self) -> 'TaskMatcher':
+        """A matcher for another game, sharing this one's vocabulary."""
+        return TaskMatcher(self.vocabulary, self.active, self.min_overlap, self.min_similarity)
+
+    def complete(self, task_id: str) -> None:
+        """Stop matching a task once it has been completed."""
+        self.active.discard(task_id)
+        self._last = None
+
+    def match(self, action: str) -> Optional[str]:
+        """Return the id of the task the action performs, or None."""
+        # /action asks twice (route, then Game Master) for the same text
+        last = self._last
+        if last is not None and last[0] == action:
+            return last[1]
+
+        result = self._score(action)
+        self._last = (action, result)
+        return result
+
+    def _score(self, action: str) -> Optional[str]:
+        vocabulary = self.vocabulary
+        task_id = vocabulary.phrases.get(normalize_phrase(action.strip('"\'')))
+        if task_id in self.active:
+            return task_id
+
+        action_terms = tokenize(action)
+        overlaps: Dict[str, int] = {}
+        for term in action_terms:
+            for task_id in vocabulary.postings.get(term, ()):
+                if task_id in self.active:
+                    overlaps[task_id] = overlaps.get(task_id, 0) + 1
+
+        best = None
+        best_key = None
+        for task_id, overlap in overlaps.items():
+            similarity = overlap / len(vocabulary.terms[task_id] | action_terms)
+            if overlap < self.min_overlap and similarity < self.min_similarity:
+                continue
+            key = (overlap, similarity, -vocabulary.order[task_id])
+            if best_key is None or key > best_key:
+                best, best_key = task_id, key
+        return best
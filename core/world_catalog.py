@@ -0,0 +1,125 @@
+# core/world_catalog.py
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+class CharacterLocation(NamedTuple):
+    world: Dict
+    kingdom: Dict
+    town: Dict
+    npc: Dict
+
+
+class WorldPayload(NamedTuple):
+    """The world file serialized for HTTP, plain and gzip-compressed."""
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
+
+
+def _serialize(data: Dict) -> WorldPayload:
+    # Same key order and separators as Flask's jsonify in production
+    body = (json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=True) + '\n').encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return WorldPayload(
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+        etag=digest,
+        gzip_etag=f"{digest}-gzip"
+    )
+
+
+class _WorldIndex:
+    """Parsed world file plus lookup tables, built once per load."""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.worlds: Dict[str, Dict] = data['worlds']
+        self.kingdoms: Dict[str, Dict] = {}
+        self.towns: Dict[str, Dict] = {}
+        self.characters: Dict[str, CharacterLocation] = {}
+        self.characters_by_world: Dict[Tuple[str, str], CharacterLocation] = {}
+        self.characters_by_kingdom: Dict[Tuple[str, str, str], CharacterLocation] = {}
+        self.payload = _serialize(data)
+
+        # First occurrence wins, matching the order routes used to walk the file
+        for world_name, world in self.worlds.items():
+            for kingdom_name, kingdom in world.get('kingdoms', {}).items():
+                self.kingdoms.setdefault(kingdom_name, kingdom)
+                for town_name, town in kingdom.get('towns', {}).items():
+                    self.towns.setdefault(town_name, town)
+                    for npc_name, npc in town.get('npcs', {}).items():
+                        location = CharacterLocation(world, kingdom, town, npc)
+                        self.characters.setdefault(npc_name, location)
+                        self.characters_by_world.setdefault((world_name, npc_name), location)
+                        self.characters_by_kingdom.setdefault((world_name, kingdom_name, npc_name), location)
+
+
+class WorldCatalog:
+    """Game worlds loaded once from disk and indexed for O(1) lookups.
+
+    ``reload()`` re-reads the file and swaps the whole index in one step, so
+    requests running concurrently always see a consistent snapshot.
+    """
+
+    def __init__(self, path: str = 'shared_data/game_world.json'):
+        self.path = path
+        self.version = 0
+        self._index = _WorldIndex({'worlds': {}})
+        self._lock = threading.Lock()
+
+    def reload(self) -> bool:
+        """Re-read the world file. Keeps the previous data if loading fails."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if 'worlds' not in data:
+                raise ValueError(f"{self.path} has no 'worlds' key")
+            index = _WorldIndex(data)
+        except Exception as e:
+            logging.error(f"Error loading worlds from {self.path}: {e}")
+            return False
+
+        with self._lock:
+            self._index = index
+            self.version += 1
+        logging.info(f"Loaded {len(index.worlds)} worlds, {len(index.characters)} characters (version {self.version})")
+        return True
+
+    @property
+    def data(self) -> Dict:
+        """The parsed world file, i.e. ``{'worlds': {...}}``."""
+        return self._index.data
+
+    @property
+    def payload(self) -> WorldPayload:
+        """Pre-serialized response bodies for the current version."""
+        return self._index.payload
+
+    @property
+    def worlds(self) -> Dict[str, Dict]:
+        return self._index.worlds
+
+    def get_world(self, world_name: str) -> Optional[Dict]:
+        return self._index.worlds.get(world_name)
+
+    def get_kingdom(self, kingdom_name: str) -> Optional[Dict]:
+        return self._index.kingdoms.get(kingdom_name)
+
+    def get_town(self, town_name: str) -> Optional[Dict]:
+        return self._index.towns.get(town_name)
+
+    def find_character(self, character_name: str, world_name: Optional[str] = None,
+                       kingdom_name: Optional[str] = None) -> Optional[CharacterLocation]:
+        """Find where a character lives, optionally within a given world and kingdom."""
+        index = self._index
+        if world_name is not None and kingdom_name is not None:
+            return index.characters_by_kingdom.get((world_name, kingdom_name, character_name))
+        if world_name is not None:
+            return index.characters_by_world.get((world_name, character_name))
+        return index.characters.get(character_name)
@@ -0,0 +1,83 @@
+# core/world_checkpoint.py
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+Node = Tuple[str, ...]
+
+
+def atomic_write_json(data: Any, path: str, **dump_kwargs) -> None:
+    """Write JSON to a temp file beside ``path`` and rename it into place."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class WorldCheckpoint:
+    """Append-only journal of generated world nodes, used to resume a run.
+
+    Each line records one finished node, e.g. ``('towns', world, kingdom)``,
+    and its generated data. Reopening the journal replays it, so a rerun
+    only generates the nodes that are still missing. A truncated last line
+    from an interrupted write is ignored.
+    """
+
+    def __init__(self, path: str = 'shared_data/game_world.checkpoint.jsonl'):
+        self.path = path
+        self._nodes: Dict[Node, Any] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                    self._nodes[tuple(entry['node'])] = entry['data']
+                except (ValueError, KeyError, TypeError):
+                    logging.warning(f"Skipping unreadable checkpoint entry {self.path}:{line_number}")
+        logging.info(f"Loaded {len(self._nodes)} checkpointed nodes from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def get(self, node: Node) -> Optional[Any]:
+        """Return a copy of a node's journaled data, or None if it was never completed."""
+        with self._lock:
+            data = self._nodes.get(node)
+        return copy.deepcopy(data) if data is not None else None
+
+    def record(self, node: Node, data: Any) -> None:
+        """Journal a completed node and flush it to disk before returning."""
+        line = json.dumps({'node': list(node), 'data': data}) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._nodes[node] = json.loads(line)['data']
+
+    def clear(self) -> None:
+        """Forget all nodes and delete the journal, e.g. after a successful run."""
+        with self._lock:
+            self._nodes.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv, find_dotenv
 import json
 from agents.world_builder import WorldBuilderAgent
+from core.world_checkpoint import WorldCheckpoint, atomic_write_json
 
 def load_env():
    _ = load_dotenv(find_dotenv())
@@ -11,10 +12,19 @@ def get_together_api_key():
    together_api_key = os.getenv("TOGETHER_API_KEY")
    return together_api_key
 
-def create_initial_worlds():
-   """Create multiple world structures."""
+def print_progress(stage, name):
+   print(f"  [{stage}] done: {name}")
+
+def create_initial_worlds(checkpoint=None):
+   """Create multiple world structures, resuming from a checkpoint if given."""
    api_key = get_together_api_key()
-   world_builder = WorldBuilderAgent(api_key)
+   call_timeout = os.getenv("WORLD_GEN_CALL_TIMEOUT")
+   world_builder = WorldBuilderAgent(
+       api_key,
+       max_workers=int(os.getenv("WORLD_GEN_MAX_WORKERS", 4)),
+       call_timeout=float(call_timeout) if call_timeout else None,
+       checkpoint=checkpoint
+   )
    
    world_concepts = {
        "Kyropeia": "cities built on massive beasts known as Colossi",
@@ -22,44 +32,50 @@ def create_initial_worlds():
        "Mechanica": "steam-powered clockwork cities marching across brass deserts"
    }
    
+   if checkpoint is not None and len(checkpoint):
+       print(f"Resuming from {checkpoint.path} ({len(checkpoint)} completed nodes)")
+
    try:
        worlds = {}
+       world_builder.reset_stats()
        for world_name, concept in world_concepts.items():
            print(f"\nGenerating world: {world_name}...")
-           world = world_builder.generate_world(concept)
+           world = world_builder.resume_or_generate_world(concept)
            
-           print("Generating kingdoms...")
-           kingdoms = world_builder.generate_kingdoms(world)
-           world['kingdoms'] = kingdoms
-
-           for kingdom_name, kingdom in kingdoms.items():
-               print(f"\nGenerating towns for {kingdom_name}...")
-               towns = world_builder.generate_towns(world, kingdom)
-               kingdom['towns'] = towns
+           print("Generating kingdoms, towns and NPCs...")
+           world_builder.populate_world(
+               world,
+               progress_callback=print_progress,
+               batched=os.getenv("WORLD_GEN_BATCHED", "").lower() in ("1", "true", "yes")
+           )
 
-               for town_name, town in towns.items():
-                   print(f"Generating NPCs for {town_name}...")
-                   npcs = world_builder.generate_npcs(world, kingdom, town)
-                   town['npcs'] = npcs
-                   
-                   # Create start message for first town in first kingdom only
-                   if not world.get('start'):
-                       first_npc = list(town['npcs'].values())[0]
-                       world['start'] = f"""Welcome to {world['name']}! You begin your journey in {town['name']}, {town['description']} Your guide is {first_npc['name']}, {first_npc['description']}"""
+           # Create start message for first town in first kingdom only
+           first_kingdom = list(world['kingdoms'].values())[0]
+           town = list(first_kingdom['towns'].values())[0]
+           first_npc = list(town['npcs'].values())[0]
+           world['start'] = f"""Welcome to {world['name']}! You begin your journey in {town['name']}, {town['description']} Your guide is {first_npc['name']}, {first_npc['description']}"""
 
            worlds[world_name] = world
 
+       world_builder.print_stats()
+       fallback_nodes = world_builder.get_stats()['fallback_nodes']
+       if checkpoint is not None and fallback_nodes and os.getenv("WORLD_GEN_ALLOW_FALLBACK", "").lower() not in ("1", "true", "yes"):
+           print(f"{fallback_nodes} nodes failed and got placeholder content. Rerun to regenerate only those, "
+                 f"or set WORLD_GEN_ALLOW_FALLBACK=1 to keep the placeholders.")
+           return None
        return worlds
 
    except Exception as e:
        print(f"Error creating worlds: {str(e)}")
+       if checkpoint is not None:
+           print(f"Completed parts are saved in {checkpoint.path}, rerun to resume")
        return None
 
 def save_world(world, filename):
    """Save world data to a JSON file."""
    try:
-       with open(filename, 'w') as f:
-           json.dump(world, f, indent=2)
+       # Readers never see a half-written file
+       atomic_write_json(world, filename, indent=2)
        print(f"World saved to {filename}")
        return True
    except Exception as e:
@@ -83,6 +99,7 @@ def main():
    os.makedirs('shared_data', exist_ok=True)
    
    world_file = 'shared_data/game_world.json'
+   checkpoint = WorldCheckpoint(os.getenv("WORLD_GEN_CHECKPOINT", 'shared_data/game_world.checkpoint.jsonl'))
    
    # Check if world file exists
    if os.path.exists(world_file):
@@ -90,13 +107,14 @@ def main():
        worlds = load_world(world_file)
        if not worlds:
            print("Error loading existing worlds. Creating new worlds...")
-           worlds = create_initial_worlds()
+           worlds = create_initial_worlds(checkpoint)
    else:
        print("Creating new worlds...")
-       worlds = create_initial_worlds()
+       worlds = create_initial_worlds(checkpoint)
    
    if worlds:
-       save_world(worlds, world_file)
+       if save_world(worlds, world_file):
+           checkpoint.clear()
        
        # Print worlds summary
        for world_name, world in worlds.items():
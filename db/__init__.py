@@ -1,5 +1,10 @@
 # db/__init__.py
 from .client import MongoDBClient
 from .models import CompletionImage
+from .pagination import encode_cursor, decode_cursor, keyset_page
+from .recent_completions import RecentCompletions
+from .game_states import MongoGameStateBackend
+from .image_jobs import MongoImageJobBackend
+from .indexes import ensure_indexes
 
-__all__ = ['MongoDBClient', 'CompletionImage']
\ No newline at end of file
+__all__ = ['MongoDBClient', 'CompletionImage', 'encode_cursor', 'decode_cursor', 'keyset_page', 'RecentCompletions', 'MongoGameStateBackend', 'MongoImageJobBackend', 'ensure_indexes']
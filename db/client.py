@@ -1,55 +1,182 @@
 # db/client.py
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, monitoring
 from datetime import datetime, timedelta
 import uuid
-from typing import Optional, Dict, List
+import logging
+from typing import Callable, Optional, Dict, List
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from .pagination import keyset_page
+from utils.metrics import mongodb_command_errors, mongodb_command_seconds
 
 load_dotenv()
 
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Counts connection checkouts and how long requests wait for one."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._started = threading.local()
+        self._lock = threading.Lock()
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+
+    def _waited(self) -> float:
+        started = getattr(self._started, 'at', None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def connection_check_out_failed(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            attempts = self.checkouts + self.checkout_failures
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checked_out': self.checked_out,
+                'open_connections': self.connections_created - self.connections_closed,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_avg': self.wait_seconds_total / attempts if attempts else 0.0,
+                'wait_seconds_max': self.wait_seconds_max
+            }
+
+class CommandTimer(monitoring.CommandListener):
+    """Records each command's round trip in the process metrics."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongodb_command_seconds.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongodb_command_seconds.observe(event.duration_micros / 1e6, event.command_name)
+        mongodb_command_errors.inc(event.command_name)
+
+pool_monitor = PoolMonitor()
+_client: Optional[MongoClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+def get_mongo_client() -> MongoClient:
+    """Return this process's shared MongoClient, creating it on first use.
+
+    A forked worker gets its own client instead of reusing the parent's
+    sockets. Pool size comes from MONGODB_MAX_POOL_SIZE / MONGODB_MIN_POOL_SIZE.
+    """
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            mongodb_uri = os.getenv('MONGODB_URI')
+            if os.environ.get('RAILWAY_ENVIRONMENT'):
+                # Use production MongoDB URI
+                if not mongodb_uri:
+                    raise ValueError("MONGODB_URI must be set in production")
+            else:
+                # Use local MongoDB if no URI provided
+                mongodb_uri = mongodb_uri or 'mongodb://localhost:27017'
+
+            _client = MongoClient(
+                mongodb_uri,
+                maxPoolSize=int(os.getenv('MONGODB_MAX_POOL_SIZE', 50)),
+                minPoolSize=int(os.getenv('MONGODB_MIN_POOL_SIZE', 0)),
+                maxIdleTimeMS=int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', 300000)),
+                waitQueueTimeoutMS=int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 10000)),
+                event_listeners=[pool_monitor, CommandTimer()]
+            )
+            _client_pid = os.getpid()
+    return _client
+
+# Called with each completion document after it is inserted by this process
+completion_listeners: List[Callable[[Dict], None]] = []
+
+def pool_stats() -> Dict:
+    """Connection pool checkout counts and wait times for this process."""
+    return pool_monitor.stats()
+
 class MongoDBClient:
     def __init__(self):
-        # Update the connection logic
-        mongodb_uri = os.getenv('MONGODB_URI')
-        if os.environ.get('RAILWAY_ENVIRONMENT'):
-            # Use production MongoDB URI
-            if not mongodb_uri:
-                raise ValueError("MONGODB_URI must be set in production")
-        else:
-            # Use local MongoDB if no URI provided
-            mongodb_uri = mongodb_uri or 'mongodb://localhost:27017'
-        
-        self.client = MongoClient(mongodb_uri)
+        # All instances share the process-wide connection pool
+        self.client = get_mongo_client()
         self.db = self.client['fantasy_game']
         self.completion_images = self.db['completion_images']
-        
-        # Create indexes during initialization
-        self._ensure_indexes()
     
-    def _ensure_indexes(self):
-        """Ensure required indexes exist"""
-        existing_indexes = self.completion_images.index_information()
-        
-        if "game_id_1" not in existing_indexes:
-            self.completion_images.create_index(
-                [("game_id", ASCENDING)], 
-                unique=True,
-                background=True
-            )
-            
-        if "created_at_1" not in existing_indexes:
-            self.completion_images.create_index(
-                [("created_at", ASCENDING)],
-                background=True
-            )
+    def ensure_indexes(self):
+        """Create required indexes; run once at startup, not per request"""
+        self.completion_images.create_index(
+            [("game_id", ASCENDING)], 
+            unique=True,
+            background=True
+        )
+        self.completion_images.create_index(
+            [("created_at", ASCENDING)],
+            background=True
+        )
+        # Serves the (created_at, _id) keyset pages of recent completions
+        self.completion_images.create_index(
+            [("created_at", DESCENDING), ("_id", DESCENDING)],
+            background=True
+        )
 
     def store_completion_image(self, 
                              image_url: str,
                              puzzle_text: str,
                              world_name: str,
-                             character_name: str) -> str:
+                             character_name: str,
+                             thumbnail_url: Optional[str] = None) -> str:
         """
         Store completion image data in MongoDB
         Returns: game_id (str)
@@ -62,10 +189,16 @@ class MongoDBClient:
             'puzzle_text': puzzle_text,
             'world_name': world_name,
             'character_name': character_name,
+            'thumbnail_url': thumbnail_url or image_url,
             'created_at': datetime.utcnow()
         }
         
         self.completion_images.insert_one(image_data)
+        for listener in completion_listeners:
+            try:
+                listener(image_data)
+            except Exception as e:
+                logging.error(f"Error in completion listener: {e}")
         return game_id
 
     def get_completion_image(self, game_id: str) -> Optional[Dict]:
@@ -80,6 +213,15 @@ class MongoDBClient:
             .limit(limit)
         )
 
+    def get_completions_page(self, cursor: Optional[str] = None, limit: int = 10) -> Dict:
+        """Get one page of completion images, newest first, with next/prev cursors"""
+        page = keyset_page(self.completion_images, {}, cursor, limit)
+        return {
+            'completions': page['items'],
+            'next': page['next'],
+            'prev': page['prev']
+        }
+
     def cleanup_old_images(self, days_old: int = 30) -> int:
         """Remove image records older than specified days"""
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
@@ -89,6 +231,5 @@ class MongoDBClient:
         return result.deleted_count
 
     def close(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
\ No newline at end of file
+        """Release this handle; the shared connection pool stays open"""
+        self.client = None
\ No newline at end of file
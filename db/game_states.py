@@ -0,0 +1,63 @@
+# db/game_states.py
+from datetime import datetime
+from typing import Optional, Tuple
+
+from pymongo import ASCENDING, ReturnDocument
+
+from .client import get_mongo_client
+
+
+class MongoGameStateBackend:
+    """Active games in MongoDB, so every worker can serve every game.
+
+    Each document holds the serialized game and a version number bumped on
+    every save. A worker that already has a copy gets the state back only
+    if the stored version is newer, so an unchanged game costs one small
+    round trip. Idle games are removed by a TTL index on ``updated_at``.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self.collection = get_mongo_client()['fantasy_game']['game_states']
+
+    def ensure_indexes(self):
+        """Create the TTL index; run once at startup, not per request"""
+        self.collection.create_index(
+            [("updated_at", ASCENDING)],
+            expireAfterSeconds=self.ttl_seconds,
+            background=True
+        )
+
+    def load(self, game_id: str, newer_than: Optional[int] = None) -> Optional[Tuple[Optional[str], int]]:
+        """Return ``(state_json, version)``, or None if the game does not exist.
+
+        ``state_json`` is None when the stored version is not newer than
+        ``newer_than``, so an unchanged game is not sent over the wire.
+        """
+        if newer_than is None:
+            doc = self.collection.find_one({'_id': game_id})
+        else:
+            doc = next(self.collection.aggregate([
+                {'$match': {'_id': game_id}},
+                {'$project': {
+                    'version': True,
+                    'state': {'$cond': [{'$gt': ['$version', newer_than]}, '$state', None]}
+                }}
+            ]), None)
+        if doc is None:
+            return None
+        return doc.get('state'), doc['version']
+
+    def save(self, game_id: str, state: str) -> int:
+        """Store a game and return its new version."""
+        doc = self.collection.find_one_and_update(
+            {'_id': game_id},
+            {'$set': {'state': state, 'updated_at': datetime.utcnow()}, '$inc': {'version': 1}},
+            projection={'version': True},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc['version']
+
+    def delete(self, game_id: str) -> None:
+        self.collection.delete_one({'_id': game_id})
@@ -0,0 +1,84 @@
+# db/image_jobs.py
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .client import get_mongo_client
+
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class MongoImageJobBackend:
+    """Image job status in MongoDB, so a poll that reaches another worker
+    than the one rendering still finds the job. Finished jobs are removed by
+    a TTL index on ``updated_at``.
+
+    ``claim()`` also deduplicates across workers: a unique index over
+    ``(kind, key)`` of unfinished jobs lets only one worker own a render.
+    A job not updated for ``stale_seconds`` (its worker died) stops
+    blocking new ones.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, stale_seconds: int = 600):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.collection = get_mongo_client()['fantasy_game']['image_jobs']
+
+    def ensure_indexes(self):
+        """Create the TTL index; run once at startup, not per request"""
+        self.collection.create_index(
+            [("updated_at", ASCENDING)],
+            expireAfterSeconds=self.ttl_seconds,
+            background=True
+        )
+        self.collection.create_index(
+            [("kind", ASCENDING), ("key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={'active': True},
+            background=True
+        )
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    def claim(self, job: Dict, key: Hashable) -> str:
+        """Record ``job`` unless the same ``(kind, key)`` is already pending or
+        running somewhere; return the id of the job that will do the work."""
+        key = self._key(key)
+        active = {'kind': job['kind'], 'key': key, 'active': True}
+        now = datetime.utcnow()
+        self.collection.update_one(
+            dict(active, updated_at={'$lt': now - timedelta(seconds=self.stale_seconds)}),
+            {'$set': {'active': False, 'status': 'failed', 'error': 'Abandoned', 'updated_at': now}}
+        )
+        fields = {name: value for name, value in job.items() if name not in ('id', 'kind')}
+        try:
+            doc = self.collection.find_one_and_update(
+                active,
+                {'$setOnInsert': dict(fields, _id=job['id'], updated_at=now)},
+                projection={'_id': True},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker inserted the same job between our match and insert
+            doc = self.collection.find_one(active, projection={'_id': True})
+        return doc['_id'] if doc is not None else job['id']
+
+    def save(self, job: Dict) -> None:
+        fields = {key: value for key, value in job.items() if key != 'id'}
+        fields['updated_at'] = datetime.utcnow()
+        fields['active'] = fields.get('status') in ACTIVE_STATUSES
+        self.collection.update_one({'_id': job['id']}, {'$set': fields}, upsert=True)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        doc = self.collection.find_one({'_id': job_id}, projection={'updated_at': False, 'key': False, 'active': False})
+        if doc is None:
+            return None
+        doc['id'] = doc.pop('_id')
+        return doc
@@ -0,0 +1,40 @@
+# db/indexes.py
+"""Index creation for every collection the app uses.
+
+Run once per deploy (scripts/ensure_indexes.py, or gunicorn's on_starting
+hook in gunicorn.conf.py), never per worker or per request.
+"""
+import os
+
+from pymongo import ASCENDING, DESCENDING
+
+from .client import MongoDBClient
+from .game_states import MongoGameStateBackend
+from .image_jobs import MongoImageJobBackend
+
+
+def ensure_user_indexes(db) -> None:
+    """Indexes for the collections behind auth.models.UserModel."""
+    db['users'].create_index([("google_id", ASCENDING)], unique=True)
+    db['users'].create_index([("email", ASCENDING)], unique=True)
+
+    # Gallery pages seek on (created_at, _id) within one user's victories
+    db['user_victories'].create_index([
+        ("user_id", ASCENDING),
+        ("created_at", DESCENDING),
+        ("_id", DESCENDING)
+    ])
+
+    db['user_completions'].create_index([
+        ("user_id", ASCENDING),
+        ("created_at", ASCENDING)
+    ])
+
+
+def ensure_indexes() -> None:
+    """Create the indexes for the completion image, user, game state and image job collections."""
+    client = MongoDBClient()
+    client.ensure_indexes()
+    ensure_user_indexes(client.db)
+    MongoGameStateBackend(ttl_seconds=int(os.getenv('GAME_STATE_TTL_SECONDS', 3600))).ensure_indexes()
+    MongoImageJobBackend(ttl_seconds=int(os.getenv('IMAGE_JOB_TTL_SECONDS', 3600))).ensure_indexes()
@@ -0,0 +1,79 @@
+# db/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+NEXT = 'next'
+PREV = 'prev'
+
+
+def encode_cursor(document: Dict, direction: str) -> str:
+    """Opaque token pointing just past ``document`` in the given direction."""
+    payload = {
+        'd': direction,
+        't': document['created_at'].isoformat(),
+        'i': str(document['_id'])
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Dict:
+    """Inverse of ``encode_cursor``. Raises ValueError for a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        direction = payload['d']
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        return {
+            'direction': direction,
+            'created_at': datetime.fromisoformat(payload['t']),
+            '_id': ObjectId(payload['i'])
+        }
+    except Exception as e:
+        raise ValueError(f"Invalid page cursor: {token!r}") from e
+
+
+def keyset_page(collection, query: Dict, cursor: Optional[str] = None, limit: int = 10) -> Dict:
+    """Return one page of ``collection`` ordered newest first by (created_at, _id).
+
+    Each page is a range scan that starts at the cursor's position, so it
+    costs the same no matter how deep into the results it is. Returns
+    ``items`` plus ``next``/``prev`` tokens; a token is None at either end.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    backward = position is not None and position['direction'] == PREV
+
+    if position is not None:
+        op = '$gt' if backward else '$lt'
+        query = {
+            '$and': [query, {'$or': [
+                {'created_at': {op: position['created_at']}},
+                {'created_at': position['created_at'], '_id': {op: position['_id']}}
+            ]}]
+        }
+
+    order = ASCENDING if backward else DESCENDING
+    items = list(
+        collection.find(query)
+        .sort([('created_at', order), ('_id', order)])
+        .limit(limit + 1)
+    )
+    has_more = len(items) > limit
+    items = items[:limit]
+    if backward:
+        items.reverse()
+
+    # Coming back from a later page means there is always a page after this one
+    more_after = backward or has_more
+    more_before = has_more if backward else position is not None
+    return {
+        'items': items,
+        'next': encode_cursor(items[-1], NEXT) if items and more_after else None,
+        'prev': encode_cursor(items[0], PREV) if items and more_before else None
+    }
@@ -0,0 +1,152 @@
+# db/recent_completions.py
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from pymongo.errors import PyMongoError
+
+from .client import MongoDBClient, completion_listeners
+from .pagination import encode_cursor, NEXT
+
+
+class RecentCompletions:
+    """The newest completion images, kept in memory for /recent-completions.
+
+    The buffer is filled from MongoDB by ``start()``, gets inserts made by
+    this process straight from ``store_completion_image``, and picks up other
+    workers' inserts from a change stream when the deployment supports one.
+    It also re-reads the newest rows every ``reconcile_seconds``, which
+    bounds how stale it can get and catches deletes. The response body is
+    serialized once per change rather than once per request.
+    """
+
+    def __init__(self, size: int = 10, reconcile_seconds: float = 30.0, use_change_stream: bool = True):
+        self.size = size
+        self.reconcile_seconds = reconcile_seconds
+        self.use_change_stream = use_change_stream
+        self.mode: Optional[str] = None
+        self.served = 0
+        self.reconciles = 0
+        self.stream_inserts = 0
+        self.last_sync: Optional[float] = None
+        self._items: deque = deque(maxlen=size)
+        self._payload: Optional[bytes] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        """Register for local inserts and start the background sync thread.
+
+        Safe to call more than once: the thread is started once per process.
+        Call it in each server worker after fork, not before; a thread
+        started in the parent does not survive the fork.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self.add not in completion_listeners:
+                completion_listeners.append(self.add)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._sync_loop, name='recent-completions', daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self) -> None:
+        while True:
+            try:
+                self.reconcile()
+                if self.use_change_stream and self._follow_change_stream():
+                    continue
+                self.mode = 'poll'
+            except Exception as e:
+                logging.warning(f"Recent completions sync failed: {e}")
+            time.sleep(self.reconcile_seconds)
+
+    def _follow_change_stream(self) -> bool:
+        """Apply inserts from a change stream, reconciling on schedule.
+
+        Returns False if the server cannot open change streams (a standalone
+        mongod), so the caller falls back to polling.
+        """
+        collection = MongoDBClient().completion_images
+        try:
+            stream = collection.watch([{'$match': {'operationType': 'insert'}}], max_await_time_ms=1000)
+        except PyMongoError as e:
+            logging.info(f"Change stream unavailable for recent completions, polling instead: {e}")
+            self.use_change_stream = False
+            return False
+
+        self.mode = 'change_stream'
+        with stream:
+            next_reconcile = time.monotonic() + self.reconcile_seconds
+            while stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    self.stream_inserts += 1
+                    self.add(change['fullDocument'])
+                if time.monotonic() >= next_reconcile:
+                    self.reconcile()
+                    next_reconcile = time.monotonic() + self.reconcile_seconds
+        return True
+
+    def reconcile(self) -> None:
+        """Replace the buffer with the newest rows in MongoDB."""
+        rows = MongoDBClient().get_recent_completions(limit=self.size)
+        with self._lock:
+            self._replace(rows)
+            self._loaded = True
+            self.reconciles += 1
+            self.last_sync = time.time()
+
+    def add(self, completion: Dict) -> None:
+        """Record a newly inserted completion document."""
+        with self._lock:
+            if any(item['game_id'] == completion['game_id'] for item in self._items):
+                return
+            self._replace(list(self._items) + [completion])
+
+    def _replace(self, rows: Iterable[Dict]) -> None:
+        rows = sorted(rows, key=lambda row: (row['created_at'], row['_id']), reverse=True)
+        self._items = deque(rows[:self.size], maxlen=self.size)
+        self._payload = None
+
+    def payload(self) -> Optional[bytes]:
+        """The serialized first page of /recent-completions, or None until loaded."""
+        with self._lock:
+            if not self._loaded:
+                return None
+            if self._payload is None:
+                items = list(self._items)
+                completions = [
+                    {'thumbnail_url': item.get('image_url'), **item,
+                     '_id': str(item['_id']), 'created_at': item['created_at'].isoformat()}
+                    for item in items
+                ]
+                self._payload = json.dumps({
+                    'success': True,
+                    'completions': completions,
+                    'next': encode_cursor(items[-1], NEXT) if len(items) == self.size else None,
+                    'prev': None
+                }).encode('utf-8')
+            self.served += 1
+            return self._payload
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': len(self._items),
+                'capacity': self.size,
+                'loaded': self._loaded,
+                'mode': self.mode,
+                'served': self.served,
+                'reconciles': self.reconciles,
+                'stream_inserts': self.stream_inserts,
+                'seconds_since_sync': time.time() - self.last_sync if self.last_sync else None
+            }
@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+# Settings for `gunicorn main:app`; gunicorn also picks this file up from
+# the working directory when -c is not given.
+import os
+
+# Threaded workers: a slow request (an LLM call, an image job stream) holds
+# one thread rather than the whole worker, and the worker keeps answering
+# the arbiter's heartbeat, so it is not killed at the timeout
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+
+def on_starting(server):
+    # Once per server start, in the arbiter, rather than in every worker;
+    # scripts/ensure_indexes.py does the same as a release step
+    if os.getenv('MONGODB_ENSURE_INDEXES', 'true').lower() in ('1', 'true', 'yes'):
+        from db.indexes import ensure_indexes
+        try:
+            ensure_indexes()
+            server.log.info("MongoDB indexes ensured")
+        except Exception as e:
+            server.log.warning(f"Could not ensure MongoDB indexes: {e}")
+
+
+def post_worker_init(worker):
+    # Runs in each worker after fork, once the app module is imported
+    import main
+    main.start_worker_tasks()
@@ -1,26 +1,46 @@
 import os
 import logging
 import re
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, Response
+from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, Response, session, send_file, g
 from dotenv import load_dotenv
 from agents.world_builder import WorldBuilderAgent
 from agents.game_master import GameMasterAgent
 from core.game_state import GameState
+from core.session_store import GameStateStore
+from core.world_catalog import WorldCatalog
+from core.puzzle_catalog import PuzzleCatalog
+from core.inventory_catalog import InventoryCatalog
+from core.narration_cache import NarrationCache, MemoryNarrationBackend, SqliteNarrationBackend
+from core.image_jobs import ImageJobQueue
+from core.image_store import ImageStore
+from core.establishing_shots import EstablishingShotCache
+from core.image_proxy import ImageProxyCache, DEFAULT_ALLOWED_HOSTS
 import json
+import hmac
 from datetime import datetime
+from urllib.parse import urlsplit
 import random
 from typing import List, Dict
-from db.client import MongoDBClient
-import requests
-from auth.routes import auth
+from db.client import MongoDBClient, pool_stats
+from db.recent_completions import RecentCompletions
+from db.game_states import MongoGameStateBackend
+from db.image_jobs import MongoImageJobBackend
+from db.indexes import ensure_indexes
+import threading
+import time
+import uuid
+from auth.routes import auth, placeholder_cache
+from utils.logging_utils import configure_logging, debug_event, sample_request
+from utils import metrics
 from datetime import datetime, timedelta
 
 
-# Set up logging
-logging.basicConfig(
+# Set up logging; records are written to disk on a background thread
+configure_logging(
     filename=f'game_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    debug_sample_rate=float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0)),
+    use_queue=os.getenv('LOG_QUEUE', 'true').lower() in ('1', 'true', 'yes')
 )
 
 app = Flask(__name__, 
@@ -41,6 +61,51 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 load_dotenv()
 
 app.register_blueprint(auth)
+app.before_request(sample_request)
+
+# Request, LLM, image and MongoDB timings, served at /metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# When set, scrapers must send "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        # The route template keeps the label set small; /image-jobs/<job_id> is one series
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_seconds.observe(time.perf_counter() - started, request.method, route,
+                                             str(response.status_code))
+    return response
+
+if METRICS_ENABLED:
+    app.before_request(start_request_timer)
+    app.after_request(record_request_metrics)
+
+# Parsed worlds shared by every request; filled by initialize_worlds()
+world_catalog = WorldCatalog('shared_data/game_world.json')
+WORLD_INFO_CACHE_CONTROL = os.getenv('WORLD_INFO_CACHE_CONTROL', 'public, max-age=300')
+puzzle_catalog = PuzzleCatalog('shared_data/puzzle_data.json')
+inventory_catalog = InventoryCatalog('shared_data/inventory.json')
+# Generated images, served from /image-store/<sha256>.<ext>
+image_store = ImageStore(
+    os.getenv('IMAGE_STORE_DIR', 'shared_data/image_store'),
+    variant_workers=int(os.getenv('IMAGE_VARIANT_WORKERS', 2))
+)
+# Hosts /proxy-image may fetch from: the DALL-E blob store by default, plus
+# the image API's own host when OPENAI_BASE_URL points somewhere else
+image_proxy_hosts = [host.strip() for host in os.getenv('IMAGE_PROXY_ALLOWED_HOSTS', ','.join(DEFAULT_ALLOWED_HOSTS)).split(',') if host.strip()]
+if os.getenv('OPENAI_BASE_URL'):
+    image_proxy_hosts.append(urlsplit(os.getenv('OPENAI_BASE_URL')).hostname or '')
+image_proxy = ImageProxyCache(
+    os.getenv('IMAGE_PROXY_CACHE_DIR', 'shared_data/image_proxy_cache'),
+    max_bytes=int(os.getenv('IMAGE_PROXY_CACHE_MAX_BYTES', 512 * 1024 * 1024)),
+    read_timeout=float(os.getenv('IMAGE_PROXY_TIMEOUT', 30)),
+    allowed_hosts=image_proxy_hosts
+)
+IMAGE_PROXY_CACHE_CONTROL = os.getenv('IMAGE_PROXY_CACHE_CONTROL', 'public, max-age=86400')
 
 def save_world(world, filename):
     """Save world data to a JSON file."""
@@ -85,20 +150,15 @@ def display_worlds_info(worlds):
 
 def initialize_worlds():
     """Initialize or load the game worlds."""
-    world_file = 'shared_data/game_world.json'
+    world_file = world_catalog.path
     os.makedirs('shared_data', exist_ok=True)
 
     # First try to load existing worlds
     if os.path.exists(world_file):
         logging.info("Loading existing worlds...")
-        try:
-            with open(world_file, 'r') as f:
-                worlds_data = json.load(f)
-                if 'worlds' in worlds_data:  # Check if it has the correct structure
-                    logging.info("Successfully loaded existing worlds")
-                    return worlds_data['worlds']
-        except Exception as e:
-            logging.error(f"Error loading worlds: {e}")
+        if world_catalog.reload():
+            logging.info("Successfully loaded existing worlds")
+            return world_catalog.worlds
 
     # Only generate new worlds if loading fails
     logging.info("Creating new worlds...")
@@ -116,33 +176,24 @@ def initialize_worlds():
         # Save the newly generated worlds
         with open(world_file, 'w') as f:
             json.dump({'worlds': worlds}, f, indent=2)
-            
+
+        world_catalog.reload()
         return worlds
     except Exception as e:
         logging.error(f"Error creating worlds: {e}")
         raise
 
-def load_character_inventory(character_name):
-    try:
-        with open('shared_data/inventory.json', 'r') as f:
-            data = json.load(f)
-            inventory = {}
-            char_items = data['inventories'].get(character_name, [])
-            
-            for item in char_items:
-                if item.endswith('gold'):
-                    inventory['gold'] = int(item.split()[0])
-                else:
-                    inventory[item] = 1
-            return inventory
-    except Exception as e:
-        logging.error(f"Error loading character inventory: {e}")
+def load_character_inventory(character_name, world_name=None):
+    """Return a fresh starting inventory, including the world's location items."""
+    if not inventory_catalog.version:
+        logging.error("Error loading character inventory: inventory data not loaded")
         return {"gold": 10}
+    return inventory_catalog.starting_inventory(character_name, world_name)
 
 def parse_inventory_changes(response_text: str, current_inventory: dict) -> dict:
     """Parse the response text for inventory changes and update the inventory."""
     new_inventory = current_inventory.copy()
-    logging.info(f"Parsing inventory changes from response: {response_text[:100]}...")
+    debug_event('parse_inventory_changes', response=response_text[:100])
     
     if "inventory now" in response_text.lower():
         try:
@@ -153,7 +204,7 @@ def parse_inventory_changes(response_text: str, current_inventory: dict) -> dict
                 parsed_inventory = eval(inventory_str)
                 if isinstance(parsed_inventory, dict):
                     new_inventory = parsed_inventory
-                    logging.info(f"Updated inventory: {new_inventory}")
+                    debug_event('inventory_parsed', inventory=dict(new_inventory))
         except Exception as e:
             logging.error(f"Failed to parse inventory: {e}")
 
@@ -204,6 +255,30 @@ def generate_examples(self, context: str, location: Dict, game_state: GameState)
     return list(examples)[:4]
 
 
+def create_narration_cache():
+    """Build the Game Master narration cache from NARRATION_CACHE_* settings."""
+    backend_name = os.getenv('NARRATION_CACHE_BACKEND', 'memory').lower()
+    ttl_seconds = int(os.getenv('NARRATION_CACHE_TTL_SECONDS', 86400))
+    max_entries = int(os.getenv('NARRATION_CACHE_MAX_ENTRIES', 10000))
+
+    if backend_name == 'off':
+        return None
+    if backend_name == 'sqlite':
+        backend = SqliteNarrationBackend(
+            path=os.getenv('NARRATION_CACHE_PATH', 'shared_data/narration_cache.sqlite3'),
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+    else:
+        backend = MemoryNarrationBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    return NarrationCache(
+        backend=backend,
+        max_variants=int(os.getenv('NARRATION_CACHE_VARIANTS', 3)),
+        variation_rate=float(os.getenv('NARRATION_CACHE_VARIATION_RATE', 0.2))
+    )
+
+
 # Initialize worlds and agents
 try:
     print("Initializing game worlds...")
@@ -213,16 +288,65 @@ try:
     else:
         logging.error("Failed to load or generate worlds")
         raise ValueError("No worlds available")
+
+    if not puzzle_catalog.reload():
+        logging.warning("Puzzle data unavailable, games will start without puzzles")
+    inventory_catalog.reload()
     
     logging.info("Initializing game agents...")
     api_key = os.getenv('TOGETHER_API_KEY')
     openai_api_key = os.getenv('OPENAI_API_KEY') 
     game_master = GameMasterAgent(
         api_key,
-        openai_api_key=openai_api_key)
+        openai_api_key=openai_api_key,
+        narration_cache=create_narration_cache(),
+        shot_cache=EstablishingShotCache(image_store)
+            if os.getenv('ESTABLISHING_SHOT_CACHE', 'true').lower() in ('1', 'true', 'yes') else None,
+        image_store=image_store)
     
-    # Initialize game state
-    game_state = None  # Will be initialized when character is selected
+    # Active games, keyed by the game id handed out by /start-game. MongoDB
+    # holds the shared copy so any worker can serve any game; with
+    # GAME_STATE_BACKEND=memory games stay in the worker that started them,
+    # which needs a single worker or sticky routing
+    game_state_ttl = int(os.getenv('GAME_STATE_TTL_SECONDS', 3600))
+    game_states = GameStateStore(
+        max_sessions=int(os.getenv('GAME_STATE_MAX_SESSIONS', 5000)),
+        ttl_seconds=game_state_ttl,
+        max_bytes=int(os.getenv('GAME_STATE_MAX_BYTES', 256 * 1024 * 1024)),
+        backend=MongoGameStateBackend(ttl_seconds=game_state_ttl)
+            if os.getenv('GAME_STATE_BACKEND', 'mongo').lower() == 'mongo' else None,
+        world_loader=world_catalog.get_world
+    )
+
+    metrics.registry.register_cache('game_states', game_states.stats)
+    metrics.registry.register_cache('image_proxy', image_proxy.stats)
+    metrics.registry.register_cache('placeholders', placeholder_cache.stats)
+    metrics.registry.register_gauges('mongodb_pool', 'MongoDB connection pool of this process', pool_stats)
+    if game_master.narration_cache:
+        metrics.registry.register_cache('narration', game_master.narration_cache.stats)
+    if game_master.shot_cache:
+        metrics.registry.register_cache('establishing_shots', game_master.shot_cache.stats)
+
+    # First page of /recent-completions, served from memory
+    recent_completions = None
+    if os.getenv('RECENT_COMPLETIONS_BUFFER', 'true').lower() in ('1', 'true', 'yes'):
+        recent_completions = RecentCompletions(
+            size=int(os.getenv('RECENT_COMPLETIONS_SIZE', 10)),
+            reconcile_seconds=float(os.getenv('RECENT_COMPLETIONS_RECONCILE_SECONDS', 30)),
+            use_change_stream=os.getenv('RECENT_COMPLETIONS_CHANGE_STREAM', 'true').lower() in ('1', 'true', 'yes')
+        )
+        metrics.registry.register_gauges('recent_completions', 'In-memory first page of /recent-completions',
+                                         recent_completions.stats)
+
+    # DALL-E renders run here so requests return without waiting on them;
+    # job status goes to MongoDB so a poll can land on any worker
+    image_job_ttl = int(os.getenv('IMAGE_JOB_TTL_SECONDS', 3600))
+    image_jobs = ImageJobQueue(
+        max_workers=int(os.getenv('IMAGE_JOB_WORKERS', 4)),
+        result_ttl_seconds=image_job_ttl,
+        backend=MongoImageJobBackend(ttl_seconds=image_job_ttl)
+            if os.getenv('IMAGE_JOB_BACKEND', 'mongo').lower() == 'mongo' else None
+    )
     
 except Exception as e:
     logging.critical(f"Critical error during initialization: {str(e)}")
@@ -251,7 +375,19 @@ def extract_keywords(text):
     
     return keywords
 
-def process_regular_action(action):
+def get_game_id():
+    """Return the game id sent with the request, falling back to the session."""
+    data = request.get_json(silent=True) or {}
+    return data.get('game_id') or session.get('game_id')
+
+def get_game_state():
+    """Return the active game for this request, or None if it expired."""
+    return game_states.get(get_game_id())
+
+def no_active_game():
+    return jsonify({'error': 'No active game found. Please start a new game.'}), 404
+
+def process_regular_action(action, game_state):
     # Existing action processing logic
     response = game_master.process_action(action, game_state)
     return jsonify({
@@ -272,12 +408,23 @@ def home():
 
 @app.route('/world-info')
 def world_info():
-    world_file = 'shared_data/game_world.json'
     try:
-        with open(world_file, 'r') as f:
-            worlds = json.load(f)
-            # print("Serving worlds data:", worlds)  # Debug log
-            return jsonify(worlds)
+        # Serve bytes prepared at load time; clients revalidate with the ETag
+        payload = world_catalog.payload
+        use_gzip = 'gzip' in request.accept_encodings
+        etag = payload.gzip_etag if use_gzip else payload.etag
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(payload.gzip_body if use_gzip else payload.body, mimetype='application/json')
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = WORLD_INFO_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
     except Exception as e:
         logging.error(f"Error loading worlds: {e}")
         return jsonify({'error': str(e)}), 500
@@ -291,59 +438,31 @@ def start_game():
         world_name = data.get('world')
         kingdom_name = data.get('kingdom')
         
-        # Load character inventory
-        character_inventory = load_character_inventory(character_name)
+        # Load character inventory, including the world's location items
+        character_inventory = load_character_inventory(character_name, world_name)
         
-        # Load puzzle data
-        puzzle_data = None
-        try:
-            with open('shared_data/puzzle_data.json', 'r') as f:
-                world_puzzles = json.load(f)['world_puzzles']
-
-                logging.info(f"Attempting to initialize puzzle for world: {world_name}")
-                logging.info(f"Attempting to initialize puzzle for character: {character_name}")
-                logging.info(f"Available worlds in puzzle data: {list(world_puzzles.keys())}")
-                if world_name in world_puzzles:
-                    logging.info(f"Available characters in {world_name}: {list(world_puzzles[world_name]['characters'].keys())}")
-
-                if world_name in world_puzzles and character_name in world_puzzles[world_name]['characters']:
-                    puzzle_data = world_puzzles[world_name]['characters'][character_name]
-        except Exception as e:
-            logging.error(f"Error loading puzzle data: {e}")
+        logging.info(f"Attempting to initialize puzzle for {character_name} in {world_name}")
+        has_puzzle = puzzle_catalog.has_puzzle(world_name, character_name)
         
         # Find world data
-        world = None
-        with open('shared_data/game_world.json', 'r') as f:
-            worlds_data = json.load(f)
-            world = worlds_data['worlds'].get(world_name)
+        world = world_catalog.get_world(world_name)
         
         if not world:
             raise ValueError(f"World {world_name} not found")
             
-        # Find character's town or select random town
-        kingdom = world['kingdoms'].get(kingdom_name)
+        kingdom = world.get('kingdoms', {}).get(kingdom_name)
         if not kingdom:
             raise ValueError(f"Kingdom {kingdom_name} not found")
             
-        character_town = None
-        character_data = None
-        
-        # Search for character in towns
-        for town in kingdom['towns'].values():
-            if character_name in town['npcs']:
-                character_town = town
-                character_data = town['npcs'][character_name]
-                break
-                
-        if not character_town:
-            # Fallback to random town if character's town not found
-            character_town = random.choice(list(kingdom['towns'].values()))
-            
-        if not character_data:
+        # Find character's town
+        character_location = world_catalog.find_character(character_name, world_name, kingdom_name)
+        if not character_location:
             raise ValueError(f"Character {character_name} not found")
+
+        character_town = character_location.town
+        character_data = character_location.npc
         
         # Initialize game state
-        global game_state
         game_state = GameState(
             world=world,
             current_location=character_town,
@@ -356,8 +475,8 @@ def start_game():
         )
         
         # Initialize puzzle if data exists
-        if puzzle_data:
-            success = game_state.initialize_puzzle(character_name, worlds_data)
+        if has_puzzle:
+            success = game_state.initialize_puzzle(character_name, world_catalog.data, puzzle_catalog)
             if success:
                 logging.info(f"Initialized puzzle for {character_name}")
                 print(f"Initialized puzzle progress: {game_state.puzzle_progress}")
@@ -373,35 +492,24 @@ def start_game():
         if game_state.puzzle_progress:
             welcome_message += f"\n\nYour Quest: {game_state.puzzle_progress.main_puzzle}"
         
-        # Generate initial story image
+        # Serve a pregenerated image if there is one; otherwise render it in
+        # the background and let the client poll /image-jobs/<id>
+        initial_image = game_master.cached_story_image(character_name, character_town, world)
+        image_job_id = None
         try:
-            initial_image = game_master.generate_initial_story_image(
-                character=character_name,
-                location=character_town,
-                world=world
-            )
+            if not initial_image:
+                image_job_id = image_jobs.submit(
+                    'establishing_shot',
+                    (world['name'], character_town['name'], character_name),
+                    game_master.generate_initial_story_image,
+                    character=character_name,
+                    location=character_town,
+                    world=world
+                )
         except Exception as e:
             logging.error(f"Image generation error: {e}")
-            initial_image = None
-            
-        # Prepare location-specific items based on world
-        location_items = []
-        if "Ignisia" in world_name:
-            location_items = ["Fire-resistant cloak", "Magma compass"]
-        elif "Aquaria" in world_name:
-            location_items = ["Water breathing charm", "Pearl compass"]
-        elif "Mechanica" in world_name:
-            location_items = ["Clockwork assistant", "Steam-powered toolkit"]
-        elif "Terranova" in world_name:
-            location_items = ["Nature's blessing stone", "Living compass"]
-        elif "Etheria" in world_name:
-            location_items = ["Ethereal crystal", "Void compass"]
+            image_job_id = None
             
-        # Add location items to inventory if any
-        if location_items:
-            for item in location_items:
-                character_inventory[item] = character_inventory.get(item, 0) + 1
-        
         # Create response
         response = {
             'location': {
@@ -422,9 +530,16 @@ def start_game():
             'puzzle_progress': game_state.puzzle_progress.dict() if game_state.puzzle_progress else None
         }
         
-        # Add initial image if generation was successful
         if initial_image:
             response['initial_image'] = initial_image
+        elif image_job_id:
+            response['image_job'] = image_job_payload(image_job_id)
+
+        # Register the game so later requests can find it
+        game_id = str(uuid.uuid4())
+        game_states.put(game_id, game_state)
+        session['game_id'] = game_id
+        response['game_id'] = game_id
             
         # Log successful game start
         logging.info(f"Game started for character {character_name} in {world_name}")
@@ -446,171 +561,293 @@ def start_game():
 def load_inventory():
     try:
         character_name = request.json['character']
-        inventory = load_character_inventory(character_name)
+        inventory = load_character_inventory(character_name, request.json.get('world'))
         return jsonify({'inventory': inventory})
     except Exception as e:
         logging.error(f"Error loading inventory: {e}")
         return jsonify({'error': str(e)}), 500
     
+def resolve_puzzle_action(action, game_state):
+    """Complete a puzzle task if the action describes one.
+
+    Returns ``(response, puzzle_progress, puzzle_solved)``; ``response`` is
+    None when the action should go to the Game Master instead.
+    """
+    response = None
+    puzzle_progress = None
+    puzzle_solved = False
+    
+    # Check for puzzle completion
+    if hasattr(game_state, 'puzzle_progress') and game_state.puzzle_progress:
+        matching_task = game_state.puzzle_progress.match_task(action)
+        
+        if matching_task:
+            reward = game_state.attempt_task(matching_task.task_id)
+            if reward:
+                response = f"Task completed: {matching_task.description}. Received: {reward}"
+                puzzle_progress = game_state.puzzle_progress.dict()
+                puzzle_solved = game_state.puzzle_progress.is_puzzle_solved()
+                
+                if puzzle_solved:
+                    # Only add completion message first
+                    response += "\n\nCongratulations! You have solved the puzzle and saved the realm!"
+
+    return response, puzzle_progress, puzzle_solved
+
+def build_action_response(game_id, game_state, response, puzzle_progress, puzzle_solved):
+    """Store the updated game and build the /action JSON payload."""
+    # Create base response data
+    response_data = {
+        'response': response,
+        'inventory': game_state.inventory,
+        'location': game_state.current_location['name'],
+        'puzzle_progress': puzzle_progress,
+        'puzzle_solved': puzzle_solved,
+        'available_tasks': [
+            {
+                'id': task.task_id,
+                'title': task.title,
+                'description': task.description
+            }
+            for task in game_state.puzzle_progress.get_available_tasks(game_state.inventory)
+        ] if hasattr(game_state, 'puzzle_progress') and game_state.puzzle_progress else []
+    }
+    
+    # Refresh the stored game so its size estimate tracks the history
+    game_states.put(game_id, game_state)
+
+    # Add completion context if puzzle is solved
+    if puzzle_solved:
+        response_data['character'] = {
+            'name': game_state.character['name'],
+            'description': game_state.character['description']
+        }
+        response_data['world'] = {
+            'name': game_state.world['name'],
+            'description': game_state.world['description']
+        }
+
+    return response_data
+
 @app.route('/action', methods=['POST'])
 def process_action():
     action = request.json['action']
-    logging.info(f"Processing action: {action}")
+    logging.info("Processing action: %s", action)
+
+    game_state = get_game_state()
+    if game_state is None:
+        return no_active_game()
     
     try:
-        response = None
-        puzzle_progress = None
-        puzzle_solved = False
-        completion_image = None
-        
-        # Check for puzzle completion
-        if hasattr(game_state, 'puzzle_progress') and game_state.puzzle_progress:
-            available_tasks = game_state.puzzle_progress.get_available_tasks(game_state.inventory)
-            matching_task = None
-            
-            # Match action with available tasks
-            for task in available_tasks:
-                task_keywords = set(task.description.lower().split())
-                action_keywords = set(action.lower().split())
-                if len(task_keywords.intersection(action_keywords)) >= 2:
-                    matching_task = task
-                    break
-            
-            if matching_task:
-                reward = game_state.attempt_task(matching_task.task_id)
-                if reward:
-                    response = f"Task completed: {matching_task.description}. Received: {reward}"
-                    puzzle_progress = game_state.puzzle_progress.dict()
-                    puzzle_solved = game_state.puzzle_progress.is_puzzle_solved()
-                    
-                    if puzzle_solved:
-                        # Only add completion message first
-                        response += "\n\nCongratulations! You have solved the puzzle and saved the realm!"
+        response, puzzle_progress, puzzle_solved = resolve_puzzle_action(action, game_state)
                     
         # Regular game action processing if no task completed
         if not response:
-            response = game_master.process_action(action, game_state)
+            use_cache = not request.json.get('bypass_cache', False)
+            response = game_master.process_action(action, game_state, use_cache)
             
-        # Create base response data
-        response_data = {
-            'response': response,
-            'inventory': game_state.inventory,
-            'location': game_state.current_location['name'],
-            'puzzle_progress': puzzle_progress,
-            'puzzle_solved': puzzle_solved,
-            'available_tasks': [
-                {
-                    'id': task.task_id,
-                    'title': task.title,
-                    'description': task.description
-                }
-                for task in game_state.puzzle_progress.get_available_tasks(game_state.inventory)
-            ] if hasattr(game_state, 'puzzle_progress') and game_state.puzzle_progress else []
-        }
-        
-        # Add completion context if puzzle is solved
-        if puzzle_solved:
-            response_data['character'] = {
-                'name': game_state.character['name'],
-                'description': game_state.character['description']
-            }
-            response_data['world'] = {
-                'name': game_state.world['name'],
-                'description': game_state.world['description']
-            }
-            
-        return jsonify(response_data)
+        return jsonify(build_action_response(get_game_id(), game_state, response, puzzle_progress, puzzle_solved))
         
     except Exception as e:
         error_msg = f"Error processing action: {str(e)}"
         logging.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+# The events stream holds a connection for the whole render, so it is only
+# offered when the server runs threaded or async workers
+IMAGE_JOB_EVENTS = os.getenv('IMAGE_JOB_EVENTS', 'false').lower() in ('1', 'true', 'yes')
+IMAGE_JOB_EVENTS_TIMEOUT = int(os.getenv('IMAGE_JOB_EVENTS_TIMEOUT', 300))
+
+def image_job_payload(job_id):
+    """A job's state for the client, with ``events_url`` when streaming is enabled."""
+    job = image_jobs.get(job_id)
+    if job is not None and IMAGE_JOB_EVENTS:
+        job = dict(job, events_url=f"/image-jobs/{job_id}/events")
+    return job
+
+@app.route('/action/stream', methods=['POST'])
+def stream_action():
+    """Streaming /action: 'token' events with narrative text, then a 'done'
+    event carrying the same payload /action returns."""
+    action = request.json['action']
+    use_cache = not request.json.get('bypass_cache', False)
+    logging.info("Processing streamed action: %s", action)
+
+    game_id = get_game_id()
+    game_state = game_states.get(game_id)
+    if game_state is None:
+        return no_active_game()
+
+    def generate():
+        try:
+            response, puzzle_progress, puzzle_solved = resolve_puzzle_action(action, game_state)
+            if response:
+                yield sse_event('token', {'text': response})
+            else:
+                chunks = []
+                for text in game_master.stream_action(action, game_state, use_cache):
+                    chunks.append(text)
+                    yield sse_event('token', {'text': text})
+                response = ''.join(chunks)
+
+            yield sse_event('done', build_action_response(game_id, game_state, response, puzzle_progress, puzzle_solved))
+
+        except Exception as e:
+            error_msg = f"Error processing action: {str(e)}"
+            logging.error(error_msg)
+            yield sse_event('error', {'error': error_msg})
+
+    return Response(generate(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/generate-completion', methods=['POST'])
 def generate_completion():
+    game_state = get_game_state()
+    if game_state is None:
+        return no_active_game()
+
     try:
-        completion_image = game_master.generate_completion_image(game_state)
-        if completion_image:
-            return jsonify({
-                'completion_image': completion_image,
-                'success': True
-            })
-        return jsonify({'success': False}), 404
+        # Repeated requests for the same game share one pending render
+        job_id = image_jobs.submit('completion_shot', get_game_id(), game_master.generate_completion_image, game_state)
+        return jsonify({'success': True, 'job_id': job_id, 'job': image_job_payload(job_id)}), 202
     except Exception as e:
         logging.error(f"Error generating completion image: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/image-store/<name>')
+def serve_stored_image(name):
+    # Names are content hashes, so a file never changes once written
+    response = send_from_directory(image_store.root, name, max_age=365 * 24 * 3600)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.route('/image-jobs/<job_id>', methods=['GET'])
+def get_image_job(job_id):
+    job = image_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Image job not found'}), 404
+    return jsonify(job)
+
+@app.route('/image-jobs/<job_id>/events', methods=['GET'])
+def image_job_events(job_id):
+    """Server-Sent Events: a 'done' or 'error' event once the image job finishes."""
+    if not IMAGE_JOB_EVENTS:
+        return jsonify({'error': 'Image job events are disabled; poll /image-jobs/<id>'}), 404
+    if image_jobs.get(job_id) is None:
+        return jsonify({'error': 'Image job not found'}), 404
+
+    def generate():
+        deadline = time.monotonic() + IMAGE_JOB_EVENTS_TIMEOUT
+        while True:
+            job = image_jobs.wait(job_id, timeout=15)
+            if job is None or job['status'] in ('done', 'failed'):
+                break
+            if time.monotonic() >= deadline:
+                yield sse_event('timeout', job)
+                return
+            # Keep proxies from closing an idle connection
+            yield ': keep-alive\n\n'
+        if job is None:
+            yield sse_event('error', {'error': 'Image job expired'})
+        else:
+            yield sse_event('done' if job['status'] == 'done' else 'error', job)
+
+    return Response(generate(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/recent-completions', methods=['GET'])
 def get_recent_completions():
     try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        if recent_completions is not None and 'cursor' not in request.args and limit == recent_completions.size:
+            # Normally started by start_worker_tasks; this covers servers that do not call it
+            recent_completions.start()
+            payload = recent_completions.payload()
+            if payload is not None:
+                return Response(payload, mimetype='application/json')
+
         mongo_client = MongoDBClient()
-        recent_completions = mongo_client.get_recent_completions(limit=10)
+        page = mongo_client.get_completions_page(request.args.get('cursor'), limit)
+        completions = page['completions']
         
         # Convert ObjectId to string for JSON serialization
-        for completion in recent_completions:
+        for completion in completions:
             completion['_id'] = str(completion['_id'])
             completion['created_at'] = completion['created_at'].isoformat()
+            completion.setdefault('thumbnail_url', completion.get('image_url'))
             
         return jsonify({
             'success': True,
-            'completions': recent_completions
+            'completions': completions,
+            'next': page['next'],
+            'prev': page['prev']
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logging.error(f"Error fetching recent completions: {e}")
         return jsonify({'error': str(e)}), 500
     
+def suggest_actions(context: str, game_state) -> List[str]:
+    """Pick up to four example actions from the puzzle state and recent narration."""
+    examples = set()
+    available_tasks = []
+    
+    # Get available puzzle tasks
+    if hasattr(game_state, 'puzzle_progress') and game_state.puzzle_progress:
+        available_tasks = game_state.puzzle_progress.get_available_tasks(game_state.inventory)
+        
+        # Add simplified versions of available tasks
+        for task in available_tasks:
+            # Extract key action from task
+            task_words = task.description.lower().split()
+            key_verbs = {'use', 'activate', 'defend', 'lead', 'coordinate', 'establish', 'rally', 'create'}
+            
+            for verb in key_verbs:
+                if verb in task_words:
+                    # Create simplified action based on verb and required item
+                    if task.required_item != 'All items':
+                        action = f"{verb.title()} {task.required_item}"
+                        examples.add(action)
+                        break
+        
+        # Add inventory-based suggestions
+        for item in game_state.inventory:
+            if any(task.required_item == item for task in available_tasks):
+                examples.add(f"Use {item}")
+    
+    # Add contextual actions
+    keywords = extract_keywords(context)
+    if keywords['npcs']:
+        examples.add(f"Talk to {random.choice(keywords['npcs'])}")
+    
+    if keywords['locations']:
+        examples.add(f"Explore {random.choice(keywords['locations'])}")
+        
+    # Always include some general actions
+    general_actions = ["Look around", "Check inventory", "View current tasks"]
+    examples.add(random.choice(general_actions))
+    
+    # Convert to list and limit size
+    example_list = list(examples)[:4]
+    
+    # If we have active tasks but no task-related examples, add one
+    if available_tasks and not any('use' in ex.lower() for ex in example_list):
+        task = random.choice(available_tasks)
+        hint = f"Try using {task.required_item}"
+        example_list[0] = hint
+    
+    return example_list
+
 @app.route('/generate-examples', methods=['POST'])
 def generate_examples():
     try:
         data = request.json
         context = data.get('context', '')
-        
-        examples = set()
-        
-        # Get available puzzle tasks
-        if hasattr(game_state, 'puzzle_progress') and game_state.puzzle_progress:
-            available_tasks = game_state.puzzle_progress.get_available_tasks(game_state.inventory)
-            
-            # Add simplified versions of available tasks
-            for task in available_tasks:
-                # Extract key action from task
-                task_words = task.description.lower().split()
-                key_verbs = {'use', 'activate', 'defend', 'lead', 'coordinate', 'establish', 'rally', 'create'}
-                
-                for verb in key_verbs:
-                    if verb in task_words:
-                        # Create simplified action based on verb and required item
-                        if task.required_item != 'All items':
-                            action = f"{verb.title()} {task.required_item}"
-                            examples.add(action)
-                            break
-            
-            # Add inventory-based suggestions
-            for item in game_state.inventory:
-                if any(task.required_item == item for task in available_tasks):
-                    examples.add(f"Use {item}")
-        
-        # Add contextual actions
-        keywords = extract_keywords(context)
-        if keywords['npcs']:
-            examples.add(f"Talk to {random.choice(keywords['npcs'])}")
-        
-        if keywords['locations']:
-            examples.add(f"Explore {random.choice(keywords['locations'])}")
-            
-        # Always include some general actions
-        general_actions = ["Look around", "Check inventory", "View current tasks"]
-        examples.add(random.choice(general_actions))
-        
-        # Convert to list and limit size
-        example_list = list(examples)[:4]
-        
-        # If we have active tasks but no task-related examples, add one
-        if available_tasks and not any('use' in ex.lower() for ex in example_list):
-            task = random.choice(available_tasks)
-            hint = f"Try using {task.required_item}"
-            example_list[0] = hint
-        
+        example_list = suggest_actions(context, get_game_state())
         return jsonify({'examples': example_list})
         
     except Exception as e:
@@ -633,16 +870,42 @@ def show_victory(encoded_data):
 
 @app.route('/proxy-image/<path:url>')
 def proxy_image(url):
+    if request.query_string:
+        url = f"{url}?{request.query_string.decode('latin-1')}"
+    if not image_proxy.allows(url):
+        return jsonify({'error': 'Only generated images can be proxied'}), 403
+
     try:
-        response = requests.get(url)
-        return Response(
-            response.content, 
-            mimetype=response.headers['Content-Type'],
-            headers={'Access-Control-Allow-Origin': '*'}
-        )
+        cached = image_proxy.lookup(url)
+        if cached:
+            # send_file answers If-None-Match with 304 and Range with 206
+            response = send_file(cached.path, mimetype=cached.content_type, etag=cached.etag, conditional=True)
+            response.headers['Cache-Control'] = IMAGE_PROXY_CACHE_CONTROL
+            response.headers['Access-Control-Allow-Origin'] = '*'
+            return response
+
+        upstream = image_proxy.fetch(url)
+        if upstream.status == 415:
+            return jsonify({'error': 'Upstream response is not an image'}), 502
+        if upstream.status != 200:
+            return jsonify({'error': f"Upstream returned {upstream.status}"}), 502
+
+        headers = {'Access-Control-Allow-Origin': '*', 'Cache-Control': IMAGE_PROXY_CACHE_CONTROL}
+        if upstream.content_length:
+            headers['Content-Length'] = upstream.content_length
+        return Response(upstream.body, mimetype=upstream.content_type, headers=headers, direct_passthrough=True)
     except Exception as e:
         logging.error(f"Error proxying image: {e}")
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}"):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
         
 @app.route('/check-puzzle', methods=['POST'])
 def check_character_puzzle():
@@ -650,16 +913,8 @@ def check_character_puzzle():
         data = request.json
         character_name = data.get('character')
         
-        # Load puzzle data
-        with open('shared_data/puzzle_data.json', 'r') as f:
-            puzzle_data = json.load(f)
-            
-        has_puzzle = False
         # Check if character has puzzles in any world
-        for world_puzzles in puzzle_data['world_puzzles'].values():
-            if character_name in world_puzzles.get('characters', {}):
-                has_puzzle = True
-                break
+        has_puzzle = puzzle_catalog.has_character(character_name)
                 
         return jsonify({'hasPuzzle': has_puzzle})
         
@@ -684,7 +939,35 @@ if os.environ.get('RAILWAY_ENVIRONMENT'):
         response.headers['X-XSS-Protection'] = '1; mode=block'
         return response
        
+def start_worker_tasks():
+    """Start this process's background work.
+
+    Called once per gunicorn worker after it has forked and loaded the app
+    (see gunicorn.conf.py), so threads are not started in the arbiter or in
+    processes forked from a worker.
+    """
+    if recent_completions is not None:
+        # Fills the buffer from MongoDB and subscribes to local inserts
+        recent_completions.start()
+
+def ensure_database_indexes():
+    """Create the MongoDB indexes for a development server (`python main.py`).
+
+    Under gunicorn the on_starting hook in gunicorn.conf.py does this once,
+    before any worker forks.
+    """
+    if os.getenv('MONGODB_ENSURE_INDEXES', 'true').lower() not in ('1', 'true', 'yes'):
+        return
+    try:
+        ensure_indexes()
+        logging.info("MongoDB indexes ensured")
+    except Exception as e:
+        logging.warning(f"Could not ensure MongoDB indexes: {e}")
+
 if __name__ == '__main__':
+    # Off the main thread: the server may be slow to answer or absent in local development
+    threading.Thread(target=ensure_database_indexes, name='ensure-indexes', daemon=True).start()
+    start_worker_tasks()
     print("\n=== Game Ready to Start ===")
     print("\nAccess the game at http://localhost:5000")
     
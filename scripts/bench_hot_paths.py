@@ -0,0 +1,355 @@
+"""Micro-benchmarks for the game engine code that runs on every action.
+
+Run from the repository root:
+    python -m scripts.bench_hot_paths [--seconds 1] [--scale 10] [--only match]
+                                      [--json results.json] [--compare baseline.json]
+
+Each benchmark runs against two data sets: the real files in shared_data and
+a synthetic world built from them with ``--scale`` times as many kingdoms,
+characters per town and tasks per puzzle. For each one it reports calls per
+second, p50/p99 latency per call and the memory allocated per call (peak
+traced bytes, measured in a separate pass under tracemalloc so it does not
+skew the timings).
+
+--json writes the results with the current commit so runs can be kept and
+compared; --compare prints the change against such a file.
+"""
+import argparse
+import contextlib
+import copy
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# main builds the Flask app at import; keep it from starting background
+# MongoDB work, and let it construct API clients without real keys
+os.environ.setdefault('MONGODB_ENSURE_INDEXES', 'false')
+os.environ.setdefault('RECENT_COMPLETIONS_BUFFER', 'false')
+os.environ.setdefault('GAME_STATE_BACKEND', 'memory')
+os.environ.setdefault('IMAGE_JOB_BACKEND', 'memory')
+os.environ.setdefault('TOGETHER_API_KEY', 'benchmark')
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+import main as game_app  # noqa: E402
+from core.game_state import GameState  # noqa: E402
+from core.inventory_catalog import InventoryCatalog  # noqa: E402
+from core.puzzle_catalog import PuzzleCatalog  # noqa: E402
+from core.world_catalog import WorldCatalog  # noqa: E402
+
+MISS_ACTIONS = [
+    "walk around the town square",
+    "talk to the merchant about the weather",
+    "ask the guard for directions",
+    "rest at the inn for the night",
+]
+
+
+class Fixture:
+    """Catalogs plus the inputs each benchmark cycles through."""
+
+    def __init__(self, label: str, world_path: str, puzzle_path: str, inventory_path: str, rng: random.Random):
+        self.label = label
+        self.worlds = WorldCatalog(world_path)
+        self.puzzles = PuzzleCatalog(puzzle_path)
+        self.inventories = InventoryCatalog(inventory_path)
+        for catalog in (self.worlds, self.puzzles, self.inventories):
+            if not catalog.reload():
+                raise SystemExit(f"Could not load {catalog.path}")
+
+        self.starts: List[Tuple[str, str, str]] = []
+        for world_name, world in self.worlds.worlds.items():
+            for kingdom_name, kingdom in world.get('kingdoms', {}).items():
+                for town in kingdom.get('towns', {}).values():
+                    for npc_name in town.get('npcs', {}):
+                        self.starts.append((npc_name, world_name, kingdom_name))
+        rng.shuffle(self.starts)
+
+        self.games: List[GameState] = []
+        self.actions: List[Tuple[GameState, str]] = []
+        for world_name, character_name in self.puzzles.puzzles():
+            game_state = new_game(self, character_name, world_name)
+            if game_state is None or game_state.puzzle_progress is None:
+                continue
+            self.games.append(game_state)
+            for task in game_state.puzzle_progress.tasks.values():
+                words = task.description.split()
+                self.actions.append((game_state, task.description))
+                self.actions.append((game_state, f"I {words[0].lower()} the {words[-1]} carefully"))
+            for action in MISS_ACTIONS:
+                self.actions.append((game_state, action))
+        rng.shuffle(self.actions)
+        self.narrations = [narration(self, rng) for _ in range(64)]
+
+    def describe(self) -> Dict:
+        return {
+            'worlds': len(self.worlds.worlds),
+            'characters': len(self.starts),
+            'puzzles': len(self.games),
+            'tasks': sum(len(game.puzzle_progress.tasks) for game in self.games)
+        }
+
+
+def start_lookup(fixture: Fixture, character_name: str, world_name: str, kingdom_name: str):
+    """The catalog lookups /start-game makes before it builds a GameState."""
+    inventory = fixture.inventories.starting_inventory(character_name, world_name)
+    has_puzzle = fixture.puzzles.has_puzzle(world_name, character_name)
+    world = fixture.worlds.get_world(world_name)
+    kingdom = world.get('kingdoms', {}).get(kingdom_name)
+    location = fixture.worlds.find_character(character_name, world_name, kingdom_name)
+    return world, kingdom, location, inventory, has_puzzle
+
+
+def new_game(fixture: Fixture, character_name: str, world_name: str, kingdom_name: str = None):
+    """Build the GameState /start-game would, puzzle included."""
+    if kingdom_name is None:
+        location = fixture.worlds.find_character(character_name, world_name)
+    else:
+        location = fixture.worlds.find_character(character_name, world_name, kingdom_name)
+    if location is None:
+        return None
+    game_state = GameState(
+        world=location.world,
+        current_location=location.town,
+        inventory=fixture.inventories.starting_inventory(character_name, world_name),
+        history=[],
+        character={'name': character_name, 'description': location.npc['description']}
+    )
+    if fixture.puzzles.has_puzzle(world_name, character_name):
+        game_state.initialize_puzzle(character_name, fixture.worlds.data, fixture.puzzles)
+    return game_state
+
+
+def narration(fixture: Fixture, rng: random.Random) -> str:
+    """A Game Master style reply naming people, places and an inventory update."""
+    character_name, world_name, kingdom_name = rng.choice(fixture.starts)
+    location = fixture.worlds.find_character(character_name, world_name, kingdom_name)
+    other_name = rng.choice(fixture.starts)[0]
+    inventory = dict(fixture.inventories.starting_inventory(character_name, world_name))
+    item = next((name for name in inventory if name != 'gold'), 'lantern')
+    inventory[item] = inventory.get(item, 0) + 1
+    return (
+        f"{character_name} walks through {location.town['name']} toward the old market. "
+        f"{location.town['description']} Near the fountain you meet {other_name}, who offers "
+        f"a worn map in exchange for a favor. You buy rope for 3 gold at the general store. "
+        f"Your inventory now: {inventory}"
+    )
+
+
+def benchmarks(fixture: Fixture) -> Dict[str, Tuple[Callable, Sequence[tuple]]]:
+    """name -> (function, argument tuples to cycle through)."""
+    return {
+        'get_available_tasks': (
+            lambda game: game.puzzle_progress.get_available_tasks(game.inventory),
+            [(game,) for game in fixture.games]
+        ),
+        'match_task': (
+            lambda game, action: game.puzzle_progress.match_task(action),
+            fixture.actions
+        ),
+        'parse_inventory_changes': (
+            game_app.parse_inventory_changes,
+            [(text, {'gold': 10}) for text in fixture.narrations]
+        ),
+        'extract_keywords': (
+            game_app.extract_keywords,
+            [(text,) for text in fixture.narrations]
+        ),
+        'generate_examples': (
+            game_app.suggest_actions,
+            [(fixture.narrations[i % len(fixture.narrations)], game) for i, game in enumerate(fixture.games)]
+        ),
+        'game_state_new': (
+            lambda character_name, world_name, kingdom_name: new_game(fixture, character_name, world_name, kingdom_name),
+            fixture.starts
+        ),
+        'start_game_lookup': (
+            lambda character_name, world_name, kingdom_name: start_lookup(fixture, character_name, world_name, kingdom_name),
+            fixture.starts
+        )
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def measure(function: Callable, inputs: Sequence[tuple], seconds: float, alloc_calls: int) -> Dict:
+    count = len(inputs)
+    for args in inputs[:min(count, 100)]:
+        function(*args)
+
+    timings = []
+    clock = time.perf_counter_ns
+    start = clock()
+    deadline = start + int(seconds * 1e9)
+    i = 0
+    while True:
+        args = inputs[i % count]
+        t0 = clock()
+        function(*args)
+        t1 = clock()
+        timings.append(t1 - t0)
+        i += 1
+        if t1 >= deadline:
+            break
+    elapsed = (clock() - start) / 1e9
+    timings.sort()
+
+    # Allocation pass, separate so tracemalloc's overhead stays out of the timings
+    peak_total = 0
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for j in range(alloc_calls):
+        args = inputs[j % count]
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        function(*args)
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    return {
+        'calls': len(timings),
+        'ops_per_sec': len(timings) / elapsed,
+        'p50_us': percentile(timings, 0.50) / 1e3,
+        'p99_us': percentile(timings, 0.99) / 1e3,
+        'alloc_bytes_per_call': peak_total / alloc_calls,
+        'retained_bytes_per_call': retained / alloc_calls
+    }
+
+
+def scaled_data(scale: int) -> Tuple[Dict, Dict, Dict]:
+    """World, puzzle and inventory data with ``scale`` times more of everything."""
+    with open('shared_data/game_world.json', 'r') as f:
+        world_data = json.load(f)
+    with open('shared_data/puzzle_data.json', 'r') as f:
+        puzzle_data = json.load(f)
+    with open('shared_data/inventory.json', 'r') as f:
+        inventory_data = json.load(f)
+
+    inventories = inventory_data['inventories']
+    for world_name, world in world_data['worlds'].items():
+        world_puzzle = puzzle_data['world_puzzles'].get(world_name, {'characters': {}})
+        kingdoms = {}
+        for copy_index in range(scale):
+            for kingdom_name, kingdom in world.get('kingdoms', {}).items():
+                kingdom = copy.deepcopy(kingdom)
+                name = kingdom_name if copy_index == 0 else f"{kingdom_name} {copy_index}"
+                kingdom['name'] = name
+                for town in kingdom.get('towns', {}).values():
+                    npcs = {}
+                    for npc_name, npc in town.get('npcs', {}).items():
+                        for npc_index in range(scale):
+                            clone = npc_name if copy_index == 0 and npc_index == 0 else f"{npc_name} {copy_index}-{npc_index}"
+                            npcs[clone] = dict(npc, name=clone)
+                            if clone != npc_name:
+                                if npc_name in inventories:
+                                    inventories[clone] = list(inventories[npc_name])
+                                if npc_name in world_puzzle['characters']:
+                                    world_puzzle['characters'][clone] = copy.deepcopy(world_puzzle['characters'][npc_name])
+                    town['npcs'] = npcs
+                kingdoms[name] = kingdom
+        world['kingdoms'] = kingdoms
+
+        for character in world_puzzle['characters'].values():
+            tasks = character['role_tasks']
+            character['role_tasks'] = [
+                dict(task, task_id=f"{task['task_id']}-{i}",
+                     description=task['description'] if i == 0 else f"{task['description']} at waypoint {i}")
+                for i in range(scale) for task in tasks
+            ]
+    return world_data, puzzle_data, inventory_data
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def compare(results: Dict, baseline_path: str) -> None:
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    print(f"\nChange vs {baseline_path} ({baseline.get('commit', '?')})")
+    for data_set, rows in results['results'].items():
+        for name, row in rows.items():
+            base = baseline.get('results', {}).get(data_set, {}).get(name)
+            if not base:
+                continue
+            ops = (row['ops_per_sec'] / base['ops_per_sec'] - 1) * 100
+            p99 = (row['p99_us'] / base['p99_us'] - 1) * 100 if base['p99_us'] else 0.0
+            print(f"  {data_set:<9} {name:<24} ops/s {ops:+7.1f}%   p99 {p99:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=1.0, help='time spent on each benchmark')
+    parser.add_argument('--scale', type=int, default=10, help='growth factor of the synthetic world')
+    parser.add_argument('--alloc-calls', type=int, default=500, help='calls traced for allocation figures')
+    parser.add_argument('--only', default=None, help='run benchmarks whose name contains this')
+    parser.add_argument('--json', default=None, help='write results to this file')
+    parser.add_argument('--compare', default=None, help='print the change against a previous --json file')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    tmp_dir = tempfile.mkdtemp(prefix='bench_hot_paths_')
+    paths = []
+    for name, data in zip(('game_world', 'puzzle_data', 'inventory'), scaled_data(args.scale)):
+        path = os.path.join(tmp_dir, f"{name}.json")
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        paths.append(path)
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'seconds': args.seconds,
+        'scale': args.scale,
+        'data': {},
+        'results': {}
+    }
+
+    # GameState.initialize_puzzle prints; keep that cost but not the noise
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            fixtures = [
+                Fixture('real', 'shared_data/game_world.json', 'shared_data/puzzle_data.json',
+                        'shared_data/inventory.json', rng),
+                Fixture('synthetic', *paths, rng)
+            ]
+        for fixture in fixtures:
+            results['data'][fixture.label] = fixture.describe()
+            print(f"{fixture.label}: {fixture.describe()}")
+            print(f"  {'benchmark':<24} {'ops/s':>12} {'p50 us':>9} {'p99 us':>9} {'alloc B':>9}")
+            rows = results['results'][fixture.label] = {}
+            for name, (function, inputs) in benchmarks(fixture).items():
+                if args.only and args.only not in name:
+                    continue
+                with contextlib.redirect_stdout(devnull):
+                    row = measure(function, inputs, args.seconds, args.alloc_calls)
+                rows[name] = row
+                print(f"  {name:<24} {row['ops_per_sec']:>12,.0f} {row['p50_us']:>9.2f} "
+                      f"{row['p99_us']:>9.2f} {row['alloc_bytes_per_call']:>9,.0f}")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
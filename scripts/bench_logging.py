@@ -0,0 +1,144 @@
+"""Per-request logging overhead on the /action hot path, before and after.
+
+Run from the repository root:
+    python -m scripts.bench_logging [--requests 2000]
+
+"before" replays the log statements an unmatched /action used to make
+(f-string INFO lines per task from get_available_tasks, the Game Master's
+matcher and process_action) into a plain FileHandler, as logging.basicConfig
+set it up. "after" replays the statements the same request makes now through
+configure_logging(): lazy INFO lines plus DEBUG events, queued to a writer
+thread. Times are measured on the calling thread, i.e. what a request waits.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from core.puzzle_catalog import PuzzleCatalog
+from utils import logging_utils
+from utils.logging_utils import configure_logging, debug_event, sample_request
+
+ACTION = "walk around the town square"
+RESPONSE = "You stroll past market stalls as the floating island drifts gently. " * 4
+
+
+def legacy_available_tasks(progress, inventory):
+    logging.info(f"Getting available tasks with inventory: {inventory}")
+    available = []
+    for task in progress.tasks.values():
+        if not task.completed:
+            logging.info(f"Checking task: {task.task_id} - {task.title}")
+            available.append(task)
+            logging.info(f"Added task to available list: {task.task_id}")
+    logging.info(f"Number of available tasks: {len(available)}")
+    return available
+
+
+def legacy_request(progress, inventory):
+    logging.info(f"Processing action: {ACTION}")
+    legacy_available_tasks(progress, inventory)
+
+    logging.info(f"\n=== Processing action: {ACTION} ===")
+    available_tasks = legacy_available_tasks(progress, inventory)
+    logging.info(f"Number of available tasks: {len(available_tasks)}")
+    logging.info(f"Available tasks: {[task.title for task in available_tasks]}")
+
+    logging.info(f"Attempting to match action: {ACTION}")
+    action_words = set(ACTION.lower().split())
+    logging.info(f"Cleaned action words: {action_words}")
+    for task in available_tasks:
+        desc_words = set(task.description.lower().split())
+        common_words = desc_words.intersection(action_words)
+        similarity = len(common_words) / len(desc_words.union(action_words))
+        logging.info(f"\nChecking task: {task.title}")
+        logging.info(f"Task description words: {desc_words}")
+        logging.info(f"Common words: {common_words}")
+        logging.info(f"Number of matching words: {len(common_words)}")
+        logging.info(f"Similarity percentage: {similarity:.2%}")
+        logging.info(f"Exact match: {False}")
+        logging.info(f"Word overlap: {False}")
+        logging.info(f"High similarity: {False}")
+    logging.info("No matching task found")
+    logging.info("No task matched for this action")
+    logging.info("Generating contextual response using LLM")
+    logging.info(f"Time to first token: {0.5:.3f}s")
+    logging.info(f"Generated LLM response: {RESPONSE}")
+
+    legacy_available_tasks(progress, inventory)
+
+
+def current_request(progress, inventory):
+    sample_request()
+    logging.info("Processing action: %s", ACTION)
+    debug_event('game_master_action', action=ACTION)
+    debug_event('task_matched', task_id=None)
+    debug_event('narration_cache_miss', key='0' * 64)
+    logging.info("Time to first token: %.3fs", 0.5)
+    debug_event('llm_response', text=RESPONSE)
+    progress.get_available_tasks(inventory)
+
+
+def reset_logging():
+    logging_utils.stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(label, request, progress, inventory, requests):
+    for _ in range(50):
+        request(progress, inventory)
+    start = time.perf_counter()
+    for _ in range(requests):
+        request(progress, inventory)
+    per_request = (time.perf_counter() - start) / requests * 1e6
+    print(f"{label:<34} {per_request:9.1f} us/request")
+    return per_request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    catalog = PuzzleCatalog('shared_data/puzzle_data.json')
+    if not catalog.reload():
+        raise SystemExit("Could not load shared_data/puzzle_data.json")
+    world_name, character_name = catalog.puzzles()[0]
+    progress = catalog.new_progress(world_name, character_name)
+    inventory = {'gold': 10, 'Enchanted shield': 1, 'Courage charm': 1, 'Healing poultice': 1}
+    print(f"{len(progress.tasks)} tasks in the puzzle, {args.requests} requests per run\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, 'game.log')
+
+        reset_logging()
+        handler = logging.FileHandler(log_file)
+        handler.setFormatter(logging.Formatter(logging_utils.LOG_FORMAT))
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.INFO)
+        before = measure('before (basicConfig, INFO)', legacy_request, progress, inventory, args.requests)
+
+        runs = [
+            ('after (sync handler, INFO)', 'INFO', 1.0, False),
+            ('after (queue, INFO)', 'INFO', 1.0, True),
+            ('after (queue, DEBUG, 10% sampled)', 'DEBUG', 0.1, True),
+            ('after (queue, DEBUG, all requests)', 'DEBUG', 1.0, True),
+        ]
+        results = {}
+        for label, level, rate, use_queue in runs:
+            reset_logging()
+            configure_logging(log_file, level=level, debug_sample_rate=rate, use_queue=use_queue)
+            results[label] = measure(label, current_request, progress, inventory, args.requests)
+        reset_logging()
+
+    after = results['after (queue, INFO)']
+    print(f"\nPer-request logging overhead at INFO: {before:.1f} us -> {after:.1f} us "
+          f"({before / after:.0f}x less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Throughput of puzzle task matching: the old word-set matchers vs TaskMatcher.
+
+Run from the repository root:
+    python -m scripts.bench_task_matching [--seconds 2]
+
+Each /action used to run main's two-word overlap loop and then, when that
+missed, GameMasterAgent._find_matching_task with its per-task INFO logging.
+Both are reproduced here as the baseline. Logging goes to os.devnull at INFO,
+like the app's file handler, so its formatting cost is counted.
+"""
+import argparse
+import logging
+import os
+import random
+import time
+
+from core.puzzle_catalog import PuzzleCatalog
+
+MISS_ACTIONS = [
+    "walk around the town square",
+    "talk to the merchant about the weather",
+    "ask the guard for directions",
+    "rest at the inn for the night",
+    "look for something to eat",
+]
+
+
+def legacy_route_match(action, available_tasks):
+    for task in available_tasks:
+        task_keywords = set(task.description.lower().split())
+        action_keywords = set(action.lower().split())
+        if len(task_keywords.intersection(action_keywords)) >= 2:
+            return task
+    return None
+
+
+def legacy_game_master_match(action, available_tasks):
+    logging.info(f"Attempting to match action: {action}")
+    clean_action = action.strip('"\'').lower()
+    action_words = set(clean_action.split())
+    logging.info(f"Cleaned action words: {action_words}")
+
+    for task in available_tasks:
+        desc_words = set(task.description.lower().split())
+        title_words = set(task.title.lower().split())
+        common_words = desc_words.intersection(action_words)
+        desc_matches = len(common_words)
+
+        logging.info(f"\nChecking task: {task.title}")
+        logging.info(f"Task description words: {desc_words}")
+        logging.info(f"Common words: {common_words}")
+        logging.info(f"Number of matching words: {desc_matches}")
+
+        total_words = len(desc_words.union(action_words))
+        similarity = desc_matches / total_words if total_words > 0 else 0
+        logging.info(f"Similarity percentage: {similarity:.2%}")
+
+        exact_match = clean_action == task.description.lower()
+        word_overlap = desc_matches >= 4
+        high_similarity = similarity >= 0.5
+
+        logging.info(f"Exact match: {exact_match}")
+        logging.info(f"Word overlap: {word_overlap}")
+        logging.info(f"High similarity: {high_similarity}")
+
+        if exact_match or word_overlap or high_similarity:
+            logging.info(f"Found matching task - ID: {task.task_id}")
+            return task
+
+    logging.info("No matching task found")
+    return None
+
+
+def legacy_action(action, progress):
+    available_tasks = [task for task in progress.tasks.values() if not task.completed]
+    task = legacy_route_match(action, available_tasks)
+    if task is None:
+        task = legacy_game_master_match(action, available_tasks)
+    return task
+
+
+def indexed_action(action, progress):
+    # The route and the Game Master both ask; the second call is memoized
+    task = progress.match_task(action)
+    if task is None:
+        task = progress.match_task(action)
+    return task
+
+
+def build_workload(catalog, rng):
+    workload = []
+    for world_name, character_name in catalog.puzzles():
+        progress = catalog.new_progress(world_name, character_name)
+        for task in progress.tasks.values():
+            words = task.description.split()
+            workload.append((progress, task.description))
+            workload.append((progress, ' '.join(words[1:])))
+            workload.append((progress, f"I {words[0].lower()} the {words[-1]} carefully"))
+        for action in MISS_ACTIONS:
+            workload.append((progress, action))
+    rng.shuffle(workload)
+    return workload
+
+
+def measure(label, match, workload, seconds):
+    calls = 0
+    matched = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for progress, action in workload:
+            if match(action, progress) is not None:
+                matched += 1
+        calls += len(workload)
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"{label:<10} {rate:>12,.0f} actions/s  {elapsed / calls * 1e6:8.2f} us/action  "
+          f"match rate {matched / calls:.1%}")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2.0, help='time spent on each matcher')
+    parser.add_argument('--puzzles', default='shared_data/puzzle_data.json')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        filename=os.devnull,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    catalog = PuzzleCatalog(args.puzzles)
+    if not catalog.reload():
+        raise SystemExit(f"Could not load {args.puzzles}")
+    workload = build_workload(catalog, random.Random(0))
+    print(f"{len(workload)} actions over {len(catalog.puzzles())} puzzles")
+
+    legacy = measure('legacy', legacy_action, workload, args.seconds)
+    indexed = measure('indexed', indexed_action, workload, args.seconds)
+    print(f"speedup    {indexed / legacy:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+from db.indexes import ensure_indexes
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Run as a deploy step, with MONGODB_ENSURE_INDEXES=false on the web server
+if __name__ == "__main__":
+    try:
+        ensure_indexes()
+        logging.info("MongoDB indexes ensured")
+    except Exception as e:
+        logging.error(f"Error ensuring indexes: {e}")
+        raise
@@ -0,0 +1,336 @@
+"""Drive simulated players through the game and report per-route latency.
+
+Run from the repository root, either in-process against the app with
+stand-in LLM and image clients (see scripts/loadtest_app.py):
+    python -m scripts.loadtest --players 50 --concurrency 10 --llm-latency-ms 800
+
+or against a running server, e.g. one started with
+    gunicorn -w 4 --threads 8 scripts.loadtest_app:app
+as
+    python -m scripts.loadtest --url http://127.0.0.1:8000 --players 200 --concurrency 40
+
+Each player starts a game as a random puzzle character and plays a shuffled
+script: every one of its puzzle tasks plus --free-actions actions that go to
+the Game Master, asking /generate-examples every few actions. Once the puzzle
+is solved it requests /generate-completion and polls the image job until it
+finishes. Characters are picked from the local shared_data files, so a
+remote server must be running with the same data.
+
+Besides latency and error rates, each /action response is checked against
+the player's own game: a task list that gains tasks, or tasks that belong to
+another character, is counted as a consistency error, the symptom of
+requests seeing each other's game state.
+
+Against a server, each request opens a new connection by default, so
+gunicorn hands consecutive requests of one player to different workers the
+way a load balancer would. Responses carry the serving worker's pid
+(X-Worker-Pid, set by scripts/loadtest_app.py) and the report counts
+requests and 404s per worker; 404s spread over workers point at state kept
+in only one of them. --keep-alive reuses one connection per player instead,
+which pins the player to a single worker.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.puzzle_catalog import PuzzleCatalog
+from core.world_catalog import WorldCatalog
+
+FREE_ACTIONS = [
+    "Look around the market",
+    "Talk to the innkeeper about the storm",
+    "Walk to the edge of town",
+    "Ask the guard about recent travellers",
+    "Examine the old fountain",
+    "Listen to the bard in the square",
+    "Check the notice board",
+    "Rest by the fire",
+]
+
+
+class InProcessClient:
+    """Requests through Flask's test client; one per player keeps cookies apart."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Tuple[int, Optional[Dict], Optional[str]]:
+        response = self.client.open(path, method=method, json=payload)
+        return response.status_code, response.get_json(silent=True), response.headers.get('X-Worker-Pid')
+
+
+class HttpClient:
+    """Requests to a running server; cookies are kept per player.
+
+    Unless ``keep_alive`` is set, every request asks the server to close the
+    connection, so the next one is accepted by whichever worker is free.
+    """
+
+    def __init__(self, base_url: str, timeout: float, keep_alive: bool = False):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Tuple[int, Optional[Dict], Optional[str]]:
+        response = self.session.request(method, self.base_url + path, json=payload, timeout=self.timeout)
+        worker = response.headers.get('X-Worker-Pid')
+        try:
+            return response.status_code, response.json(), worker
+        except ValueError:
+            return response.status_code, None, worker
+
+
+class Recorder:
+    """Latency samples and failures per route, shared by all players."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.workers: Dict[str, Dict[str, int]] = defaultdict(lambda: {'requests': 0, 'not_found': 0})
+        self.consistency_errors = 0
+        self.players_completed = 0
+        self.puzzles_solved = 0
+        self._lock = threading.Lock()
+
+    def record(self, route: str, seconds: float, status: int, ok: bool, worker: Optional[str] = None) -> None:
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+            if not ok:
+                self.errors[route] += 1
+            if worker is not None:
+                self.workers[worker]['requests'] += 1
+                self.workers[worker]['not_found'] += int(status == 404)
+
+    def inconsistent(self) -> None:
+        with self._lock:
+            self.consistency_errors += 1
+
+    def finished(self, solved: bool) -> None:
+        with self._lock:
+            self.players_completed += 1
+            self.puzzles_solved += int(solved)
+
+    def report(self, elapsed: float) -> Dict:
+        with self._lock:
+            routes = {}
+            for route, samples in sorted(self.latencies.items()):
+                samples = sorted(samples)
+                routes[route] = {
+                    'requests': len(samples),
+                    'errors': self.errors[route],
+                    'error_rate': self.errors[route] / len(samples),
+                    'p50_ms': percentile(samples, 0.50) * 1000,
+                    'p90_ms': percentile(samples, 0.90) * 1000,
+                    'p99_ms': percentile(samples, 0.99) * 1000,
+                    'max_ms': samples[-1] * 1000,
+                    'statuses': {str(status): count for status, count in sorted(self.statuses[route].items())}
+                }
+            total = sum(route['requests'] for route in routes.values())
+            errors = sum(route['errors'] for route in routes.values())
+            return {
+                'elapsed_seconds': elapsed,
+                'requests': total,
+                'requests_per_second': total / elapsed if elapsed else 0.0,
+                'error_rate': errors / total if total else 0.0,
+                'players_completed': self.players_completed,
+                'puzzles_solved': self.puzzles_solved,
+                'consistency_errors': self.consistency_errors,
+                'routes': routes,
+                'workers': {worker: dict(counts) for worker, counts in sorted(self.workers.items())}
+            }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Player:
+    def __init__(self, client, recorder: Recorder, start: Tuple[str, str, str], rng: random.Random, args):
+        self.client = client
+        self.recorder = recorder
+        self.character, self.world, self.kingdom = start
+        self.rng = rng
+        self.args = args
+
+    def call(self, route: str, method: str, path: str, payload: Optional[Dict] = None) -> Optional[Dict]:
+        started = time.perf_counter()
+        try:
+            status, body, worker = self.client.request(method, path, payload)
+        except Exception:
+            self.recorder.record(route, time.perf_counter() - started, 0, False)
+            return None
+        ok = status < 400 and not (isinstance(body, dict) and body.get('error'))
+        self.recorder.record(route, time.perf_counter() - started, status, ok, worker)
+        return body if ok else None
+
+    def think(self) -> None:
+        if self.args.think_ms:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.args.think_ms / 1000)
+
+    def play(self) -> None:
+        solved = False
+        try:
+            solved = self._play()
+        finally:
+            self.recorder.finished(solved)
+
+    def _play(self) -> bool:
+        game = self.call('/start-game', 'POST', '/start-game', {
+            'character': self.character, 'world': self.world, 'kingdom': self.kingdom
+        })
+        if not game or not game.get('puzzle_progress'):
+            return False
+        game_id = game['game_id']
+        own_tasks = set(game['puzzle_progress']['tasks'])
+        remaining = set(own_tasks)
+
+        script = [task['description'] for task in game['puzzle_progress']['tasks'].values()]
+        script += self.rng.sample(FREE_ACTIONS, min(self.args.free_actions, len(FREE_ACTIONS)))
+        self.rng.shuffle(script)
+
+        solved = False
+        context = game.get('message', '')
+        for step, action in enumerate(script, 1):
+            self.think()
+            result = self.call('/action', 'POST', '/action', {'action': action, 'game_id': game_id})
+            if result is None:
+                continue
+            context = result.get('response') or context
+            solved = solved or bool(result.get('puzzle_solved'))
+
+            available = {task['id'] for task in result.get('available_tasks', [])}
+            if not available <= remaining or not available <= own_tasks:
+                self.recorder.inconsistent()
+            remaining = available
+
+            if step % self.args.examples_every == 0:
+                self.call('/generate-examples', 'POST', '/generate-examples', {'context': context, 'game_id': game_id})
+
+        if solved and not self.args.skip_completion:
+            self.complete(game_id)
+        return solved
+
+    def complete(self, game_id: str) -> None:
+        started = time.perf_counter()
+        job = self.call('/generate-completion', 'POST', '/generate-completion', {'game_id': game_id})
+        if not job:
+            return
+        deadline = started + self.args.completion_timeout
+        while time.perf_counter() < deadline:
+            time.sleep(self.args.poll_interval)
+            state = self.call('/image-jobs/<id>', 'GET', f"/image-jobs/{job['job_id']}")
+            if state and state.get('status') in ('done', 'failed'):
+                ok = state['status'] == 'done'
+                self.recorder.record('completion image ready', time.perf_counter() - started, 200 if ok else 500, ok)
+                return
+        self.recorder.record('completion image ready', time.perf_counter() - started, 504, False)
+
+
+def puzzle_starts(world_path: str, puzzle_path: str) -> List[Tuple[str, str, str]]:
+    """(character, world, kingdom) for every character that has a puzzle."""
+    worlds = WorldCatalog(world_path)
+    puzzles = PuzzleCatalog(puzzle_path)
+    if not worlds.reload() or not puzzles.reload():
+        raise SystemExit("Could not load the world and puzzle files")
+    starts = []
+    for world_name, character_name in puzzles.puzzles():
+        location = worlds.find_character(character_name, world_name)
+        if location is not None:
+            starts.append((character_name, world_name, location.kingdom['name']))
+    if not starts:
+        raise SystemExit("No puzzle characters found in the world file")
+    return starts
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{report['requests']} requests in {report['elapsed_seconds']:.1f}s "
+          f"({report['requests_per_second']:.1f} req/s), error rate {report['error_rate']:.2%}")
+    print(f"{report['players_completed']} players finished, {report['puzzles_solved']} puzzles solved, "
+          f"{report['consistency_errors']} consistency errors")
+    print(f"\n  {'route':<24} {'requests':>8} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for route, row in report['routes'].items():
+        print(f"  {route:<24} {row['requests']:>8} {row['errors']:>7} {row['p50_ms']:>9.1f} "
+              f"{row['p90_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+    if report['workers']:
+        print(f"\n  {'worker pid':<24} {'requests':>8} {'404s':>7}")
+        for worker, counts in report['workers'].items():
+            print(f"  {worker:<24} {counts['requests']:>8} {counts['not_found']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=None, help='base URL of a running server; in-process if omitted')
+    parser.add_argument('--players', type=int, default=20, help='players to simulate in total')
+    parser.add_argument('--concurrency', type=int, default=10, help='players active at once')
+    parser.add_argument('--free-actions', type=int, default=4, help='non-puzzle actions per player')
+    parser.add_argument('--examples-every', type=int, default=3, help='call /generate-examples every N actions')
+    parser.add_argument('--think-ms', type=float, default=0, help='mean pause between a player\'s requests')
+    parser.add_argument('--skip-completion', action='store_true', help='do not request completion images')
+    parser.add_argument('--completion-timeout', type=float, default=60, help='seconds to wait for a completion image')
+    parser.add_argument('--poll-interval', type=float, default=0.25, help='seconds between image job polls')
+    parser.add_argument('--timeout', type=float, default=60, help='HTTP timeout per request (--url only)')
+    parser.add_argument('--keep-alive', action='store_true',
+                        help='reuse one connection per player, pinning it to a worker (--url only)')
+    parser.add_argument('--llm-latency-ms', type=float, default=None, help='stand-in chat latency (in-process only)')
+    parser.add_argument('--image-latency-ms', type=float, default=None, help='stand-in image latency (in-process only)')
+    parser.add_argument('--error-rate', type=float, default=None, help='stand-in failure rate (in-process only)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args()
+
+    if args.url:
+        def make_client():
+            return HttpClient(args.url, args.timeout, keep_alive=args.keep_alive)
+        backend = None
+    else:
+        for flag, name in ((args.llm_latency_ms, 'LOADTEST_LLM_LATENCY_MS'),
+                           (args.image_latency_ms, 'LOADTEST_IMAGE_LATENCY_MS'),
+                           (args.error_rate, 'LOADTEST_ERROR_RATE')):
+            if flag is not None:
+                os.environ[name] = str(flag)
+        os.environ.setdefault('MONGODB_ENSURE_INDEXES', 'false')
+        os.environ.setdefault('LOADTEST_STUB_MONGO', 'true')
+        from scripts import loadtest_app
+
+        def make_client():
+            return InProcessClient(loadtest_app.app)
+        backend = loadtest_app.backend
+
+    starts = puzzle_starts('shared_data/game_world.json', 'shared_data/puzzle_data.json')
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    players = [Player(make_client(), recorder, rng.choice(starts), random.Random(rng.random()), args)
+               for _ in range(args.players)]
+
+    print(f"{args.players} players, {args.concurrency} at a time, "
+          f"{'against ' + args.url if args.url else 'in-process with stand-in clients'}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(player.play) for player in players]:
+            future.result()
+    report = recorder.report(time.perf_counter() - started)
+    report['config'] = {key: value for key, value in vars(args).items() if key != 'json'}
+    if backend is not None:
+        report['stub_calls'] = dict(backend.calls)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
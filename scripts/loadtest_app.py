@@ -0,0 +1,205 @@
+"""The game app with its Together and OpenAI clients replaced by stand-ins.
+
+Serve it for a load test with:
+    gunicorn -w 4 --threads 8 scripts.loadtest_app:app
+
+or import it in-process (scripts.loadtest does). The stand-ins sleep for a
+configurable time instead of calling the real APIs:
+
+    LOADTEST_LLM_LATENCY_MS     chat completion latency (default 800)
+    LOADTEST_IMAGE_LATENCY_MS   image generation latency (default 4000)
+    LOADTEST_JITTER             +/- fraction applied to each latency (default 0.25)
+    LOADTEST_ERROR_RATE         fraction of stub calls that raise (default 0)
+    LOADTEST_STUB_MONGO         store completion records in memory (default false); also
+                                keeps games and image jobs in each worker unless
+                                GAME_STATE_BACKEND / IMAGE_JOB_BACKEND are set
+
+Stand-in images go to a temporary IMAGE_STORE_DIR and the sqlite narration
+cache is off unless those are set explicitly, so a load test never leaves
+fake scenes or narration in shared_data. Every response carries the pid of
+the worker that served it in X-Worker-Pid.
+"""
+import asyncio
+import base64
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict
+
+from bson import ObjectId
+
+os.environ.setdefault('TOGETHER_API_KEY', 'loadtest')
+os.environ.setdefault('OPENAI_API_KEY', 'loadtest')
+os.environ.setdefault('IMAGE_STORE_DIR', tempfile.mkdtemp(prefix='loadtest_images_'))
+STUB_MONGO = os.getenv('LOADTEST_STUB_MONGO', 'false').lower() in ('1', 'true', 'yes')
+if STUB_MONGO:
+    os.environ.setdefault('GAME_STATE_BACKEND', 'memory')
+    os.environ.setdefault('IMAGE_JOB_BACKEND', 'memory')
+if os.getenv('NARRATION_CACHE_BACKEND', 'memory').lower() == 'sqlite' and not os.getenv('NARRATION_CACHE_PATH'):
+    os.environ['NARRATION_CACHE_BACKEND'] = 'memory'
+
+import main  # noqa: E402
+from db.client import MongoDBClient, completion_listeners  # noqa: E402
+from utils.metrics import instrument_client  # noqa: E402
+
+NARRATION = (
+    "The lanterns of {town} flicker as you {action}. A passing merchant nods toward the old "
+    "market, where rumours of the coming storm grow louder. Somewhere above, the bells begin to ring."
+)
+
+
+class StubBackend:
+    """Latency, jitter and failure settings shared by the stand-in clients."""
+
+    def __init__(self, llm_latency: float, image_latency: float, jitter: float = 0.25, error_rate: float = 0.0):
+        self.llm_latency = llm_latency
+        self.image_latency = image_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'StubBackend':
+        return cls(
+            llm_latency=float(os.getenv('LOADTEST_LLM_LATENCY_MS', 800)) / 1000,
+            image_latency=float(os.getenv('LOADTEST_IMAGE_LATENCY_MS', 4000)) / 1000,
+            jitter=float(os.getenv('LOADTEST_JITTER', 0.25)),
+            error_rate=float(os.getenv('LOADTEST_ERROR_RATE', 0))
+        )
+
+    def delay(self, kind: str, latency: float) -> float:
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+        if random.random() < self.error_rate:
+            raise RuntimeError(f"Injected {kind} failure")
+        return max(0.0, latency * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+def _narration(messages) -> str:
+    action = messages[-1]['content'] if messages else 'look around'
+    return NARRATION.format(town='the town', action=action.lower().rstrip('.'))
+
+
+def _completion(text: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text), delta=None)],
+        usage=SimpleNamespace(prompt_tokens=200, completion_tokens=len(text.split()), total_tokens=200 + len(text.split()))
+    )
+
+
+def _chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def _pieces(text: str, count: int = 8):
+    words = text.split(' ')
+    size = max(1, len(words) // count)
+    return [' '.join(words[i:i + size]) + (' ' if i + size < len(words) else '') for i in range(0, len(words), size)]
+
+
+class _Completions:
+    def __init__(self, backend: StubBackend):
+        self.backend = backend
+
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        latency = self.backend.delay('chat', self.backend.llm_latency)
+        text = _narration(messages)
+        if not stream:
+            time.sleep(latency)
+            return _completion(text)
+
+        def chunks():
+            pieces = _pieces(text)
+            for piece in pieces:
+                time.sleep(latency / len(pieces))
+                yield _chunk(piece)
+        return chunks()
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, model=None, messages=None, stream=False, **kwargs):
+        latency = self.backend.delay('chat', self.backend.llm_latency)
+        text = _narration(messages)
+        if not stream:
+            await asyncio.sleep(latency)
+            return _completion(text)
+
+        async def chunks():
+            pieces = _pieces(text)
+            for piece in pieces:
+                await asyncio.sleep(latency / len(pieces))
+                yield _chunk(piece)
+        return chunks()
+
+
+class StubTogether:
+    def __init__(self, backend: StubBackend, asynchronous: bool = False):
+        completions = _AsyncCompletions(backend) if asynchronous else _Completions(backend)
+        self.chat = SimpleNamespace(completions=completions)
+
+
+class _Images:
+    def __init__(self, backend: StubBackend):
+        self.backend = backend
+
+    def generate(self, prompt=None, response_format='url', **kwargs):
+        time.sleep(self.backend.delay('image', self.backend.image_latency))
+        from PIL import Image
+
+        # A distinct small image per call so the content-addressed store does real work
+        img = Image.new('RGB', (256, 256), tuple(random.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return SimpleNamespace(data=[SimpleNamespace(
+            b64_json=base64.b64encode(buffer.getvalue()).decode('ascii') if response_format == 'b64_json' else None,
+            url=None if response_format == 'b64_json' else '/api/placeholder/1024/1024'
+        )])
+
+
+class StubOpenAI:
+    def __init__(self, backend: StubBackend):
+        self.images = _Images(backend)
+
+
+def _store_completion_in_memory(self, image_url, puzzle_text, world_name, character_name, thumbnail_url=None):
+    record = {
+        '_id': ObjectId(),
+        'game_id': str(uuid.uuid4()),
+        'image_url': image_url,
+        'thumbnail_url': thumbnail_url or image_url,
+        'world_name': world_name,
+        'character_name': character_name,
+        'created_at': datetime.utcnow()
+    }
+    for listener in completion_listeners:
+        listener(record)
+    return record['game_id']
+
+
+def install_stubs(game_master, backend: StubBackend, stub_mongo: bool = False) -> None:
+    """Point the Game Master's API clients at the stand-ins, still measured for /metrics."""
+    game_master.client = instrument_client(StubTogether(backend), 'game_master')
+    game_master.async_client = instrument_client(StubTogether(backend, asynchronous=True), 'game_master',
+                                                 asynchronous=True)
+    object.__setattr__(game_master.chat_model, 'client', game_master.client)
+    game_master.openai_client = instrument_client(StubOpenAI(backend), 'game_master')
+    if stub_mongo:
+        MongoDBClient.store_completion_image = _store_completion_in_memory
+
+
+def _tag_worker(response):
+    response.headers['X-Worker-Pid'] = str(os.getpid())
+    return response
+
+
+backend = StubBackend.from_env()
+install_stubs(main.game_master, backend, stub_mongo=STUB_MONGO)
+app = main.app
+app.after_request(_tag_worker)
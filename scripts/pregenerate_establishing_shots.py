@@ -0,0 +1,92 @@
+"""Render the establishing shot for every (character, town) in the world file.
+
+Run from the repository root:
+    python -m scripts.pregenerate_establishing_shots [--workers 4] [--limit N] [--dry-run] [--prune]
+
+Scenes that already have an image for their current text are skipped, so the
+command can be rerun after editing game_world.json to render only what
+changed. --prune also drops index entries for text that no longer exists.
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from agents.game_master import GameMasterAgent, establishing_shot_prompt
+from core.establishing_shots import EstablishingShotCache
+from core.image_store import ImageStore
+from core.world_catalog import WorldCatalog
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def iter_scenes(worlds):
+    """Yield (character, town, world) for every NPC, once per distinct scene."""
+    seen = set()
+    for world in worlds.values():
+        for kingdom in world.get('kingdoms', {}).values():
+            for town in kingdom.get('towns', {}).values():
+                for npc_name in town.get('npcs', {}):
+                    prompt = establishing_shot_prompt(npc_name, town, world)
+                    if prompt not in seen:
+                        seen.add(prompt)
+                        yield npc_name, town, world
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='concurrent DALL-E requests')
+    parser.add_argument('--limit', type=int, default=None, help='render at most this many images')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be rendered')
+    parser.add_argument('--prune', action='store_true', help='drop entries for scenes whose text changed')
+    args = parser.parse_args()
+
+    load_dotenv()
+    catalog = WorldCatalog('shared_data/game_world.json')
+    if not catalog.reload():
+        raise SystemExit("Could not load shared_data/game_world.json")
+
+    cache = EstablishingShotCache(ImageStore(os.getenv('IMAGE_STORE_DIR', 'shared_data/image_store')))
+    scenes = list(iter_scenes(catalog.worlds))
+    missing = [scene for scene in scenes if cache.get(establishing_shot_prompt(*scene)) is None]
+    if args.limit is not None:
+        missing = missing[:args.limit]
+    print(f"{len(scenes)} scenes, {len(scenes) - len(missing)} cached, {len(missing)} to render")
+
+    if args.prune:
+        removed = cache.prune(establishing_shot_prompt(*scene) for scene in scenes)
+        print(f"Pruned {removed} stale entries")
+
+    if args.dry_run or not missing:
+        return
+
+    game_master = GameMasterAgent(
+        os.getenv('TOGETHER_API_KEY'),
+        openai_api_key=os.getenv('OPENAI_API_KEY'),
+        shot_cache=cache
+    )
+
+    rendered = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(game_master.generate_initial_story_image, character, town, world): (character, town['name'])
+            for character, town, world in missing
+        }
+        for future in as_completed(futures):
+            character, town_name = futures[future]
+            if future.result():
+                rendered += 1
+                print(f"  rendered: {character} in {town_name}")
+            else:
+                print(f"  failed: {character} in {town_name}")
+
+    print(f"Rendered {rendered}/{len(missing)} images")
+
+
+if __name__ == '__main__':
+    main()
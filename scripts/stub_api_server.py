@@ -0,0 +1,313 @@
+"""Local stand-in for the Together chat and OpenAI images HTTP APIs.
+
+Run from the repository root:
+    python -m scripts.stub_api_server [--port 8090] [--latency-ms 800] [--jitter 0.25]
+        [--image-latency-ms 4000] [--rate-limit-rate 0.05] [--timeout-rate 0.01]
+
+then point the app (or create_world.py) at it with configuration only;
+both SDKs read their base URL from the environment:
+    TOGETHER_BASE_URL=http://127.0.0.1:8090/v1
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1
+
+It serves POST /v1/chat/completions (plain and ``stream: true`` server-sent
+events) and POST /v1/images/generations (``url`` or ``b64_json``). Chat
+replies are templated from the project's own prompts, so the world builder
+gets parseable "Kingdom Name: / Kingdom Description:" blocks or the batched
+towns JSON, the safety checker gets SAFE, and the Game Master gets
+narration that mentions the action and location. Image URLs point back at
+this server.
+
+Faults are injected per request: --rate-limit-rate answers 429 with
+Retry-After, --error-rate answers 500, and --timeout-rate holds the request
+for --timeout-seconds so client timeouts fire. GET /stats reports counts.
+"""
+import argparse
+import base64
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List
+
+from flask import Flask, Response, jsonify, request
+
+PLACES = ['Amber', 'Briar', 'Cinder', 'Dusk', 'Ember', 'Frost', 'Gale', 'Haven', 'Iron', 'Jade',
+          'Kestrel', 'Lumen', 'Moss', 'Nether', 'Onyx', 'Pyre', 'Quill', 'Raven', 'Sable', 'Thorn']
+SUFFIXES = ['hold', 'reach', 'vale', 'mere', 'spire', 'ford', 'haven', 'crest', 'wick', 'gate']
+FIRST_NAMES = ['Aldric', 'Brynn', 'Corin', 'Delia', 'Edrin', 'Fenna', 'Garrick', 'Hale', 'Isolde', 'Jory',
+               'Kael', 'Lyra', 'Maren', 'Nyx', 'Orin', 'Perrin', 'Rhea', 'Soren', 'Tamsin', 'Wren']
+EPITHETS = ['the Bold', 'the Wise', 'the Quiet', 'the Swift', 'the Tinker', 'the Keeper', 'the Wanderer',
+            'the Smith', 'the Seer', 'the Warden']
+
+
+class Names:
+    """Unique, readable names for generated places and people."""
+
+    def __init__(self):
+        self._places = itertools.count()
+        self._people = itertools.count()
+        self._lock = threading.Lock()
+
+    def place(self) -> str:
+        with self._lock:
+            n = next(self._places)
+        name = f"{PLACES[n % len(PLACES)]}{SUFFIXES[(n // len(PLACES)) % len(SUFFIXES)]}"
+        cycle = n // (len(PLACES) * len(SUFFIXES))
+        return name if cycle == 0 else f"{name} {cycle + 1}"
+
+    def person(self) -> str:
+        with self._lock:
+            n = next(self._people)
+        name = f"{FIRST_NAMES[n % len(FIRST_NAMES)]} {EPITHETS[(n // len(FIRST_NAMES)) % len(EPITHETS)]}"
+        cycle = n // (len(FIRST_NAMES) * len(EPITHETS))
+        return name if cycle == 0 else f"{name} {cycle + 1}"
+
+
+names = Names()
+
+
+def _count(prompt: str, noun: str, default: int = 3) -> int:
+    match = re.search(rf'(\d+)\s+(?:unique\s+)?{noun}', prompt)
+    return int(match.group(1)) if match else default
+
+
+def _blocks(label: str, count: int, make_name, description: str) -> str:
+    return '\n\n'.join(
+        f"{label} Name: {name}\n{label} Description: {description.format(name=name)}"
+        for name in (make_name() for _ in range(count))
+    )
+
+
+def _world_json(prompt: str) -> str:
+    towns = []
+    for _ in range(_count(prompt, 'towns')):
+        town = names.place()
+        towns.append({
+            'name': town,
+            'description': f"{town} is a walled market town built around an old watchtower.",
+            'npcs': [
+                {'name': person, 'description': f"{person} keeps the ledgers of {town} and knows every rumour."}
+                for person in (names.person() for _ in range(_count(prompt, 'characters')))
+            ]
+        })
+    return json.dumps({'towns': towns})
+
+
+def reply_for(messages: List[Dict]) -> str:
+    """A reply shaped like what the project's prompt asks for."""
+    system = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+    user = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+    prompt = f"{system}\n{user}"
+
+    if '"towns"' in prompt and 'JSON' in prompt:
+        return _world_json(prompt)
+    if 'Kingdom Name:' in prompt:
+        return _blocks('Kingdom', _count(prompt, 'kingdoms'), names.place,
+                       "{name} is a river kingdom of terraced farms and stubborn councils.")
+    if 'Town Name:' in prompt:
+        return _blocks('Town', _count(prompt, 'towns'), names.place,
+                       "{name} is a busy crossroads town with a crooked clock tower.")
+    if 'Character Name:' in prompt:
+        return _blocks('Character', _count(prompt, 'characters'), names.person,
+                       "{name} is a weathered local with a talent for finding lost things.")
+    if 'World Name:' in prompt:
+        world = names.place()
+        return (f"World Name: {world}\nWorld Description: {world} is a land of floating islands "
+                f"tethered by ancient chains, where every kingdom guards a piece of the sky.")
+    if 'content safety checker' in prompt:
+        return 'SAFE'
+    if 'inventory changes' in prompt:
+        return 'No inventory changes.'
+    if 'fantasy game item' in prompt:
+        return "A well-worn tool, warm to the touch. It hums faintly near hidden mechanisms."
+    if 'simple quest' in prompt:
+        return ("Title: The Lost Lantern\nDescription: A lantern vital to the night watch has gone missing.\n"
+                "Objective: Find the lantern in the old mill.\nReward: 15 gold")
+
+    location = re.search(r'Location:\s*([^\n]+)', prompt)
+    place = location.group(1).strip() if location else 'the town'
+    action = user.strip().rstrip('.').lower() or 'look around'
+    return (f"You {action} in {place}. Lanterns sway in the wind as a merchant calls out a warning "
+            f"about the storm gathering beyond the walls. Somewhere nearby, a bell begins to ring.")
+
+
+class FaultSettings:
+    def __init__(self, args):
+        self.latency = args.latency_ms / 1000
+        self.image_latency = args.image_latency_ms / 1000
+        self.jitter = args.jitter
+        self.rate_limit_rate = args.rate_limit_rate
+        self.error_rate = args.error_rate
+        self.timeout_rate = args.timeout_rate
+        self.timeout_seconds = args.timeout_seconds
+        self.stream_chunks = args.stream_chunks
+
+    def latency_for(self, base: float) -> float:
+        return max(0.0, base * (1 + random.uniform(-self.jitter, self.jitter)))
+
+
+def create_app(faults: FaultSettings, image_cache_size: int = 64) -> Flask:
+    app = Flask(__name__)
+    stats: Dict[str, int] = {}
+    stats_lock = threading.Lock()
+    images: "OrderedDict[str, bytes]" = OrderedDict()
+    images_lock = threading.Lock()
+
+    def count(key: str) -> None:
+        with stats_lock:
+            stats[key] = stats.get(key, 0) + 1
+
+    def inject_fault(kind: str):
+        """Return an error response for this request, or None to serve it."""
+        roll = random.random()
+        if roll < faults.rate_limit_rate:
+            count(f"{kind}.429")
+            response = jsonify({'error': {'message': 'Rate limit exceeded (stub)', 'type': 'rate_limit_error',
+                                          'code': 'rate_limit_exceeded'}})
+            response.status_code = 429
+            response.headers['Retry-After'] = '1'
+            return response
+        roll -= faults.rate_limit_rate
+        if roll < faults.error_rate:
+            count(f"{kind}.500")
+            response = jsonify({'error': {'message': 'Internal error (stub)', 'type': 'server_error'}})
+            response.status_code = 500
+            return response
+        roll -= faults.error_rate
+        if roll < faults.timeout_rate:
+            count(f"{kind}.timeout")
+            time.sleep(faults.timeout_seconds)
+            response = jsonify({'error': {'message': 'Timed out (stub)', 'type': 'timeout'}})
+            response.status_code = 504
+            return response
+        return None
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(force=True)
+        fault = inject_fault('chat')
+        if fault is not None:
+            return fault
+        count('chat.stream' if body.get('stream') else 'chat')
+
+        model = body.get('model', 'stub-model')
+        text = reply_for(body.get('messages', []))
+        completion_id = f"stub-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(text.split()),
+                 'total_tokens': prompt_tokens + len(text.split())}
+        latency = faults.latency_for(faults.latency)
+
+        if not body.get('stream'):
+            time.sleep(latency)
+            return jsonify({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                             'finish_reason': 'stop', 'logprobs': None}],
+                'usage': usage
+            })
+
+        words = text.split(' ')
+        size = max(1, -(-len(words) // faults.stream_chunks))
+        pieces = [' '.join(words[i:i + size]) + (' ' if i + size < len(words) else '')
+                  for i in range(0, len(words), size)]
+
+        def events():
+            for index, piece in enumerate(pieces):
+                time.sleep(latency / len(pieces))
+                last = index == len(pieces) - 1
+                chunk = {
+                    'id': completion_id,
+                    'object': 'chat.completion.chunk',
+                    'created': created,
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': piece},
+                                 'finish_reason': 'stop' if last else None, 'logprobs': None}],
+                    'usage': usage if last else None
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    def render_image(size: str) -> bytes:
+        from PIL import Image
+
+        try:
+            width, height = (int(part) for part in size.split('x'))
+        except ValueError:
+            width = height = 1024
+        img = Image.new('RGB', (width, height), tuple(random.randrange(40, 220) for _ in range(3)))
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    @app.route('/v1/images/generations', methods=['POST'])
+    def images_generations():
+        body = request.get_json(force=True)
+        fault = inject_fault('image')
+        if fault is not None:
+            return fault
+        count('image')
+
+        time.sleep(faults.latency_for(faults.image_latency))
+        data = []
+        for _ in range(int(body.get('n', 1))):
+            png = render_image(body.get('size', '1024x1024'))
+            if body.get('response_format') == 'b64_json':
+                data.append({'b64_json': base64.b64encode(png).decode('ascii'), 'revised_prompt': body.get('prompt')})
+                continue
+            image_id = uuid.uuid4().hex
+            with images_lock:
+                images[image_id] = png
+                while len(images) > image_cache_size:
+                    images.popitem(last=False)
+            data.append({'url': f"{request.host_url}images/{image_id}.png", 'revised_prompt': body.get('prompt')})
+        return jsonify({'created': int(time.time()), 'data': data})
+
+    @app.route('/images/<image_id>.png')
+    def serve_image(image_id):
+        with images_lock:
+            png = images.get(image_id)
+        if png is None:
+            return Response(status=404)
+        return Response(png, mimetype='image/png')
+
+    @app.route('/stats')
+    def get_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=800, help='chat completion latency')
+    parser.add_argument('--image-latency-ms', type=float, default=4000, help='image generation latency')
+    parser.add_argument('--jitter', type=float, default=0.25, help='+/- fraction applied to each latency')
+    parser.add_argument('--stream-chunks', type=int, default=12, help='chunks per streamed reply')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of requests answered 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 500')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='fraction of requests held past the timeout')
+    parser.add_argument('--timeout-seconds', type=float, default=120, help='how long held requests wait')
+    args = parser.parse_args()
+
+    app = create_app(FaultSettings(args))
+    print(f"Stub APIs on http://{args.host}:{args.port}/v1 - set TOGETHER_BASE_URL and OPENAI_BASE_URL to this")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
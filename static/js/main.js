@@ -7,7 +7,8 @@ let gameState = {
     character: null,
     inventory: {},
     history: [],
-    examples: []
+    examples: [],
+    gameId: null
 };
 
 let googleAuthInitialized = false;
@@ -395,6 +396,9 @@ async function initializeGame(inventory) {
         if (data.error) {
             throw new Error(data.error);
         }
+
+        // Remember which game this tab is playing
+        gameState.gameId = data.game_id;
         
         // Transition screens
         hideLoadingOverlay();
@@ -505,9 +509,17 @@ function displayInitialStory(data) {
     welcomeMessage.textContent = story;
     document.getElementById('gameOutput').appendChild(welcomeMessage);
     
-    // Handle initial story image
+    // Handle initial story image, rendered in the background
     if (data.initial_image) {
         displayStoryImage(data.initial_image);
+    } else if (data.image_job) {
+        document.getElementById('storyImageContainer').innerHTML = '<div class="image-loading"></div>';
+        waitForImageJob(data.image_job)
+            .then(displayStoryImage)
+            .catch(error => {
+                console.error('Story image unavailable:', error);
+                document.getElementById('storyImageContainer').innerHTML = '';
+            });
     }
     
     // Add to history
@@ -517,6 +529,55 @@ function displayInitialStory(data) {
     });
 }
 
+// Resolve with the job's image once it is ready. Polls by default; uses
+// Server-Sent Events only when the server offers them with events_url
+function waitForImageJob(job) {
+    const jobId = job.id;
+    const settle = (job, resolve, reject) => {
+        if (job.status === 'done' && job.result) resolve(job.result);
+        else reject(new Error(job.error || 'Image generation failed'));
+    };
+
+    const poll = (resolve, reject) => {
+        fetch(`/image-jobs/${jobId}`)
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'pending' || job.status === 'running') {
+                    setTimeout(() => poll(resolve, reject), 2000);
+                } else {
+                    settle(job, resolve, reject);
+                }
+            })
+            .catch(reject);
+    };
+
+    return new Promise((resolve, reject) => {
+        if (!job.events_url || !window.EventSource) {
+            poll(resolve, reject);
+            return;
+        }
+        const source = new EventSource(job.events_url);
+        const finish = event => {
+            source.close();
+            settle(JSON.parse(event.data), resolve, reject);
+        };
+        source.addEventListener('done', finish);
+        source.addEventListener('error', event => {
+            if (event.data) {
+                finish(event);
+            } else {
+                // Connection problem rather than a failed job
+                source.close();
+                poll(resolve, reject);
+            }
+        });
+        source.addEventListener('timeout', () => {
+            source.close();
+            poll(resolve, reject);
+        });
+    });
+}
+
 function displayStoryImage(imageData) {
     // Create container for image loading state
     const container = document.getElementById('storyImageContainer');
@@ -557,21 +618,29 @@ async function submitAction() {
     displayUserMessage(action);
     
     try {
-        const response = await fetch('/action', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ action })
+        // Show the narrative as it streams in
+        let botMessage = null;
+        const result = await streamAction(action, (text) => {
+            if (!botMessage) {
+                botMessage = document.createElement('div');
+                botMessage.className = 'message bot-message';
+                document.getElementById('gameOutput').appendChild(botMessage);
+            }
+            botMessage.textContent += text;
+            scrollToBottom();
         });
         
-        const result = await response.json();
-        
         if (result.error) {
             showError(result.error);
             return;
         }
         
         // Display bot response
-        displayBotMessage(result);
+        if (botMessage) {
+            botMessage.textContent = result.response;
+        } else {
+            displayBotMessage(result);
+        }
         
         // Update game state
         updateGameState(action, result);
@@ -601,6 +670,51 @@ async function submitAction() {
     }
 }
 
+async function streamAction(action, onToken) {
+    const response = await fetch('/action/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ action, game_id: gameState.gameId })
+    });
+
+    // Errors before streaming starts come back as plain JSON
+    if (!response.ok || !response.body) {
+        return await response.json();
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+
+            const payload = JSON.parse(data);
+            if (eventName === 'token') {
+                onToken(payload.text);
+            } else if (eventName === 'done' || eventName === 'error') {
+                return payload;
+            }
+        }
+    }
+
+    return { error: 'The connection closed before the response finished.' };
+}
+
 function fadeOutGameContainer() {
     const gameContainer = document.getElementById('gameContainer');
     gameContainer.style.opacity = '0';
@@ -656,15 +770,25 @@ async function handlePuzzleCompletion(result) {
     try {
         const imageResponse = await fetch('/generate-completion', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ game_id: gameState.gameId })
         });
         
-        const imageData = await imageResponse.json();
+        let imageData = await imageResponse.json();
+
+        // The image renders in the background; wait for the job to finish
+        if (imageData.job_id) {
+            imageData = {
+                success: true,
+                completion_image: await waitForImageJob(imageData.job || { id: imageData.job_id })
+            };
+        }
         
         if (imageData.success && imageData.completion_image) {
             // Store victory in gallery
             await storeVictory({
                 image_url: imageData.completion_image.url,
+                thumbnail_url: imageData.completion_image.thumbnail_url,
                 world_name: result.world.name,
                 character_name: result.character.name
             });
@@ -1030,9 +1154,9 @@ async function shareToNative(imageUrl) {
 // Function to handle image download
 async function downloadImage(imageUrl) {
     try {
-        // Use proxy route instead of direct URL
-        const proxyUrl = `/proxy-image/${encodeURIComponent(imageUrl)}`;
-        const response = await fetch(proxyUrl);
+        // Stored images are same-origin; remote ones go through the proxy
+        const fetchUrl = imageUrl.startsWith('/') ? imageUrl : `/proxy-image/${encodeURIComponent(imageUrl)}`;
+        const response = await fetch(fetchUrl);
         const blob = await response.blob();
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement('a');
@@ -1122,6 +1246,7 @@ async function generateNewExamples(context) {
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 context: context,
+                game_id: gameState.gameId,
                 location: gameState.town,
                 inventory: gameState.inventory,
                 history: gameState.history
@@ -7,6 +7,8 @@ from .helpers import (
     log_event,
     sanitize_input
 )
+from .logging_utils import configure_logging, debug_event, debug_enabled, sample_request
+from .metrics import MetricsRegistry, instrument_client, llm_method
 
 __all__ = [
     'load_game_data',
@@ -14,5 +16,12 @@ __all__ = [
     'validate_action',
     'format_response',
     'log_event',
-    'sanitize_input'
+    'sanitize_input',
+    'configure_logging',
+    'debug_event',
+    'debug_enabled',
+    'sample_request',
+    'MetricsRegistry',
+    'instrument_client',
+    'llm_method'
 ]
\ No newline at end of file
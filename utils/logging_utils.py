@@ -0,0 +1,143 @@
+# utils/logging_utils.py
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from typing import Any, Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Per-request events go here at DEBUG; at the default INFO level a disabled
+# event costs one cached level check and no formatting.
+event_logger = logging.getLogger('game.events')
+
+_debug_sample_rate = 1.0
+_request_sampled = contextvars.ContextVar('request_sampled', default=True)
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+# The handler configure_logging() installed, replaced if it is called again
+_installed_handler: Optional[logging.Handler] = None
+_atexit_registered = False
+
+
+class _Fields:
+    """Renders event fields as JSON only when a handler formats the record."""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return json.dumps(self.fields, default=str, sort_keys=True)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The writer thread is started by the first record a process logs, so a
+    forked gunicorn worker gets its own while pool children that never log
+    start none.
+    """
+
+    def __init__(self, target: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _listener_pid != os.getpid():
+            _start_listener(self)
+        self.queue.put_nowait(record)
+
+
+def debug_enabled() -> bool:
+    """True if per-request events are being recorded for the current request."""
+    return event_logger.isEnabledFor(logging.DEBUG) and _request_sampled.get()
+
+
+def debug_event(event: str, **fields: Any) -> None:
+    """Record a structured per-request event at DEBUG, e.g. ``debug_event('task_matched', task_id=...)``.
+
+    Values must not be mutated after the call; the record is formatted later,
+    on the log writer thread.
+    """
+    if event_logger.isEnabledFor(logging.DEBUG) and _request_sampled.get():
+        event_logger.debug('%s %s', event, _Fields(fields))
+
+
+def sample_request() -> None:
+    """Decide whether this request's DEBUG events are recorded (see LOG_DEBUG_SAMPLE_RATE)."""
+    # Always set: a pooled thread or reused context may carry an earlier False
+    _request_sampled.set(_debug_sample_rate >= 1.0 or random.random() < _debug_sample_rate)
+
+
+def _start_listener(handler: _DeferredQueueHandler) -> None:
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        # Records the parent queued before fork are the parent's to write
+        handler.queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(handler.queue, handler.target, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def _reset_after_fork() -> None:
+    # The parent's writer thread and lock state do not carry over
+    global _listener, _listener_pid, _listener_lock
+    _listener = None
+    _listener_pid = None
+    _listener_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def stop_logging() -> None:
+    """Flush queued records to disk and stop this process's writer thread."""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+        _listener_pid = None
+
+
+def configure_logging(filename: str, level: str = 'INFO', debug_sample_rate: float = 1.0,
+                      use_queue: bool = True) -> None:
+    """Set up the root logger to write to ``filename``.
+
+    With ``use_queue`` the request thread only enqueues the record; a
+    background thread formats it and writes it to disk. Calling it again
+    replaces the handler installed by the previous call.
+    """
+    global _debug_sample_rate, _installed_handler, _atexit_registered
+    _debug_sample_rate = debug_sample_rate
+
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _installed_handler is not None:
+        stop_logging()
+        root.removeHandler(_installed_handler)
+        getattr(_installed_handler, 'target', _installed_handler).close()
+        _installed_handler = None
+
+    _installed_handler = _DeferredQueueHandler(file_handler) if use_queue else file_handler
+    root.addHandler(_installed_handler)
+    if use_queue and not _atexit_registered:
+        atexit.register(stop_logging)
+        _atexit_registered = True
@@ -0,0 +1,415 @@
+# utils/metrics.py
+"""In-process counters and histograms rendered in the Prometheus text format.
+
+Recording is a dict lookup and a few integer adds under a lock, so it stays
+on in production. Cache hit counts are not recorded at all: each cache
+already keeps them, and they are read from its ``stats()`` at scrape time.
+Every process keeps its own numbers; with several gunicorn workers each
+scrape reports the worker that answered it.
+"""
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labelvalues) -> '_Timer':
+        """Context manager that observes the duration of its block."""
+        return _Timer(self, labelvalues)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labelvalues', 'start')
+
+    def __init__(self, histogram: Histogram, labelvalues: Tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+        return False
+
+
+class MetricsRegistry:
+    """The metrics of this process plus caches read at scrape time."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._caches: Dict[str, Callable[[], Optional[Dict]]] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Optional[Dict]]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, **kwargs)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_gauges(self, prefix: str, documentation: str, stats: Callable[[], Optional[Dict]]) -> None:
+        """Report every numeric value of ``stats()`` as a ``<prefix>_<key>`` gauge."""
+        with self._lock:
+            self._gauges[prefix] = (documentation, stats)
+
+    def register_cache(self, name: str, stats: Callable[[], Optional[Dict]]) -> None:
+        """Report a cache whose ``stats()`` has ``hits`` and ``misses`` (and optionally ``entries``)."""
+        with self._lock:
+            self._caches[name] = stats
+
+    def _cache_lines(self) -> List[str]:
+        with self._lock:
+            caches = sorted(self._caches.items())
+        rows = []
+        for name, stats in caches:
+            try:
+                values = stats()
+            except Exception:
+                continue
+            if values:
+                rows.append((name, values))
+
+        lines = []
+        for metric, kind, documentation, read in (
+            ('cache_hits_total', 'counter', 'Cache lookups answered from the cache.', lambda s: s.get('hits')),
+            ('cache_misses_total', 'counter', 'Cache lookups that missed.', lambda s: s.get('misses')),
+            ('cache_hit_ratio', 'gauge', 'Hits over lookups since the process started.', lambda s: s.get('hit_rate')),
+            ('cache_entries', 'gauge', 'Entries currently held.', lambda s: s.get('entries', s.get('sessions')))
+        ):
+            samples = [(name, read(values)) for name, values in rows if read(values) is not None]
+            if not samples:
+                continue
+            lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"]
+            lines += [f'{metric}{{cache="{_escape(name)}"}} {_number(value)}' for name, value in samples]
+        return lines
+
+    def _gauge_lines(self) -> List[str]:
+        with self._lock:
+            gauges = sorted(self._gauges.items())
+        lines = []
+        for prefix, (documentation, stats) in gauges:
+            try:
+                values = stats() or {}
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines += [f"# HELP {name} {documentation} ({key}).", f"# TYPE {name} gauge",
+                          f"{name} {_number(value if not isinstance(value, bool) else int(value))}"]
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        lines += self._cache_lines()
+        lines += self._gauge_lines()
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route template.',
+    ('method', 'route', 'status'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+llm_call_seconds = registry.histogram(
+    'llm_call_duration_seconds', 'Chat completion latency; streams are timed to the last chunk.',
+    ('agent', 'method'), buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60))
+llm_tokens = registry.counter(
+    'llm_tokens_total', 'Tokens reported in chat completion usage.', ('agent', 'method', 'kind'))
+llm_errors = registry.counter(
+    'llm_call_errors_total', 'Chat completion calls that raised.', ('agent', 'method', 'error'))
+image_generation_seconds = registry.histogram(
+    'image_generation_duration_seconds', 'DALL-E image generation latency.',
+    ('agent', 'method'), buckets=(1, 2.5, 5, 10, 15, 20, 30, 45, 60, 120))
+image_generation_errors = registry.counter(
+    'image_generation_errors_total', 'Image generation calls that raised.', ('agent', 'method', 'error'))
+mongodb_command_seconds = registry.histogram(
+    'mongodb_command_duration_seconds', 'MongoDB command round trips, by command name.',
+    ('command',), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+mongodb_command_errors = registry.counter(
+    'mongodb_command_errors_total', 'MongoDB commands that failed.', ('command',))
+
+
+# Set by @llm_method while an agent method runs; read by the client wrappers
+_current_method: ContextVar[str] = ContextVar('llm_method', default='unlabelled')
+
+
+def llm_method(func):
+    """Label the LLM and image calls made inside ``func`` with its name.
+
+    Works on plain and async functions and on (async) generators; for a
+    generator the label is set only while it is being advanced, so it does
+    not leak into the code that consumes it.
+    """
+    name = func.__name__
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            try:
+                while True:
+                    token = _current_method.set(name)
+                    try:
+                        item = await generator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _current_method.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+    elif inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            try:
+                while True:
+                    token = _current_method.set(name)
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    finally:
+                        _current_method.reset(token)
+                    yield item
+            finally:
+                generator.close()
+    elif inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = _current_method.set(name)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_method.reset(token)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_method.set(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_method.reset(token)
+    return wrapper
+
+
+def _record_usage(usage, agent: str, method: str) -> None:
+    if usage is None:
+        return
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        count = getattr(usage, kind, None)
+        if count:
+            llm_tokens.inc(agent, method, kind[:-len('_tokens')], amount=count)
+
+
+class _InstrumentedCompletions:
+    """``chat.completions`` that records latency, usage and errors per agent method."""
+
+    def __init__(self, completions, agent: str):
+        self._completions = completions
+        self._agent = agent
+
+    def _finish(self, method: str, start: float, usage) -> None:
+        llm_call_seconds.observe(time.perf_counter() - start, self._agent, method)
+        _record_usage(usage, self._agent, method)
+
+    def _stream(self, stream, method: str, start: float):
+        usage = None
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, 'usage', None) or usage
+                yield chunk
+        except Exception as e:
+            llm_errors.inc(self._agent, method, type(e).__name__)
+            raise
+        self._finish(method, start, usage)
+
+    def create(self, *args, **kwargs):
+        method = _current_method.get()
+        start = time.perf_counter()
+        try:
+            response = self._completions.create(*args, **kwargs)
+        except Exception as e:
+            llm_errors.inc(self._agent, method, type(e).__name__)
+            raise
+        if kwargs.get('stream'):
+            return self._stream(response, method, start)
+        self._finish(method, start, getattr(response, 'usage', None))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _InstrumentedAsyncCompletions(_InstrumentedCompletions):
+    async def _astream(self, stream, method: str, start: float):
+        usage = None
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, 'usage', None) or usage
+                yield chunk
+        except Exception as e:
+            llm_errors.inc(self._agent, method, type(e).__name__)
+            raise
+        self._finish(method, start, usage)
+
+    async def create(self, *args, **kwargs):
+        method = _current_method.get()
+        start = time.perf_counter()
+        try:
+            response = await self._completions.create(*args, **kwargs)
+        except Exception as e:
+            llm_errors.inc(self._agent, method, type(e).__name__)
+            raise
+        if kwargs.get('stream'):
+            return self._astream(response, method, start)
+        self._finish(method, start, getattr(response, 'usage', None))
+        return response
+
+
+class _InstrumentedImages:
+    def __init__(self, images, agent: str):
+        self._images = images
+        self._agent = agent
+
+    def generate(self, *args, **kwargs):
+        method = _current_method.get()
+        start = time.perf_counter()
+        try:
+            response = self._images.generate(*args, **kwargs)
+        except Exception as e:
+            image_generation_errors.inc(self._agent, method, type(e).__name__)
+            raise
+        image_generation_seconds.observe(time.perf_counter() - start, self._agent, method)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._images, name)
+
+
+class _InstrumentedChat:
+    def __init__(self, chat, agent: str, asynchronous: bool):
+        wrapper = _InstrumentedAsyncCompletions if asynchronous else _InstrumentedCompletions
+        self.completions = wrapper(chat.completions, agent)
+        self._chat = chat
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+
+class InstrumentedClient:
+    """Wraps a Together or OpenAI client so its chat and image calls are measured.
+
+    Calls are labelled with ``agent`` and the agent method that made them,
+    as marked with ``@llm_method``; everything else passes through to the
+    wrapped client.
+    """
+
+    def __init__(self, client, agent: str, asynchronous: bool = False):
+        self._client = client
+        self.agent = agent
+        if hasattr(client, 'chat'):
+            self.chat = _InstrumentedChat(client.chat, agent, asynchronous)
+        if hasattr(client, 'images'):
+            self.images = _InstrumentedImages(client.images, agent)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_client(client, agent: str, asynchronous: bool = False):
+    """Return ``client`` wrapped for metrics, or as-is if it already is."""
+    if isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client, agent, asynchronous)